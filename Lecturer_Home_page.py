@@ -1,19 +1,23 @@
 import tkinter as tk
 from Navigation_Bar import create_navbar
 from database_conn import connect_db
-from UserData import get_user_details
+from UserData import get_user_details, set_user
 import sys
+import lecturer_shell
 import tkinter.messagebox as messagebox
 
 
-def show_lecturer_home_page():
+def show_lecturer_home_page(root, lecturer_id=None):
+    if lecturer_id:
+        set_user(lecturer_id)
+
     # Get user data
     user_data = get_user_details()
     if not user_data:
         print("No user data found. Please log in!")
+        root.destroy()
         return
-        
-    root = tk.Tk()
+
     root.title("Lecturer Home Page")
     root.state("zoomed")
 
@@ -40,8 +44,6 @@ def show_lecturer_home_page():
     welcome_label = tk.Label(content_frame, text=welcome_text, font=("Arial", 20, "bold"))
     welcome_label.pack(expand=True)
 
-    root.mainloop()
-
 
 if __name__ == "__main__":
-    show_lecturer_home_page()
\ No newline at end of file
+    lecturer_shell.start("lecturer_home", sys.argv[1] if len(sys.argv) > 1 else None)
@@ -1,10 +1,9 @@
 import tkinter as tk
 from PIL import Image, ImageTk
 import os
-import subprocess
-import sys
 from tkinter import messagebox
 from UserData import get_user_details, get_user, set_user
+import lecturer_shell
 
 
 def create_navbar(root, lecturer_id):
@@ -25,11 +24,11 @@ def create_navbar(root, lecturer_id):
         # Construct the path to the logo image
         logo_path = os.path.join(current_dir, "images", "logo.png")
 
-        logo_image = Image.open(logo_path)
-        logo_image = logo_image.resize((200, 150))  # Resize the logo
-
-        # Store images inside `root` to prevent garbage collection
-        root.logo_photo = ImageTk.PhotoImage(logo_image)
+        # Store images inside `root` to prevent garbage collection (and reuse them on the next screen)
+        if getattr(root, "logo_photo", None) is None:
+            logo_image = Image.open(logo_path)
+            logo_image = logo_image.resize((200, 150))  # Resize the logo
+            root.logo_photo = ImageTk.PhotoImage(logo_image)
 
     except FileNotFoundError:
         print("Image file not found")
@@ -41,16 +40,14 @@ def create_navbar(root, lecturer_id):
 
     def go_to_lecturer_home():
         try:
-            root.destroy()
-            subprocess.run([sys.executable, "Content_Management_Main_page.py", str(lecturer_id)])
+            lecturer_shell.navigate("content_management", lecturer_id)
         except Exception as e:
             print(f"Error navigating to lecturer home: {e}")
             messagebox.showerror("Error", "Failed to navigate to lecturer home page")
 
     def go_to_content_management():
         try:
-            root.destroy()
-            subprocess.run([sys.executable, "Content_Management_Main_page.py", str(lecturer_id)])
+            lecturer_shell.navigate("content_management", lecturer_id)
         except Exception as e:
             print(f"Error navigating to content management: {e}")
             messagebox.showerror("Error", "Failed to navigate to content management page")
@@ -73,8 +70,7 @@ def create_navbar(root, lecturer_id):
             if not lecturer_id:
                 messagebox.showerror("Error", "No lecturer ID found. Please log in again.")
                 return
-            root.destroy()
-            subprocess.run([sys.executable, "Student_Analytics.py", str(lecturer_id)])
+            lecturer_shell.navigate("student_analytics", lecturer_id)
         except Exception as e:
             print(f"Error opening student analytics: {e}")
             messagebox.showerror("Error", "Failed to open Student Analytics")
@@ -91,8 +87,7 @@ def create_navbar(root, lecturer_id):
             if not lecturer_id:
                 messagebox.showerror("Error", "No lecturer ID found. Please log in again.")
                 return
-            root.destroy()
-            subprocess.run([sys.executable, "Theme_Shop.py", str(lecturer_id)])
+            lecturer_shell.navigate("theme_shop", lecturer_id)
         except Exception as e:
             print(f"Error opening theme shop: {e}")
             messagebox.showerror("Error", "Failed to open Theme Shop")
@@ -123,9 +118,10 @@ def create_navbar(root, lecturer_id):
     try:
         current_dir = os.path.dirname(os.path.abspath(__file__))
         profile_icon_path = os.path.join(current_dir, "images", "capstoneProfileIcon.jpg")
-        profile_icon = Image.open(profile_icon_path)
-        profile_icon = profile_icon.resize((40, 40))
-        root.profile_photo = ImageTk.PhotoImage(profile_icon)
+        if getattr(root, "profile_photo", None) is None:
+            profile_icon = Image.open(profile_icon_path)
+            profile_icon = profile_icon.resize((40, 40))
+            root.profile_photo = ImageTk.PhotoImage(profile_icon)
         has_profile_photo = True
         print("Debug: Profile image loaded successfully")
     except FileNotFoundError:
@@ -181,8 +177,7 @@ def create_navbar(root, lecturer_id):
     def logout_user():
         hide_profile_dropdown()
         if messagebox.askyesno("Log Out", "Are you sure you want to log out and close the application?"):
-            root.destroy()
-            subprocess.run([sys.executable, "Login.py"])
+            lecturer_shell.logout()
 
     profile_button.bind("<Button-1>", lambda e: show_profile_dropdown())
     root.bind("<Button-1>",
@@ -3,25 +3,382 @@ from tkinter import ttk, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import sys
-from database_conn import connect_db  # Import the standardized connection function
-import pyodbc
+from database_conn import connect_db, pooled_connection  # Import the standardized connection function
+import db_backend
 from datetime import datetime
 from UserData import get_user
 from Navigation_Bar import create_navbar  # Add navigation bar
+import lecturer_shell
+import level_stats
+import student_search
+from db_backend import get_backend
+from tk_tasks import TaskRunner
 import math
+import numpy as np
+from collections import OrderedDict
+from collections.abc import Mapping
+import time
+import app_events
+
+
+# Questions per level, used to turn correct answers into a progress percentage
+QUESTIONS_PER_LEVEL = 5
+
+# Wait this long after the last key press before searching (ms)
+SEARCH_DELAY = 250
+
+# Reward panel: rows built per scroll step, and how long a student's items stay
+# cached. Purchases made in this process invalidate the cache at once, the TTL
+# covers the student game, which runs in its own process.
+REWARD_BATCH = 25
+REWARD_CACHE_TTL = 60
+
+# Background query keys of the panels shown in the main frame
+MAIN_PANELS = ("level_analytics", "progress", "overall_performance", "level_performance",
+               "comparison", "rewards")
+
+_reward_cache = {}  # TP_Number -> (time fetched, rows of fetch_reward_data)
+
+
+def _forget_rewards(tp_number=None, **data):
+    """Drop the cached items of one student, or of everyone when the catalogue changed"""
+    if tp_number is None:
+        _reward_cache.clear()
+    else:
+        _reward_cache.pop(tp_number, None)
+
+
+app_events.subscribe("inventory_changed", _forget_rewards)
+app_events.subscribe("items_changed", _forget_rewards)
+
+
+class LevelValues(Mapping):
+    """Read-only {level label: value} view of one student's row in a (student, level) array"""
+
+    def __init__(self, level_index, row, make_value=None):
+        self.level_index = level_index  # level label -> column
+        self.row = row
+        self.make_value = make_value
+
+    def __getitem__(self, level):
+        column = self.level_index[level]
+        if self.make_value:
+            return self.make_value(column)
+        return self.row[column].item()
+
+    def __iter__(self):
+        return iter(self.level_index)
+
+    def __len__(self):
+        return len(self.level_index)
+
+    def values(self):
+        if self.make_value:
+            return [self.make_value(column) for column in range(len(self.level_index))]
+        return self.row.tolist()
+
+
+class PlayerTable:
+    """
+    Submission totals of every student for every level, stored column-wise:
+    attempts, correct and progress are NumPy arrays indexed by
+    (student row, level column).
+    """
+
+    def __init__(self, level_ids, level_labels):
+        self.level_ids = level_ids
+        self.level_labels = level_labels
+        self.level_column = {level_id: j for j, level_id in enumerate(level_ids)}
+        self.label_column = {label: j for j, label in enumerate(level_labels)}
+        self.student_row = {}  # TP_Number -> row
+        self.attempts = np.zeros((0, len(level_ids)), dtype=np.int32)
+        self.correct = np.zeros((0, len(level_ids)), dtype=np.int32)
+        self.progress = np.zeros((0, len(level_ids)), dtype=np.float64)
+
+    def load(self, cursor, student_ids):
+        """Fill the arrays from the LevelStats rows (one per student and level)"""
+        self.student_row = {student_id: i for i, student_id in enumerate(student_ids)}
+        shape = (len(student_ids), len(self.level_ids))
+        self.attempts = np.zeros(shape, dtype=np.int32)
+        self.correct = np.zeros(shape, dtype=np.int32)
+
+        cursor.execute("""
+            SELECT TP_Number, LevelID, attempts, correct
+            FROM LevelStats
+            WHERE attempts > 0
+        """)
+
+        rows, columns, attempts, correct = [], [], [], []
+        for tp_number, level_id, attempt_count, correct_count in cursor.fetchall():
+            i = self.student_row.get(tp_number)
+            j = self.level_column.get(level_id)
+            if i is None or j is None:
+                continue
+            rows.append(i)
+            columns.append(j)
+            attempts.append(attempt_count or 0)
+            correct.append(correct_count or 0)
+
+        if rows:
+            self.attempts[rows, columns] = attempts
+            self.correct[rows, columns] = correct
+
+        # progress (%) = correct answers out of the questions in a level, only where attempted
+        self.progress = np.where(self.attempts > 0,
+                                 np.minimum(100.0, self.correct * (100.0 / QUESTIONS_PER_LEVEL)), 0.0)
+
+    def average_progress(self):
+        """Mean progress over all levels, one value per student"""
+        if not self.level_ids:
+            return np.zeros(len(self.student_row))
+        return self.progress.mean(axis=1)
+
+    def performance(self, i):
+        """Per-level {correct, total, time_spent} of student row i"""
+        def make_value(j):
+            return {
+                "correct": int(self.correct[i, j]),
+                "total": int(self.attempts[i, j]),
+                "time_spent": "0 mins"
+            }
+        return LevelValues(self.label_column, None, make_value)
+
+
+class PlayerListView:
+    """
+    Virtual player list on a ttk.Treeview. Only the rows that fit in the tree
+    exist as items and scrolling changes which players they show. Players are
+    fetched a page at a time, sorted and filtered by the database, and the
+    most recently used pages are kept.
+    """
+
+    PAGE_SIZE = 100
+    CACHED_PAGES = 10
+    ROW_HEIGHT = 20  # ttk.Treeview default
+    HEADING_HEIGHT = 25
+
+    # column -> ORDER BY expression (see fetch_page)
+    SORT_COLUMNS = {
+        "ID": "s.TP_Number",
+        "Name": "s.Name",
+        "Points": "Score",
+        "Current Level": "current_level",
+        "Progress": "avg_progress"
+    }
+
+    def __init__(self, tree, scrollbar, status_label, run_query, level_count):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.status_label = status_label
+        self.run_query = run_query
+        self.level_count = level_count
+
+        self.search = ""
+        self.sort_column = "ID"
+        self.descending = False
+        self.generation = 0  # bumped whenever the search or sort changes
+        self.total = None  # players matching the search, None until counted
+        self.offset = 0  # index of the first player shown
+        self.visible = 20  # rows that fit in the tree
+        self.items = []  # tree item IDs, one per visible row
+        self.pages = OrderedDict()  # page number -> rows, least recently used first
+        self.pending = set()  # page numbers being fetched
+        self.selected_id = None  # TP_Number of the selected player
+
+        self.headings = {column: self.tree.heading(column)["text"] for column in self.SORT_COLUMNS}
+        for column in self.SORT_COLUMNS:
+            self.tree.heading(column, command=lambda c=column: self.sort_by(c))
+
+        self.scrollbar.config(command=self.yview)
+        self.tree.bind("<Configure>", self.on_configure)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.visible))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.visible))
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+    def set_query(self, search=None):
+        """Show the players matching search (the current search if None) from the top"""
+        if search is not None:
+            self.search = search.strip()
+        self.generation += 1
+        self.total = None
+        self.offset = 0
+        self.pages.clear()
+        self.pending.clear()
+        self.render()
+
+    def sort_by(self, column):
+        """Sort by column, a second click on the same column reverses the order"""
+        if column == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column
+            self.descending = False
+        for name, text in self.headings.items():
+            arrow = (" \u25bc" if self.descending else " \u25b2") if name == column else ""
+            self.tree.heading(name, text=text + arrow)
+        self.set_query()
+
+    def scroll(self, rows):
+        self.move_to(self.offset + rows)
+        return "break"  # the tree itself has nothing to scroll
+
+    def move_to(self, offset):
+        last = max(0, (self.total or 0) - self.visible)
+        offset = max(0, min(int(offset), last))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def yview(self, *args):
+        """Scrollbar command: positions are fractions of the whole result, not of the tree"""
+        if args[0] == "moveto":
+            self.move_to(float(args[1]) * (self.total or 0))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.scroll(step * self.visible if args[2] == "pages" else step)
+
+    def on_configure(self, event):
+        visible = max(1, (event.height - self.HEADING_HEIGHT) // self.ROW_HEIGHT)
+        if visible != self.visible:
+            self.visible = visible
+            self.move_to(self.offset)
+            self.render()
+
+    def on_select(self, event):
+        # selection_set from render() also lands here; an empty selection keeps the remembered player
+        selection = self.tree.selection()
+        if selection:
+            values = self.tree.item(selection[0])["values"]
+            if values and values[0] != "":
+                self.selected_id = str(values[0])
+
+    def row_values(self, index):
+        """Tree values of the player at index, or a placeholder while its page is loading"""
+        page = index // self.PAGE_SIZE
+        rows = self.pages.get(page)
+        if rows is None:
+            self.request_page(page)
+            return ("", "Loading...", "", "", "")
+        self.pages.move_to_end(page)
+        position = index - page * self.PAGE_SIZE
+        if position >= len(rows):
+            return ("", "", "", "", "")
+        row = rows[position]
+        return (row.TP_Number, row.Name, row.Score, row.current_level, f"{row.avg_progress:.1f}%")
+
+    def render(self):
+        """Point the tree items at the players from offset on"""
+        while len(self.items) < self.visible:
+            self.items.append(self.tree.insert("", tk.END, values=("", "", "", "", "")))
+        while len(self.items) > self.visible:
+            self.tree.delete(self.items.pop())
+
+        shown = self.visible if self.total is None else max(0, min(self.visible, self.total - self.offset))
+        selected = None
+        for i, item in enumerate(self.items):
+            if i >= shown:
+                self.tree.detach(item)
+                continue
+            self.tree.move(item, "", i)
+            values = self.row_values(self.offset + i)
+            self.tree.item(item, values=values)
+            if self.selected_id is not None and str(values[0]) == self.selected_id:
+                selected = item
+        if selected:
+            self.tree.selection_set(selected)
+        else:
+            self.tree.selection_remove(*self.tree.selection())
+
+        # prefetch the page after the visible rows so scrolling down does not wait
+        if self.total is not None and self.offset + self.visible < self.total:
+            self.request_page((self.offset + self.visible) // self.PAGE_SIZE)
+
+        if self.total is None:
+            self.scrollbar.set(0, 1)
+            self.status_label.config(text="Loading players...")
+        elif self.total == 0:
+            self.scrollbar.set(0, 1)
+            self.status_label.config(text="No players found")
+        else:
+            self.scrollbar.set(self.offset / self.total, (self.offset + shown) / self.total)
+            self.status_label.config(text=f"Players {self.offset + 1}-{self.offset + shown} of {self.total}")
+
+    def request_page(self, page):
+        """Fetch a page in the background unless it is cached or already on its way"""
+        if page in self.pages or page in self.pending:
+            return
+        self.pending.add(page)
+        generation = self.generation
+        search, sort_column, descending = self.search, self.sort_column, self.descending
+        with_count = self.total is None
+
+        def query(cursor):
+            return self.fetch_page(cursor, search, sort_column, descending, page * self.PAGE_SIZE,
+                                   self.PAGE_SIZE, with_count)
+
+        def on_done(result):
+            if generation != self.generation:
+                return
+            self.pending.discard(page)
+            rows, total = result
+            if total is not None:
+                self.total = total
+            self.pages[page] = rows
+            while len(self.pages) > self.CACHED_PAGES:
+                self.pages.popitem(last=False)
+            self.render()
+
+        def on_error(e):
+            print(f"Error loading players: {e}")
+            if generation == self.generation:
+                self.pending.discard(page)
+                self.status_label.config(text="Error loading players")
+
+        self.run_query(("player_page", page), query, on_done, on_error, self.tree)
+
+    def fetch_page(self, cursor, search, sort_column, descending, offset, limit, with_count):
+        """Worker thread: one page of players (and how many match, if with_count)"""
+        condition, params = student_search.search_filter(search)
+        order = self.SORT_COLUMNS[sort_column] + (" DESC" if descending else "")
+        page_clause, page_params = get_backend().page_clause(offset, limit)
+
+        total = None
+        if with_count:
+            cursor.execute(f"SELECT COUNT(*) FROM Students s WHERE {condition}", *params)
+            total = cursor.fetchone()[0]
+
+        # average progress over every level, a level's progress is its correct answers out of QUESTIONS_PER_LEVEL
+        cursor.execute(f"""
+            SELECT
+                s.TP_Number,
+                s.Name,
+                COALESCE(s.Score, 0) AS Score,
+                COALESCE(s.current_level, 1) AS current_level,
+                COALESCE((
+                    SELECT SUM(CASE WHEN st.correct >= ? THEN 100.0 ELSE st.correct * ? END)
+                    FROM LevelStats st
+                    JOIN Levels l ON st.LevelID = l.LevelID
+                    WHERE st.TP_Number = s.TP_Number AND st.attempts > 0
+                ), 0) / ? AS avg_progress
+            FROM Students s
+            WHERE {condition}
+            ORDER BY {order}, s.TP_Number
+            {page_clause}
+        """, QUESTIONS_PER_LEVEL, 100.0 / QUESTIONS_PER_LEVEL, max(1, self.level_count), *params, *page_params)
+        return cursor.fetchall(), total
 
 
 class StudentAnalytics:
-    def __init__(self, root):
+    def __init__(self, root, lecturer_id=None):
         self.root = root
         self.root.title("Student Analytics")
         self.root.state('zoomed')
 
-        # Get lecturer ID from command line arguments
-        if len(sys.argv) > 1:
-            self.lecturer_id = sys.argv[1]
-        else:
-            self.lecturer_id = get_user()
+        # Lecturer ID from the lecturer window (or the logged in user)
+        self.lecturer_id = lecturer_id or get_user()
 
         if not self.lecturer_id:
             messagebox.showerror("Error", "No lecturer ID found. Please log in again.")
@@ -36,35 +393,114 @@ class StudentAnalytics:
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self._details_window = None
 
-        # Initialize database connection
-        self.conn = connect_db()  # Use the standardized connection function
-        if not self.conn:
-            messagebox.showerror("Database Error", "Failed to connect to database. Please check your connection.")
-            self.root.destroy()
-            return
-
-        # Data setup
-        self.levels = self.get_levels_from_db()
-        if not self.levels:
-            messagebox.showerror("Error", "No levels found in database")
-            self.root.destroy()
-            return
-
-        self.players = self.fetch_player_data()
-        if not self.players:
-            messagebox.showerror("Error", "No player data found in database")
-            self.root.destroy()
-            return
+        # Queries run on worker threads so the window never freezes while the database works
+        self.tasks = TaskRunner(self.root)
 
+        # Data setup (filled in by load_dashboard_data)
+        self.level_ids = []
+        self.levels = []
+        self.players = []
+        self.player_table = PlayerTable([], [])
         self.current_player = None
 
-        # UI Setup
+        # UI Setup, the menu is enabled once the player data has arrived
         self.create_sidebar()
         self.create_main_content()
+        self.set_menu_state("disabled")
+        self.show_loading(self.main_frame, "Loading player data...")
+        self.run_query("dashboard", self.load_dashboard_data, self.on_dashboard_loaded,
+                       self.on_dashboard_error, self.main_frame)
+
+    def run_query(self, panel, query, on_done, on_error=None, widget=None):
+        """
+        Run query(cursor) on a worker thread with its own pooled connection and
+        call on_done(result) on the Tk thread. A newer request for the same panel
+        replaces one still running; widget is where the result will be shown.
+        """
+        def work():
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    return query(cursor)
+                finally:
+                    cursor.close()
+
+        if on_error is None:
+            def on_error(e):
+                print(f"Error loading {panel}: {e}")
+                if widget is not None:
+                    self.show_error_in(widget, f"Database error: {e}")
+
+        return self.tasks.submit(panel, work, on_done, on_error, widget)
+
+    def show_loading(self, parent, text="Loading..."):
+        """Placeholder shown in parent until its data has arrived"""
+        label = tk.Label(parent, text=text, font=("Arial", 12, "italic"), fg="#7f8c8d",
+                         bg=parent.cget("bg") if isinstance(parent, tk.Frame) else None)
+        label.pack(pady=50)
+        return label
+
+    def show_error_in(self, parent, message):
+        """Replace whatever parent shows with an error message"""
+        for widget in parent.winfo_children():
+            widget.destroy()
+        tk.Label(parent, text=message, font=("Arial", 12), fg="red").pack(pady=50)
+
+    def load_panel(self, panel, frame, query, render, loading_text="Loading...", on_error=None):
+        """Show a loading placeholder in frame, run query(cursor) in the background, then render(result)"""
+        self.show_loading(frame, loading_text)
 
-        # Show default view
+        def clear():
+            for widget in frame.winfo_children():
+                widget.destroy()
+
+        def on_done(result):
+            clear()
+            render(result)
+
+        def on_query_error(e):
+            if on_error is None:
+                print(f"Error loading {panel}: {e}")
+                self.show_error_in(frame, f"Database error: {e}")
+            else:
+                clear()
+                on_error(e)
+
+        return self.run_query(panel, query, on_done, on_query_error, frame)
+
+    def load_dashboard_data(self, cursor):
+        """Worker thread: levels, players and their per-level totals"""
+        # Per student, per level totals the dashboards read (filled from Submissions on first use)
+        try:
+            level_stats.ensure_ready()
+        except Exception as e:
+            print(f"Error preparing level statistics: {e}")
+
+        try:
+            student_search.ensure_ready()
+        except Exception as e:
+            print(f"Error preparing student search index: {e}")
+
+        level_ids, levels = self.get_levels_from_db(cursor)
+        players, player_table = self.fetch_player_data(cursor, level_ids, levels)
+        return level_ids, levels, players, player_table
+
+    def on_dashboard_loaded(self, result):
+        self.level_ids, self.levels, self.players, self.player_table = result
+        if not self.levels:
+            self.show_error_in(self.main_frame, "No levels found in database")
+            return
+        if not self.players:
+            self.show_error_in(self.main_frame, "No player data found in database")
+            return
+
+        self.set_menu_state("normal")
         self.show_player_overview()
 
+    def on_dashboard_error(self, e):
+        print("Error loading dashboard data:", e)
+        self.show_error_in(self.main_frame, "Failed to connect to database. Please check your connection.")
+
     def on_close(self):
         """Handle window close event"""
         if messagebox.askyesno("Log Out", "Are you sure you want to log out and close the application?"):
@@ -80,17 +516,9 @@ class StudentAnalytics:
         """Clean up resources"""
         # Close all matplotlib figures
         plt.close('all')
-        # Close database connections
-        if hasattr(self, 'cursor'):
-            try:
-                self.cursor.close()
-            except:
-                pass
-        if hasattr(self, 'conn'):
-            try:
-                self.conn.close()
-            except:
-                pass
+        # Drop pending queries (each worker returns its connection to the pool when done)
+        if hasattr(self, 'tasks'):
+            self.tasks.shutdown()
         # Destroy any remaining child windows
         for child in self.root.winfo_children():
             if isinstance(child, tk.Toplevel):
@@ -109,22 +537,22 @@ class StudentAnalytics:
         """Connect to SQL Server database using the standardized connection"""
         return connect_db()  # Simply return the standardized connection
 
-    def get_levels_from_db(self):
-        """Fetch levels from database"""
+    def get_levels_from_db(self, cursor):
+        """Fetch levels from database: (LevelIDs, "LevelID - Name" labels)"""
         try:
-            cursor = self.conn.cursor()
             cursor.execute("SELECT DISTINCT LevelID, Name FROM Levels ORDER BY LevelID")
-            return [f"{row.LevelID} - {row.Name}" for row in cursor.fetchall()]
-        except pyodbc.Error as e:
+            rows = cursor.fetchall()
+            return [row.LevelID for row in rows], [f"{row.LevelID} - {row.Name}" for row in rows]
+        except db_backend.Error as e:
             print("Error fetching levels:", e)
-            return []
+            return [], []
 
-    def fetch_player_data(self):
-        """Fetch player data from database"""
+    def fetch_player_data(self, cursor, level_ids, levels):
+        """Fetch player data from database (two queries, joined through dict and array indexes)"""
         players = []
+        player_table = PlayerTable(level_ids, levels)
         try:
             # Fetch basic player info
-            cursor = self.conn.cursor()
             cursor.execute("""
                 SELECT 
                     TP_Number, 
@@ -134,67 +562,30 @@ class StudentAnalytics:
                     current_level
                 FROM Students
             """)
+            students = cursor.fetchall()
 
-            for row in cursor.fetchall():
-                player = {
+            # Per-level totals of every student from the LevelStats table
+            player_table.load(cursor, [row.TP_Number for row in students])
+            average_progress = player_table.average_progress()
+
+            for i, row in enumerate(students):
+                players.append({
                     "id": row.TP_Number,
                     "name": row.Name,
                     "email": row.Email,
                     "points": row.Score if row.Score is not None else 0,
                     "current_level": row.current_level if row.current_level is not None else 1,
-                    "progress": {},
-                    "attempts": {},
-                    "performance": {}
-                }
+                    "progress": LevelValues(player_table.label_column, player_table.progress[i]),
+                    "attempts": LevelValues(player_table.label_column, player_table.attempts[i]),
+                    "performance": player_table.performance(i),
+                    "avg_progress": float(average_progress[i])
+                })
+
+            return players, player_table
 
-                # Initialize level data
-                for level in self.levels:
-                    player["progress"][level] = 0
-                    player["attempts"][level] = 0
-                    player["performance"][level] = {
-                        "correct": 0,
-                        "total": 0,
-                        "time_spent": "0 mins"
-                    }
-
-                players.append(player)
-
-            # Fetch progress data if we have players
-            if players:
-                cursor.execute("""
-                    SELECT 
-                        s.TP_Number, 
-                        q.LevelID, 
-                        COUNT(*) AS Attempts,
-                        SUM(CASE WHEN s.status = 1 THEN 1 ELSE 0 END) AS Correct
-                    FROM Submissions s
-                    JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-                    GROUP BY s.TP_Number, q.LevelID
-                """)
-
-                for row in cursor.fetchall():
-                    level = f"Level {row.LevelID} - {next((l.split(' - ')[1] for l in self.levels if l.startswith(f'Level {row.LevelID}')), '')}"
-                    student_id = row.TP_Number
-
-                    # Find the player
-                    player = next((p for p in players if p["id"] == student_id), None)
-                    if player:
-                        # Calculate progress (assuming 5 questions per level based on sample data)
-                        progress = min(100, (row.Correct / 5) * 100) if row.Attempts > 0 else 0
-
-                        player["progress"][level] = progress
-                        player["attempts"][level] = row.Attempts
-                        player["performance"][level] = {
-                            "correct": row.Correct,
-                            "total": row.Attempts,
-                            "time_spent": "0 mins"
-                        }
-
-            return players
-
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             print("Error fetching player data:", e)
-            return []
+            return [], player_table
 
     def create_header(self):
         """Create the header section with logo"""
@@ -229,6 +620,7 @@ class StudentAnalytics:
         menu_title.pack(fill="x", pady=10)
 
         # Menu buttons
+        self.menu_buttons = []
         buttons = [
             ("Player Overview", self.show_player_overview),
             ("Level Analytics", self.show_level_analytics),
@@ -251,6 +643,7 @@ class StudentAnalytics:
                 command=command
             )
             btn.pack(fill="x")
+            self.menu_buttons.append(btn)
 
             # Create proper event handler functions
             def on_enter(event, button=btn):
@@ -262,6 +655,11 @@ class StudentAnalytics:
             btn.bind("<Enter>", on_enter)
             btn.bind("<Leave>", on_leave)
 
+    def set_menu_state(self, state):
+        """Enable ("normal") or disable ("disabled") the sidebar buttons"""
+        for btn in self.menu_buttons:
+            btn.config(state=state)
+
     def create_main_content(self):
         """Create the main content area"""
         self.main_frame = tk.Frame(self.root, bg="#f0f0f0")
@@ -269,6 +667,10 @@ class StudentAnalytics:
 
     def clear_main_frame(self):
         """Clear the main content frame"""
+        # results of the panel being closed are no longer wanted (the details window stays)
+        for panel in MAIN_PANELS:
+            self.tasks.cancel(panel)
+
         # First destroy any matplotlib figures
         for widget in self.main_frame.winfo_children():
             if hasattr(widget, 'get_tk_widget'):  # Matplotlib canvas
@@ -299,6 +701,9 @@ class StudentAnalytics:
         tk.Label(search_frame, text="Search Player:", bg="#f0f0f0").pack(side="left")
         self.search_entry = tk.Entry(search_frame, width=30)
         self.search_entry.pack(side="left", padx=5)
+        self.search_entry.bind("<KeyRelease>", self.search_as_you_type)
+        self.search_entry.bind("<Return>", lambda e: self.search_players())
+        self._search_job = None
         search_btn = tk.Button(search_frame, text="Search", command=self.search_players)
         search_btn.pack(side="left", padx=5)
 
@@ -309,8 +714,7 @@ class StudentAnalytics:
         # Calculate overall stats with zero division protection
         total_players = len(self.players)
         avg_points = sum(p["points"] for p in self.players) / total_players if total_players > 0 else 0
-        avg_progress = sum(sum(p["progress"].values()) for p in self.players) / (
-                    total_players * len(self.levels)) if total_players > 0 else 0
+        avg_progress = float(self.player_table.progress.mean()) if total_players > 0 and self.levels else 0
         active_players = len([p for p in self.players if p["points"] > 100])
 
         # Stat cards
@@ -341,7 +745,7 @@ class StudentAnalytics:
             tree_frame,
             columns=("ID", "Name", "Points", "Current Level", "Progress"),
             show="headings",
-            yscrollcommand=scroll_y.set
+            selectmode="browse"
         )
 
         # Configure columns
@@ -358,10 +762,14 @@ class StudentAnalytics:
         self.player_tree.column("Progress", width=120, anchor="center")
 
         self.player_tree.pack(fill="both", expand=True)
-        scroll_y.config(command=self.player_tree.yview)
 
-        # Populate table
-        self.populate_player_tree()
+        list_status = tk.Label(self.main_frame, text="", font=("Arial", 10), fg="#7f8c8d", bg="#f0f0f0")
+        list_status.pack(anchor="e", padx=20)
+
+        # Populate table (rows are fetched a page at a time as they scroll into view)
+        self.player_list = PlayerListView(self.player_tree, scroll_y, list_status, self.run_query,
+                                          len(self.level_ids))
+        self.player_list.set_query("")
 
         # View details button
         details_btn = tk.Button(
@@ -374,146 +782,140 @@ class StudentAnalytics:
         )
         details_btn.pack(pady=10)
 
-    def populate_player_tree(self, players=None):
-        """Populate the player treeview"""
-        for item in self.player_tree.get_children():
-            self.player_tree.delete(item)
-
-        players = players or self.players
-        for player in players:
-            avg_progress = sum(player["progress"].values()) / len(self.levels) if len(self.levels) > 0 else 0
-            self.player_tree.insert("", tk.END, values=(
-                player["id"],
-                player["name"],
-                player["points"],
-                player["current_level"],
-                f"{avg_progress:.1f}%"
-            ))
-
     def search_players(self):
-        """Search players based on search term"""
-        query = self.search_entry.get().lower()
-        if not query:
-            self.populate_player_tree()
+        """Search players by TP number or name"""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+            self._search_job = None
+        self.player_list.set_query(self.search_entry.get())
+
+    def search_as_you_type(self, event):
+        """Search once typing pauses"""
+        if event.keysym == "Return" or self.search_entry.get().strip() == self.player_list.search:
             return
-
-        filtered = [
-            p for p in self.players
-            if query in str(p["id"]).lower()
-               or query in p["name"].lower()
-        ]
-        self.populate_player_tree(filtered)
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DELAY, self.search_players)
 
     def view_player_details(self):
         """Show detailed view of selected player"""
-        selected = self.player_tree.focus()
-        if not selected:
+        player_id = self.player_list.selected_id
+        if not player_id:
             messagebox.showwarning("Warning", "Please select a player first")
             return
 
-        item = self.player_tree.item(selected)
-        player_id = item["values"][0]
+        # Create details window, filled in once the player's data has arrived
+        details_window = tk.Toplevel(self.root)
+        details_window.title(f"Player Details - {player_id}")
+        details_window.geometry("800x600")
+        details_window.protocol("WM_DELETE_WINDOW", self.close_details_window)
 
-        try:
-            cursor = self.conn.cursor()
+        # Store reference to avoid garbage collection
+        self._details_window = details_window
+        self.show_loading(details_window, "Loading player details...")
 
-            # Fetch basic player info
-            cursor.execute("""
-                SELECT 
-                    TP_Number, 
-                    Name, 
-                    Email,
-                    Score,
-                    current_level
-                FROM Students
-                WHERE TP_Number = ?
-            """, player_id)
-            player_data = cursor.fetchone()
+        def on_error(e):
+            details_window.destroy()
+            messagebox.showerror("Database Error", f"Error fetching player details: {str(e)}")
 
-            if not player_data:
-                messagebox.showerror("Error", "Player not found")
-                return
+        self.run_query("details", lambda cursor: self.fetch_player_details(cursor, player_id),
+                       lambda result: self.show_player_details(details_window, result), on_error, details_window)
+
+    def fetch_player_details(self, cursor, player_id):
+        """Worker thread: player info, level progress and performance of one player"""
+        # Fetch basic player info
+        cursor.execute("""
+            SELECT 
+                TP_Number, 
+                Name, 
+                Email,
+                Score,
+                current_level
+            FROM Students
+            WHERE TP_Number = ?
+        """, player_id)
+        player_data = cursor.fetchone()
+
+        # Fetch level progress
+        cursor.execute("""
+            SELECT 
+                ls.LevelID,
+                l.Name AS LevelName,
+                ls.is_locked,
+                ls.is_completed,
+                ls.time_remaining
+            FROM LevelSelection ls
+            JOIN Levels l ON ls.LevelID = l.LevelID
+            WHERE ls.TP_Number = ?
+            ORDER BY ls.LevelID
+        """, player_id)
+        level_progress = cursor.fetchall()
+
+        # Fetch performance statistics
+        cursor.execute("""
+            SELECT 
+                ls.LevelID,
+                l.Name AS LevelName,
+                ls.correct AS correct_attempts
+            FROM LevelStats ls
+            JOIN Levels l ON ls.LevelID = l.LevelID
+            WHERE ls.TP_Number = ? AND ls.attempts > 0
+            ORDER BY ls.LevelID
+        """, player_id)
+        performance_stats = cursor.fetchall()
+
+        return player_data, level_progress, performance_stats
+
+    def show_player_details(self, details_window, result):
+        """Fill the details window with the data fetched by fetch_player_details"""
+        player_data, level_progress, performance_stats = result
+        if not player_data:
+            details_window.destroy()
+            messagebox.showerror("Error", "Player not found")
+            return
 
-            # Fetch level progress
-            cursor.execute("""
-                SELECT 
-                    ls.LevelID,
-                    l.Name AS LevelName,
-                    ls.is_locked,
-                    ls.is_completed,
-                    ls.time_remaining
-                FROM LevelSelection ls
-                JOIN Levels l ON ls.LevelID = l.LevelID
-                WHERE ls.TP_Number = ?
-                ORDER BY ls.LevelID
-            """, player_id)
-            level_progress = cursor.fetchall()
+        for widget in details_window.winfo_children():
+            widget.destroy()
+        details_window.title(f"Player Details - {player_data.Name}")
 
-            # Fetch performance statistics
-            cursor.execute("""
-                SELECT 
-                    q.LevelID,
-                    l.Name AS LevelName,
-                    SUM(CASE WHEN s.status = 1 THEN 1 ELSE 0 END) AS correct_attempts
-                FROM Submissions s
-                JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-                JOIN Levels l ON q.LevelID = l.LevelID
-                WHERE s.TP_Number = ?
-                GROUP BY q.LevelID, l.Name
-                ORDER BY q.LevelID
-            """, player_id)
-            performance_stats = cursor.fetchall()
-
-            # Create details window
-            details_window = tk.Toplevel(self.root)
-            details_window.title(f"Player Details - {player_data.Name}")
-            details_window.geometry("800x600")
-            details_window.protocol("WM_DELETE_WINDOW", self.close_details_window)
-
-            # Store reference to avoid garbage collection
-            self._details_window = details_window
-
-            # Player info frame
-            info_frame = tk.Frame(details_window, padx=10, pady=10)
-            info_frame.pack(fill="x")
-
-            tk.Label(info_frame, text=f"ID: {player_data.TP_Number}", font=("Arial", 12)).pack(anchor="w")
-            tk.Label(info_frame, text=f"Name: {player_data.Name}", font=("Arial", 12)).pack(anchor="w")
-            tk.Label(info_frame, text=f"Email: {player_data.Email}", font=("Arial", 12)).pack(anchor="w")
-            tk.Label(info_frame, text=f"Score: {player_data.Score}", font=("Arial", 12)).pack(anchor="w")
-            tk.Label(info_frame, text=f"Current Level: {player_data.current_level}", font=("Arial", 12)).pack(anchor="w")
-
-            # Progress frame
-            progress_frame = tk.LabelFrame(details_window, text="Level Progress", font=("Arial", 12, "bold"))
-            progress_frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-            # Create progress bars for each level
-            for i, level in enumerate(level_progress):
-                level_name = f"{level.LevelID} - {level.LevelName}"
-                status = "Completed" if level.is_completed else "Locked" if level.is_locked else "In Progress"
-                time_spent = f"{int((600 - level.time_remaining) / 60)}m {int((600 - level.time_remaining) % 60)}s" if level.time_remaining is not None else "N/A"
-
-                tk.Label(progress_frame, text=level_name, width=20, anchor="w").grid(row=i, column=0, padx=5, pady=2, sticky="w")
-                tk.Label(progress_frame, text=status, width=15, anchor="w").grid(row=i, column=1, padx=5, pady=2, sticky="w")
-                tk.Label(progress_frame, text=f"Time: {time_spent}", width=15, anchor="w").grid(row=i, column=2, padx=5, pady=2, sticky="w")
-
-            # Performance stats
-            stats_frame = tk.LabelFrame(details_window, text="Performance Statistics", font=("Arial", 12, "bold"))
-            stats_frame.pack(fill="x", padx=10, pady=10)
+        # Player info frame
+        info_frame = tk.Frame(details_window, padx=10, pady=10)
+        info_frame.pack(fill="x")
 
-            # Headers
-            tk.Label(stats_frame, text="Level", width=20, anchor="w", font=("Arial", 10, "bold")).grid(row=0, column=0, padx=5, pady=2, sticky="w")
-            tk.Label(stats_frame, text="Correct Answers", width=15, anchor="w", font=("Arial", 10, "bold")).grid(row=0, column=1, padx=5, pady=2, sticky="w")
+        tk.Label(info_frame, text=f"ID: {player_data.TP_Number}", font=("Arial", 12)).pack(anchor="w")
+        tk.Label(info_frame, text=f"Name: {player_data.Name}", font=("Arial", 12)).pack(anchor="w")
+        tk.Label(info_frame, text=f"Email: {player_data.Email}", font=("Arial", 12)).pack(anchor="w")
+        tk.Label(info_frame, text=f"Score: {player_data.Score}", font=("Arial", 12)).pack(anchor="w")
+        tk.Label(info_frame, text=f"Current Level: {player_data.current_level}", font=("Arial", 12)).pack(anchor="w")
 
-            # Performance data
-            for i, stat in enumerate(performance_stats, start=1):
-                level_name = f"{stat.LevelID} - {stat.LevelName}"
+        # Progress frame
+        progress_frame = tk.LabelFrame(details_window, text="Level Progress", font=("Arial", 12, "bold"))
+        progress_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-                tk.Label(stats_frame, text=level_name, width=20, anchor="w").grid(row=i, column=0, padx=5, pady=2, sticky="w")
-                tk.Label(stats_frame, text=str(stat.correct_attempts), width=15, anchor="w").grid(row=i, column=1, padx=5, pady=2, sticky="w")
+        # Create progress bars for each level
+        for i, level in enumerate(level_progress):
+            level_name = f"{level.LevelID} - {level.LevelName}"
+            status = "Completed" if level.is_completed else "Locked" if level.is_locked else "In Progress"
+            time_spent = f"{int((600 - level.time_remaining) / 60)}m {int((600 - level.time_remaining) % 60)}s" if level.time_remaining is not None else "N/A"
 
-        except pyodbc.Error as e:
-            messagebox.showerror("Database Error", f"Error fetching player details: {str(e)}")
+            tk.Label(progress_frame, text=level_name, width=20, anchor="w").grid(row=i, column=0, padx=5, pady=2, sticky="w")
+            tk.Label(progress_frame, text=status, width=15, anchor="w").grid(row=i, column=1, padx=5, pady=2, sticky="w")
+            tk.Label(progress_frame, text=f"Time: {time_spent}", width=15, anchor="w").grid(row=i, column=2, padx=5, pady=2, sticky="w")
+
+        # Performance stats
+        stats_frame = tk.LabelFrame(details_window, text="Performance Statistics", font=("Arial", 12, "bold"))
+        stats_frame.pack(fill="x", padx=10, pady=10)
+
+        # Headers
+        tk.Label(stats_frame, text="Level", width=20, anchor="w", font=("Arial", 10, "bold")).grid(row=0, column=0, padx=5, pady=2, sticky="w")
+        tk.Label(stats_frame, text="Correct Answers", width=15, anchor="w", font=("Arial", 10, "bold")).grid(row=0, column=1, padx=5, pady=2, sticky="w")
+
+        # Performance data
+        for i, stat in enumerate(performance_stats, start=1):
+            level_name = f"{stat.LevelID} - {stat.LevelName}"
+
+            tk.Label(stats_frame, text=level_name, width=20, anchor="w").grid(row=i, column=0, padx=5, pady=2, sticky="w")
+            tk.Label(stats_frame, text=str(stat.correct_attempts), width=15, anchor="w").grid(row=i, column=1, padx=5, pady=2, sticky="w")
 
     def show_level_analytics(self):
         """Show level analytics dashboard"""
@@ -568,55 +970,59 @@ class StudentAnalytics:
                 raise ValueError(f"No LevelID found for selection: '{selected_level}'")
 
             print(f"Debug - Using LevelID: {level_id} (Type: {type(level_id)})")
+        except Exception as e:
+            self.show_error(f"Error processing analytics: {str(e)}")
+            return
 
-            # Fetch level analytics data from database
-            cursor = self.conn.cursor()
+        # Fetch level analytics data from database
+        self.show_loading(self.chart_frame, "Loading level analytics...")
+        chart_frame = self.chart_frame
 
-            # Parameterized query - let the database handle type conversion
-            cursor.execute("""
-                SELECT 
-                    s.TP_Number,
-                    COUNT(*) AS total_attempts,
-                    SUM(CASE WHEN s.status = 1 THEN 1 ELSE 0 END) AS correct_attempts
-                FROM Submissions s
-                JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-                WHERE q.LevelID = ?
-                GROUP BY s.TP_Number
-            """, (level_id,))
-
-            progress_data = cursor.fetchall()
-
-            # Calculate progress percentages
-            progress_values = []
-            for row in progress_data:
-                try:
-                    progress = (row.correct_attempts / 5) * 100  # 5 questions per level
-                    progress_values.append(min(100, progress))
-                except TypeError:
-                    print(f"Warning: Invalid data for TP_Number {row.TP_Number}")
-                    continue
+        def on_done(progress_data):
+            for widget in chart_frame.winfo_children():
+                widget.destroy()
+            try:
+                self.show_level_analytics_charts(selected_level, progress_data)
+            except Exception as e:
+                self.show_error(f"Error processing analytics: {str(e)}")
 
-            # Attempts distribution query
-            cursor.execute("""
-                SELECT 
-                    s.TP_Number,
-                    COUNT(*) AS attempt_count
-                FROM Submissions s
-                JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-                WHERE q.LevelID = ?
-                GROUP BY s.TP_Number
-            """, (level_id,))
+        def on_error(e):
+            for widget in chart_frame.winfo_children():
+                widget.destroy()
+            self.show_error(f"Database error: {str(e)}")
 
-            attempts_data = cursor.fetchall()
-            attempt_counts = [row.attempt_count for row in attempts_data if row.attempt_count is not None]
+        self.run_query("level_analytics", lambda cursor: self.fetch_level_analytics(cursor, level_id),
+                       on_done, on_error, chart_frame)
+
+    def fetch_level_analytics(self, cursor, level_id):
+        """Worker thread: one LevelStats row per student who attempted the level"""
+        cursor.execute("""
+            SELECT 
+                TP_Number,
+                attempts AS total_attempts,
+                correct AS correct_attempts
+            FROM LevelStats
+            WHERE LevelID = ? AND attempts > 0
+        """, (level_id,))
+        return cursor.fetchall()
+
+    def show_level_analytics_charts(self, selected_level, progress_data):
+        """Draw the level analytics charts from the rows of fetch_level_analytics"""
+        # Calculate progress percentages
+        progress_values = []
+        for row in progress_data:
+            try:
+                progress = (row.correct_attempts / 5) * 100  # 5 questions per level
+                progress_values.append(min(100, progress))
+            except TypeError:
+                print(f"Warning: Invalid data for TP_Number {row.TP_Number}")
+                continue
 
-            # Create and display charts
-            self.display_analytics_charts(selected_level, progress_values, attempt_counts)
+        # Attempts distribution (same rows)
+        attempt_counts = [row.total_attempts for row in progress_data if row.total_attempts is not None]
 
-        except pyodbc.Error as e:
-            self.show_error(f"Database error: {str(e)}")
-        except Exception as e:
-            self.show_error(f"Error processing analytics: {str(e)}")
+        # Create and display charts
+        self.display_analytics_charts(selected_level, progress_values, attempt_counts)
 
     def get_level_id_from_selection(self, selected_level):
         """Helper method to get LevelID from selection"""
@@ -817,68 +1223,70 @@ class StudentAnalytics:
         # Get player ID from selection
         player_id = selected_player.split()[0]
 
-        try:
-            cursor = self.conn.cursor()
+        def on_error(e):
+            print(f"Error fetching progress data for player {player_id}:", e)
+            self.show_error_in(self.progress_chart_frame, "Error loading progress data")
 
-            # Get all submissions for this player with timestamps (using current time as proxy)
-            cursor.execute("""
-                    SELECT 
-                        q.LevelID,
-                        l.Name AS LevelName,
-                        COUNT(*) AS total_questions,
-                        SUM(CASE WHEN s.status = 1 THEN 1 ELSE 0 END) AS correct_answers
-                    FROM Submissions s
-                    JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-                    JOIN Levels l ON q.LevelID = l.LevelID
-                    WHERE s.TP_Number = ?
-                    GROUP BY q.LevelID, l.Name
-                    ORDER BY q.LevelID
-                """, player_id)
-
-            progress_data = cursor.fetchall()
-
-            if not progress_data:
-                tk.Label(self.progress_chart_frame, text="No progress data available for this player",
-                         font=("Arial", 12)).pack(pady=50)
-                return
+        self.load_panel("progress", self.progress_chart_frame,
+                        lambda cursor: self.fetch_progress_data(cursor, player_id),
+                        lambda progress_data: self.show_progress_chart(selected_player, progress_data),
+                        "Loading progress data...", on_error)
 
-            # Prepare data for chart
-            levels = [f"{row.LevelID} - {row.LevelName}" for row in progress_data]
-            completion = [(row.correct_answers / row.total_questions * 100) if row.total_questions > 0 else 0 for row in
-                          progress_data]
+    def fetch_progress_data(self, cursor, player_id):
+        """Worker thread: totals of every level this player attempted"""
+        cursor.execute("""
+                SELECT 
+                    ls.LevelID,
+                    l.Name AS LevelName,
+                    ls.attempts AS total_questions,
+                    ls.correct AS correct_answers
+                FROM LevelStats ls
+                JOIN Levels l ON ls.LevelID = l.LevelID
+                WHERE ls.TP_Number = ? AND ls.attempts > 0
+                ORDER BY ls.LevelID
+            """, player_id)
+        return cursor.fetchall()
 
-            # Create progress chart
-            fig, ax = plt.subplots(figsize=(10, 6))
+    def show_progress_chart(self, selected_player, progress_data):
+        """Draw the progress chart from the rows of fetch_progress_data"""
+        if not progress_data:
+            tk.Label(self.progress_chart_frame, text="No progress data available for this player",
+                     font=("Arial", 12)).pack(pady=50)
+            return
 
-            # Bar chart for level completion
-            bars = ax.bar(levels, completion, color='#3498db')
+        # Prepare data for chart
+        levels = [f"{row.LevelID} - {row.LevelName}" for row in progress_data]
+        completion = [(row.correct_answers / row.total_questions * 100) if row.total_questions > 0 else 0 for row in
+                      progress_data]
 
-            # Add value labels on bars
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width() / 2., height,
-                        f'{height:.1f}%',
-                        ha='center', va='bottom')
+        # Create progress chart
+        fig, ax = plt.subplots(figsize=(10, 6))
 
-            ax.set_title(f"Progress by Level for {selected_player}")
-            ax.set_xlabel("Level")
-            ax.set_ylabel("Completion (%)")
-            ax.set_ylim(0, 110)
+        # Bar chart for level completion
+        bars = ax.bar(levels, completion, color='#3498db')
 
-            # Rotate x-axis labels for better readability
-            plt.xticks(rotation=45, ha='right')
+        # Add value labels on bars
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width() / 2., height,
+                    f'{height:.1f}%',
+                    ha='center', va='bottom')
 
-            # Adjust layout
-            plt.tight_layout()
+        ax.set_title(f"Progress by Level for {selected_player}")
+        ax.set_xlabel("Level")
+        ax.set_ylabel("Completion (%)")
+        ax.set_ylim(0, 110)
 
-            # Display chart in Tkinter
-            canvas = FigureCanvasTkAgg(fig, master=self.progress_chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill="both", expand=True)
+        # Rotate x-axis labels for better readability
+        plt.xticks(rotation=45, ha='right')
 
-        except pyodbc.Error as e:
-            print(f"Error fetching progress data for player {player_id}:", e)
-            tk.Label(self.progress_chart_frame, text="Error loading progress data", font=("Arial", 12)).pack(pady=50)
+        # Adjust layout
+        plt.tight_layout()
+
+        # Display chart in Tkinter
+        canvas = FigureCanvasTkAgg(fig, master=self.progress_chart_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill="both", expand=True)
 
     def show_performance_reports(self):
         """Show performance reports with detailed statistics"""
@@ -913,34 +1321,48 @@ class StudentAnalytics:
 
     def create_overall_performance_tab(self, tab):
         """Create content for overall performance tab"""
-        try:
-            with self.conn.cursor() as cursor:
-                # Get overall statistics
-                cursor.execute("""
-                    SELECT 
-                        COUNT(DISTINCT TP_Number) AS total_players,
-                        AVG(Score) AS avg_score,
-                        MAX(Score) AS max_score,
-                        MIN(Score) AS min_score
-                    FROM Students
-                """)
-                overall_stats = cursor.fetchone()
-
-                # Get level completion rates
-                cursor.execute("""
-                    SELECT 
-                        l.LevelID,
-                        l.Name,
-                        COUNT(DISTINCT ls.TP_Number) AS players_completed,
-                        (SELECT COUNT(DISTINCT TP_Number) FROM Students) AS total_players
-                    FROM LevelSelection ls
-                    JOIN Levels l ON ls.LevelID = l.LevelID
-                    WHERE ls.is_completed = 1
-                    GROUP BY l.LevelID, l.Name
-                    ORDER BY l.LevelID
-                """)
-                level_completion = cursor.fetchall()
+        def on_error(e):
+            print("Error in overall performance tab:", e)
+            tk.Label(tab, text="Error loading performance data",
+                     font=("Arial", 12), bg="#f0f0f0").pack(pady=50)
 
+        self.load_panel("overall_performance", tab, self.fetch_overall_performance,
+                        lambda result: self.show_overall_performance(tab, result),
+                        "Loading performance data...", on_error)
+
+    def fetch_overall_performance(self, cursor):
+        """Worker thread: overall statistics and level completion rates"""
+        # Get overall statistics
+        cursor.execute("""
+            SELECT 
+                COUNT(DISTINCT TP_Number) AS total_players,
+                AVG(Score) AS avg_score,
+                MAX(Score) AS max_score,
+                MIN(Score) AS min_score
+            FROM Students
+        """)
+        overall_stats = cursor.fetchone()
+
+        # Get level completion rates
+        cursor.execute("""
+            SELECT 
+                l.LevelID,
+                l.Name,
+                COUNT(*) AS players_completed,
+                (SELECT COUNT(DISTINCT TP_Number) FROM Students) AS total_players
+            FROM LevelStats ls
+            JOIN Levels l ON ls.LevelID = l.LevelID
+            WHERE ls.is_completed = 1
+            GROUP BY l.LevelID, l.Name
+            ORDER BY l.LevelID
+        """)
+        level_completion = cursor.fetchall()
+        return overall_stats, level_completion
+
+    def show_overall_performance(self, tab, result):
+        """Fill the tab with the data fetched by fetch_overall_performance"""
+        overall_stats, level_completion = result
+        try:
             # Create frames for content
             stats_frame = tk.Frame(tab, bg="#f0f0f0")
             stats_frame.pack(fill="x", padx=10, pady=10)
@@ -1001,26 +1423,37 @@ class StudentAnalytics:
 
     def create_level_performance_tab(self, tab):
         """Create content for level performance tab"""
-        try:
-            with self.conn.cursor() as cursor:
-                # Get level performance statistics
-                cursor.execute("""
-                    SELECT 
-                        q.LevelID,
-                        l.Name AS LevelName,
-                        COUNT(DISTINCT s.TP_Number) AS players_attempted,
-                        COUNT(*) AS total_attempts,
-                        SUM(CASE WHEN s.status = 1 THEN 1 ELSE 0 END) AS correct_attempts,
-                        AVG(CAST(ls.time_remaining AS FLOAT)) AS avg_time_remaining
-                    FROM Submissions s
-                    JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-                    JOIN Levels l ON q.LevelID = l.LevelID
-                    LEFT JOIN LevelSelection ls ON s.TP_Number = ls.TP_Number AND ls.LevelID = q.LevelID
-                    GROUP BY q.LevelID, l.Name
-                    ORDER BY q.LevelID
-                """)
-                level_performance = cursor.fetchall()
+        def on_error(e):
+            print("Error in level performance tab:", e)
+            tk.Label(tab, text="Error loading level performance data",
+                     font=("Arial", 12), bg="#f0f0f0").pack(pady=50)
 
+        self.load_panel("level_performance", tab, self.fetch_level_performance,
+                        lambda result: self.show_level_performance(tab, result),
+                        "Loading level performance data...", on_error)
+
+    def fetch_level_performance(self, cursor):
+        """Worker thread: per-level attempts, accuracy and time"""
+        # Get level performance statistics
+        cursor.execute("""
+            SELECT 
+                ls.LevelID,
+                l.Name AS LevelName,
+                COUNT(*) AS players_attempted,
+                SUM(ls.attempts) AS total_attempts,
+                SUM(ls.correct) AS correct_attempts,
+                AVG(CAST(ls.time_remaining AS FLOAT)) AS avg_time_remaining
+            FROM LevelStats ls
+            JOIN Levels l ON ls.LevelID = l.LevelID
+            WHERE ls.attempts > 0
+            GROUP BY ls.LevelID, l.Name
+            ORDER BY ls.LevelID
+        """)
+        return cursor.fetchall()
+
+    def show_level_performance(self, tab, level_performance):
+        """Fill the tab with the rows fetched by fetch_level_performance"""
+        try:
             # Create frame for stats table
             stats_frame = tk.Frame(tab, bg="#f0f0f0")
             stats_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -1162,59 +1595,78 @@ class StudentAnalytics:
                      font=("Arial", 12), bg="#f0f0f0").pack(pady=50)
             return
 
-        try:
-            # Extract player IDs and names
-            player1_id, player1_name = player1.split(" - ", 1)
-            player2_id, player2_name = player2.split(" - ", 1)
+        # Extract player IDs and names
+        player1_id, player1_name = player1.split(" - ", 1)
+        player2_id, player2_name = player2.split(" - ", 1)
 
-            with self.conn.cursor() as cursor:
-                # Get player comparison data
-                query = """
-                SELECT 
-                    s.TP_Number,
-                    s.Name,
-                    s.Score,
-                    s.current_level,
-                    COUNT(DISTINCT ls.LevelID) AS levels_completed,
-                    (SELECT COUNT(DISTINCT LevelID) FROM Levels) AS total_levels,
-                    (SELECT COUNT(*) FROM Submissions sub 
-                     WHERE sub.TP_Number = s.TP_Number AND sub.status = 1) AS correct_answers,
-                    (SELECT COUNT(*) FROM Submissions sub 
-                     WHERE sub.TP_Number = s.TP_Number) AS total_answers,
-                    (SELECT AVG(600 - ls2.time_remaining) 
-                     FROM LevelSelection ls2 
-                     WHERE ls2.TP_Number = s.TP_Number) AS avg_time_spent
-                FROM Students s
-                LEFT JOIN LevelSelection ls ON s.TP_Number = ls.TP_Number AND ls.is_completed = 1
-                WHERE s.TP_Number IN (?, ?)
-                GROUP BY s.TP_Number, s.Name, s.Score, s.current_level
-                """
-                cursor.execute(query, (player1_id, player2_id))
-                players_data = {row.TP_Number: row for row in cursor.fetchall()}
+        def on_error(e):
+            print(f"Error in player comparison: {e}")
+            tk.Label(self.comparison_content_frame,
+                     text=f"Error generating comparison: {str(e)}",
+                     font=("Arial", 12),
+                     fg="red", bg="#f0f0f0").pack(pady=50)
 
-                if len(players_data) != 2:
-                    raise ValueError("Could not retrieve data for both players")
+        self.load_panel("comparison", self.comparison_content_frame,
+                        lambda cursor: self.fetch_player_comparison(cursor, player1_id, player2_id),
+                        lambda result: self.show_player_comparison(player1_id, player1_name,
+                                                                   player2_id, player2_name, result),
+                        "Loading comparison...", on_error)
+
+    def fetch_player_comparison(self, cursor, player1_id, player2_id):
+        """Worker thread: totals of both players, their per-level rows and every level"""
+        # Get player comparison data
+        query = """
+        SELECT 
+            s.TP_Number,
+            s.Name,
+            s.Score,
+            s.current_level,
+            COUNT(DISTINCT ls.LevelID) AS levels_completed,
+            (SELECT COUNT(DISTINCT LevelID) FROM Levels) AS total_levels,
+            (SELECT COALESCE(SUM(st.correct), 0) FROM LevelStats st
+             WHERE st.TP_Number = s.TP_Number) AS correct_answers,
+            (SELECT COALESCE(SUM(st.attempts), 0) FROM LevelStats st
+             WHERE st.TP_Number = s.TP_Number) AS total_answers,
+            (SELECT AVG(600 - st.time_remaining) 
+             FROM LevelStats st 
+             WHERE st.TP_Number = s.TP_Number) AS avg_time_spent
+        FROM Students s
+        LEFT JOIN LevelStats ls ON s.TP_Number = ls.TP_Number AND ls.is_completed = 1
+        WHERE s.TP_Number IN (?, ?)
+        GROUP BY s.TP_Number, s.Name, s.Score, s.current_level
+        """
+        cursor.execute(query, (player1_id, player2_id))
+        players_data = {row.TP_Number: row for row in cursor.fetchall()}
+
+        if len(players_data) != 2:
+            raise ValueError("Could not retrieve data for both players")
+
+        # Get level-wise performance data
+        level_query = """
+        SELECT 
+            ls.TP_Number,
+            ls.LevelID,
+            l.Name AS LevelName,
+            ls.attempts AS total_attempts,
+            ls.correct AS correct_attempts,
+            ls.time_remaining
+        FROM LevelStats ls
+        JOIN Levels l ON ls.LevelID = l.LevelID
+        WHERE ls.TP_Number IN (?, ?) AND ls.attempts > 0
+        ORDER BY ls.LevelID
+        """
+        cursor.execute(level_query, (player1_id, player2_id))
+        level_data = cursor.fetchall()
 
-                # Get level-wise performance data
-                level_query = """
-                SELECT 
-                    s.TP_Number,
-                    q.LevelID,
-                    l.Name AS LevelName,
-                    COUNT(*) AS total_attempts,
-                    SUM(CASE WHEN s.status = 1 THEN 1 ELSE 0 END) AS correct_attempts,
-                    ls.time_remaining
-                FROM Submissions s
-                JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-                JOIN Levels l ON q.LevelID = l.LevelID
-                LEFT JOIN LevelSelection ls ON s.TP_Number = ls.TP_Number AND ls.LevelID = q.LevelID
-                WHERE s.TP_Number IN (?, ?)
-                GROUP BY s.TP_Number, q.LevelID, l.Name, ls.time_remaining
-                ORDER BY q.LevelID
-                """
-                cursor.execute(level_query, (player1_id, player2_id))
-                level_data = cursor.fetchall()
+        # Get all levels for consistent comparison
+        cursor.execute("SELECT LevelID, Name FROM Levels ORDER BY LevelID")
+        all_levels = cursor.fetchall()
+        return players_data, level_data, all_levels
 
+    def show_player_comparison(self, player1_id, player1_name, player2_id, player2_name, result):
+        """Fill the comparison panel with the data fetched by fetch_player_comparison"""
+        players_data, level_data, all_levels = result
+        try:
             # Organize level data
             player_levels = {player1_id: {}, player2_id: {}}
             for row in level_data:
@@ -1225,11 +1677,6 @@ class StudentAnalytics:
                     'time_remaining': row.time_remaining if row.time_remaining is not None else 600
                 }
 
-            # Get all levels for consistent comparison
-            with self.conn.cursor() as cursor:
-                cursor.execute("SELECT LevelID, Name FROM Levels ORDER BY LevelID")
-                all_levels = cursor.fetchall()
-
             # Display comparison header
             header_frame = tk.Frame(self.comparison_content_frame, bg="#f0f0f0", padx=10, pady=10)
             header_frame.pack(fill="x")
@@ -1414,37 +1861,26 @@ class StudentAnalytics:
                     ax.text(bar.get_x() + bar.get_width() / 2, height + 1,
                             label, ha='center', va='bottom', fontsize=8)
 
-    def _get_player_data(self, player_id):
+    def _get_player_data(self, cursor, player_id):
         """Get player data with validation"""
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute("""
-                SELECT 
-                    q.LevelID,
-                    l.Name AS LevelName,
-                    COUNT(*) AS total_attempts,
-                    SUM(CASE WHEN s.status = 1 THEN 1 ELSE 0 END) AS correct_attempts,
-                    ls.time_remaining
-                FROM Submissions s
-                JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-                JOIN Levels l ON q.LevelID = l.LevelID
-                JOIN LevelSelection ls ON s.TP_Number = ls.TP_Number AND ls.LevelID = q.LevelID
-                WHERE s.TP_Number = ?
-                GROUP BY q.LevelID, l.Name, ls.time_remaining
-                ORDER BY q.LevelID
-            """, player_id)
-            return {row.LevelID: row for row in cursor.fetchall()}
-        finally:
-            cursor.close()
-
-    def _get_all_levels(self):
+        cursor.execute("""
+            SELECT 
+                ls.LevelID,
+                l.Name AS LevelName,
+                ls.attempts AS total_attempts,
+                ls.correct AS correct_attempts,
+                ls.time_remaining
+            FROM LevelStats ls
+            JOIN Levels l ON ls.LevelID = l.LevelID
+            WHERE ls.TP_Number = ? AND ls.attempts > 0 AND ls.time_remaining IS NOT NULL
+            ORDER BY ls.LevelID
+        """, player_id)
+        return {row.LevelID: row for row in cursor.fetchall()}
+
+    def _get_all_levels(self, cursor):
         """Get all levels with validation"""
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute("SELECT LevelID, Name FROM Levels ORDER BY LevelID")
-            return cursor.fetchall()
-        finally:
-            cursor.close()
+        cursor.execute("SELECT LevelID, Name FROM Levels ORDER BY LevelID")
+        return cursor.fetchall()
 
     def _validate_and_convert_value(self, value, default=0.0):
         """
@@ -1743,165 +2179,150 @@ class StudentAnalytics:
             return
 
         # Clear previous content
+        self.tasks.cancel("rewards")
         for widget in self.inventory_tab.winfo_children():
             widget.destroy()
         for widget in self.shop_tab.winfo_children():
             widget.destroy()
 
-        try:
-            cursor = self.conn.cursor()
-
-            # INVENTORY TAB - WITH SCROLLBAR
-            # Create container frame
-            inventory_container = tk.Frame(self.inventory_tab)
-            inventory_container.pack(fill="both", expand=True)
-
-            # Create canvas and scrollbar
-            inventory_canvas = tk.Canvas(inventory_container)
-            scrollbar = ttk.Scrollbar(inventory_container, orient="vertical", command=inventory_canvas.yview)
-            scrollable_inventory_frame = tk.Frame(inventory_canvas)
-
-            # Configure scroll region
-            scrollable_inventory_frame.bind(
-                "<Configure>",
-                lambda e: inventory_canvas.configure(
-                    scrollregion=inventory_canvas.bbox("all")
-                )
-            )
-
-            # Create window in canvas
-            inventory_canvas.create_window((0, 0), window=scrollable_inventory_frame, anchor="nw")
-            inventory_canvas.configure(yscrollcommand=scrollbar.set)
-
-            # Pack canvas and scrollbar
-            inventory_canvas.pack(side="left", fill="both", expand=True)
-            scrollbar.pack(side="right", fill="y")
-
-            # Make frame width follow canvas width
-            def on_inventory_canvas_configure(event):
-                canvas_width = event.width
-                inventory_canvas.itemconfig("all", width=canvas_width)
-
-            inventory_canvas.bind("<Configure>", on_inventory_canvas_configure)
-
-            # Add content to scrollable frame
-            tk.Label(scrollable_inventory_frame, text="Player Inventory",
-                     font=("Arial", 14, "bold")).pack(anchor="w", pady=10)
+        cached = _reward_cache.get(player_id)
+        if cached and time.monotonic() - cached[0] < REWARD_CACHE_TTL:
+            self.show_reward_data(cached[1])
+            return
 
-            # Get player's inventory
-            cursor.execute("""
-                SELECT 
-                    i.ItemID,
-                    i.Name,
-                    i.Description,
-                    i.Price,
-                    inv.status
-                FROM Inventory inv
-                JOIN Items i ON inv.ItemID = i.ItemID
-                WHERE inv.TP_Number = ?
-            """, (player_id,))
-
-            inventory_items = cursor.fetchall()
-
-            if inventory_items:
-                for item in inventory_items:
-                    frame = tk.Frame(scrollable_inventory_frame, bd=1, relief=tk.RIDGE)
-                    frame.pack(fill="x", padx=10, pady=5)
-
-                    status = "Equipped" if item.status else "Owned"
-                    tk.Label(frame, text=f"{item.Name} ({status})",
-                             font=("Arial", 12)).pack(anchor="w")
-                    tk.Label(frame, text=item.Description).pack(anchor="w")
-            else:
-                tk.Label(scrollable_inventory_frame, text="No items in inventory").pack(pady=20)
-
-            # SHOP TAB - WITH SCROLLBAR
-            # Create container frame
-            shop_container = tk.Frame(self.shop_tab)
-            shop_container.pack(fill="both", expand=True)
-
-            # Create canvas and scrollbar
-            shop_canvas = tk.Canvas(shop_container)
-            scrollbar = ttk.Scrollbar(shop_container, orient="vertical", command=shop_canvas.yview)
-            scrollable_shop_frame = tk.Frame(shop_canvas)
-
-            # Configure scroll region
-            scrollable_shop_frame.bind(
-                "<Configure>",
-                lambda e: shop_canvas.configure(
-                    scrollregion=shop_canvas.bbox("all")
-                )
-            )
+        self.show_loading(self.inventory_tab, "Loading inventory...")
+        self.show_loading(self.shop_tab, "Loading shop items...")
 
-            # Create window in canvas
-            shop_canvas.create_window((0, 0), window=scrollable_shop_frame, anchor="nw")
-            shop_canvas.configure(yscrollcommand=scrollbar.set)
-
-            # Pack canvas and scrollbar
-            shop_canvas.pack(side="left", fill="both", expand=True)
-            scrollbar.pack(side="right", fill="y")
-
-            # Make frame width follow canvas width
-            def on_shop_canvas_configure(event):
-                canvas_width = event.width
-                shop_canvas.itemconfig("all", width=canvas_width)
-
-            shop_canvas.bind("<Configure>", on_shop_canvas_configure)
-
-            # Add content to scrollable frame
-            tk.Label(scrollable_shop_frame, text="Item Shop",
-                     font=("Arial", 14, "bold")).pack(anchor="w", pady=10)
-
-            # Get all available items
-            cursor.execute("SELECT ItemID, Name, Description, Price FROM Items")
-            shop_items = cursor.fetchall()
-
-            if shop_items:
-                for item in shop_items:
-                    frame = tk.Frame(scrollable_shop_frame, bd=1, relief=tk.RIDGE)
-                    frame.pack(fill="x", padx=10, pady=5)
-
-                    tk.Label(frame, text=item.Name,
-                             font=("Arial", 12)).pack(anchor="w")
-                    tk.Label(frame, text=item.Description).pack(anchor="w")
-                    tk.Label(frame, text=f"Price: {item.Price} points").pack(anchor="w")
-
-                    # Check if player already owns this item
-                    cursor.execute("""
-                        SELECT 1 
-                        FROM Inventory 
-                        WHERE TP_Number = ? AND ItemID = ?
-                    """, (player_id, item.ItemID))
-
-                    owns_item = cursor.fetchone() is not None
-
-                    if owns_item:
-                        tk.Label(frame, text="Already purchased",
-                                 fg="green").pack(side="right", padx=5)
-                    else:
-                        tk.Label(frame, text="Not purchased",
-                                 fg="gray").pack(side="right", padx=5)
-            else:
-                tk.Label(scrollable_shop_frame, text="No items available in shop").pack(pady=20)
+        def on_done(items):
+            _reward_cache[player_id] = (time.monotonic(), items)
+            self.show_reward_data(items)
 
-        except pyodbc.Error as e:
+        def on_error(e):
             print("Error fetching reward system data:", e)
+            for tab in (self.inventory_tab, self.shop_tab):
+                for widget in tab.winfo_children():
+                    widget.destroy()
             tk.Label(self.inventory_tab, text="Error loading inventory data",
                      font=("Arial", 12)).pack(pady=50)
+
+        self.run_query("rewards", lambda cursor: self.fetch_reward_data(cursor, player_id),
+                       on_done, on_error, self.inventory_tab)
+
+    def fetch_reward_data(self, cursor, player_id):
+        """Worker thread: every shop item with the player's ownership and equip status, in one query"""
+        cursor.execute("""
+            SELECT
+                i.ItemID,
+                i.Name,
+                i.Description,
+                i.Price,
+                CASE WHEN inv.ItemID IS NULL THEN 0 ELSE 1 END AS owned,
+                COALESCE(inv.status, 0) AS status
+            FROM Items i
+            LEFT JOIN (
+                SELECT ItemID, MAX(status) AS status
+                FROM Inventory
+                WHERE TP_Number = ?
+                GROUP BY ItemID
+            ) inv ON inv.ItemID = i.ItemID
+            ORDER BY i.ItemID
+        """, (player_id,))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def show_reward_data(self, items):
+        """Fill the inventory and shop tabs with the rows fetched by fetch_reward_data"""
+        for tab in (self.inventory_tab, self.shop_tab):
+            for widget in tab.winfo_children():
+                widget.destroy()
+
+        def show_owned_item(parent, item):
+            _, name, description, _, _, status = item
+            frame = tk.Frame(parent, bd=1, relief=tk.RIDGE)
+            frame.pack(fill="x", padx=10, pady=5)
+
+            status = "Equipped" if status else "Owned"
+            tk.Label(frame, text=f"{name} ({status})",
+                     font=("Arial", 12)).pack(anchor="w")
+            tk.Label(frame, text=description).pack(anchor="w")
+
+        def show_shop_item(parent, item):
+            _, name, description, price, owned, _ = item
+            frame = tk.Frame(parent, bd=1, relief=tk.RIDGE)
+            frame.pack(fill="x", padx=10, pady=5)
+
+            tk.Label(frame, text=name,
+                     font=("Arial", 12)).pack(anchor="w")
+            tk.Label(frame, text=description).pack(anchor="w")
+            tk.Label(frame, text=f"Price: {price} points").pack(anchor="w")
+
+            if owned:
+                tk.Label(frame, text="Already purchased",
+                         fg="green").pack(side="right", padx=5)
+            else:
+                tk.Label(frame, text="Not purchased",
+                         fg="gray").pack(side="right", padx=5)
+
+        try:
+            self.show_lazy_list(self.inventory_tab, "Player Inventory", [item for item in items if item[4]],
+                                show_owned_item, "No items in inventory")
+            self.show_lazy_list(self.shop_tab, "Item Shop", items,
+                                show_shop_item, "No items available in shop")
         except Exception as e:
             print("Unexpected error in update_reward_system:", e)
             tk.Label(self.inventory_tab, text="An unexpected error occurred",
                      font=("Arial", 12)).pack(pady=50)
-        finally:
-            cursor.close()
+
+    def show_lazy_list(self, parent, title, items, show_item, empty_text):
+        """
+        Scrollable list of items in parent. Rows are built REWARD_BATCH at a
+        time, the next batch only once the user scrolls near the bottom.
+        """
+        container = tk.Frame(parent)
+        container.pack(fill="both", expand=True)
+
+        canvas = tk.Canvas(container)
+        scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
+        scrollable_frame = tk.Frame(canvas)
+
+        scrollable_frame.bind(
+            "<Configure>",
+            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        )
+        window = canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        # Make frame width follow canvas width
+        canvas.bind("<Configure>", lambda e: canvas.itemconfig(window, width=e.width))
+
+        tk.Label(scrollable_frame, text=title,
+                 font=("Arial", 14, "bold")).pack(anchor="w", pady=10)
+        if not items:
+            tk.Label(scrollable_frame, text=empty_text).pack(pady=20)
+
+        shown = [0]
+
+        def show_more():
+            end = min(shown[0] + REWARD_BATCH, len(items))
+            for item in items[shown[0]:end]:
+                show_item(scrollable_frame, item)
+            shown[0] = end
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            # also fires when the scroll region grows, so a short first batch keeps filling the view
+            if float(last) >= 0.9 and shown[0] < len(items):
+                show_more()
+
+        canvas.configure(yscrollcommand=on_scroll)
+        show_more()
+
+
+def show_student_analytics(root, lecturer_id=None):
+    """Build the analytics dashboard inside the lecturer window"""
+    return StudentAnalytics(root, lecturer_id)
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    try:
-        app = StudentAnalytics(root)
-        root.mainloop()
-    except Exception as e:
-        print(f"Error: {e}")
-        root.destroy()
-        sys.exit(1)
+    lecturer_shell.start("student_analytics", sys.argv[1] if len(sys.argv) > 1 else None)
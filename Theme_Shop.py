@@ -1,13 +1,25 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pyodbc
+import db_backend
 from PIL import Image, ImageTk
 import io
 from tkinter import font as tkfont
 import sys
-from database_conn import connect_db
+from collections import OrderedDict
+from database_conn import connect_db, pooled_connection
+from id_allocator import next_id
+import lecturer_shell
+import app_events
+import item_thumbnails
+from tk_tasks import TaskRunner
 
 
+# Item grid: cards per page and per row
+PAGE_SIZE = 24
+NUM_COLUMNS = 6
+# Thumbnails kept as PhotoImages besides those on the current page
+PHOTO_CACHE_SIZE = 48
+
 
 class ThemeShop:
     def __init__(self, root, lecturer_id):
@@ -42,7 +54,20 @@ class ThemeShop:
         # Track PhotoImage objects to prevent garbage collection
         self.image_references = []
 
+        # Item grid state
+        self.items = []  # (ItemID, Name, Description, Price) of every item, no images
+        self.current_page = 0
+        self.cards = {}  # ItemID -> (item, card frame, image label) of the cards on the current page
+        self.photos = OrderedDict()  # ItemID -> thumbnail PhotoImage (None if the item has no image)
+        self.empty_label = None
+        self.placeholder = None  # grey square shown while a thumbnail loads
+        self.tasks = TaskRunner(self.root)
+
         # Initialize database connection
+        try:
+            item_thumbnails.ensure_ready()
+        except Exception as e:
+            print(f"Error preparing item thumbnails: {e}")
         self.conn = self.database_connect()
         if self.conn is None:
             messagebox.showerror("Error", "Failed to connect to database. Application will close.")
@@ -68,7 +93,7 @@ class ThemeShop:
         try:
             conn = connect_db()
             return conn
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             print("Database connection error:", e)
             return None
 
@@ -118,10 +143,21 @@ class ThemeShop:
         refresh_btn = ttk.Button(
             admin_frame,
             text="Refresh",
-            command=self.refresh_shop
+            command=lambda: self.refresh_shop(reload_images=True)
         )
         refresh_btn.pack(side=tk.LEFT, padx=5)
 
+        # Page controls under the grid
+        pager_frame = ttk.Frame(main_container)
+        pager_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(10, 0))
+
+        self.next_btn = ttk.Button(pager_frame, text="Next", command=lambda: self.go_to_page(self.current_page + 1))
+        self.next_btn.pack(side=tk.RIGHT, padx=5)
+        self.prev_btn = ttk.Button(pager_frame, text="Previous", command=lambda: self.go_to_page(self.current_page - 1))
+        self.prev_btn.pack(side=tk.RIGHT, padx=5)
+        self.page_label = ttk.Label(pager_frame, text="", font=('Arial', 10))
+        self.page_label.pack(side=tk.RIGHT, padx=10)
+
         # Main content frame with canvas and scrollbar
         self.content_frame = ttk.Frame(main_container)
         self.content_frame.pack(fill=tk.BOTH, expand=True)
@@ -150,119 +186,198 @@ class ThemeShop:
             canvas_width = event.width
             self.canvas.itemconfig(1, width=canvas_width)  # 1 is the window ID of scrollable frame
 
-    def load_image_from_data(self, image_data):
-        """Convert binary image data to PhotoImage"""
-        try:
-            if not image_data:
-                return None
-
-            image = Image.open(io.BytesIO(image_data))
-            # Make images larger to fill more space (adjust size as needed)
-            image = image.resize((150, 150), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(image)
-            self.image_references.append(photo)  # Prevent garbage collection
-            return photo
-        except Exception as e:
-            print(f"Image loading error: {e}")
-            return None
-
     def load_items(self):
-        """Load items from database and display them"""
-        # Clear existing items and images
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.image_references.clear()
-
+        """Load the item list (without images) and show the current page"""
         try:
-            # Get all items from database
-            query = "SELECT ItemID, Name, Description, Price, item_data FROM Items"
-            self.cursor.execute(query)
-            items = self.cursor.fetchall()
-
-            if not items:
-                no_items_label = ttk.Label(
-                    self.scrollable_frame,
-                    text="No items available in the shop. Click 'Add Item' to create new items.",
-                    font=('Arial', 12)
-                )
-                no_items_label.grid(row=0, column=0, columnspan=6, pady=50)  # Span all columns
-                return
-
-            # Calculate number of columns based on window width (4 columns for wider screens)
-            num_columns = 6
-
-            # Configure grid columns with equal weight
-            for i in range(num_columns):
-                self.scrollable_frame.columnconfigure(i, weight=1, uniform="cols")
+            self.cursor.execute("SELECT ItemID, Name, Description, Price FROM Items ORDER BY ItemID")
+            self.items = [tuple(row) for row in self.cursor.fetchall()]
+        except db_backend.Error as e:
+            messagebox.showerror("Database Error", f"Failed to load items:\n{str(e)}")
+            return
+        self.show_page()
+
+    def go_to_page(self, page):
+        total_pages = max(1, (len(self.items) + PAGE_SIZE - 1) // PAGE_SIZE)
+        if 0 <= page < total_pages and page != self.current_page:
+            self.current_page = page
+            self.show_page()
+            self.canvas.yview_moveto(0)
+
+    def show_page(self):
+        """
+        Lay out the cards of the current page. Cards of unchanged items are
+        only moved, so after an add, edit or delete just the affected cards
+        are built, and items on other pages have no widgets at all.
+        """
+        total_pages = max(1, (len(self.items) + PAGE_SIZE - 1) // PAGE_SIZE)
+        self.current_page = min(self.current_page, total_pages - 1)
+        page_items = self.items[self.current_page * PAGE_SIZE:(self.current_page + 1) * PAGE_SIZE]
+
+        if self.empty_label is not None:
+            self.empty_label.destroy()
+            self.empty_label = None
+
+        wanted = {item[0]: item for item in page_items}
+        for item_id in list(self.cards):
+            if wanted.get(item_id) != self.cards[item_id][0]:
+                self.forget_card(item_id, keep_photo=True)
+
+        if not page_items:
+            self.empty_label = ttk.Label(
+                self.scrollable_frame,
+                text="No items available in the shop. Click 'Add Item' to create new items.",
+                font=('Arial', 12)
+            )
+            self.empty_label.grid(row=0, column=0, columnspan=NUM_COLUMNS, pady=50)  # Span all columns
+
+        # Configure grid columns with equal weight
+        for i in range(NUM_COLUMNS):
+            self.scrollable_frame.columnconfigure(i, weight=1, uniform="cols")
+
+        for index, item in enumerate(page_items):
+            if item[0] not in self.cards:
+                self.cards[item[0]] = self.build_card(item)
+            self.cards[item[0]][1].grid(row=index // NUM_COLUMNS, column=index % NUM_COLUMNS,
+                                        padx=10, pady=10, sticky="nsew")
+
+        self.page_label.config(text=f"Page {self.current_page + 1} of {total_pages}")
+        self.prev_btn.state(["!disabled"] if self.current_page > 0 else ["disabled"])
+        self.next_btn.state(["!disabled"] if self.current_page < total_pages - 1 else ["disabled"])
+
+        self.load_thumbnails([item[0] for item in page_items if item[0] not in self.photos])
+
+    def build_card(self, item):
+        """Card widget of one item, showing a placeholder until its thumbnail is loaded"""
+        item_id, name, description, price = item
+        item_frame = ttk.Frame(
+            self.scrollable_frame,
+            borderwidth=2,
+            relief="groove",
+            padding=10
+        )
+        item_frame.columnconfigure(0, weight=1)
+        item_frame.rowconfigure(0, weight=1)  # Make the frame expandable
+
+        # Item image - make it larger to fill more space
+        img_label = ttk.Label(item_frame, font=('Arial', 10), anchor=tk.CENTER)
+        img_label.pack(expand=True, fill=tk.BOTH, pady=(0, 10))
+        self.show_thumbnail(img_label, item_id)
+
+        # Item details - in a separate frame to control layout
+        details_frame = ttk.Frame(item_frame)
+        details_frame.pack(fill=tk.X, expand=True)
+
+        ttk.Label(
+            details_frame,
+            text=name,
+            font=('Arial', 12, 'bold')
+        ).pack(fill=tk.X)
+
+        desc_label = ttk.Label(
+            details_frame,
+            text=description,
+            wraplength=200  # Adjust based on column width
+        )
+        desc_label.pack(fill=tk.X)
+
+        ttk.Label(
+            details_frame,
+            text=f"Price: {price} points",
+            font=('Arial', 10)
+        ).pack(fill=tk.X)
+
+        # Action buttons
+        btn_frame = ttk.Frame(item_frame)
+        btn_frame.pack(fill=tk.X, pady=5)
+
+        edit_btn = ttk.Button(
+            btn_frame,
+            text="Edit",
+            command=lambda: self.edit_item_by_id(item_id)
+        )
+        edit_btn.pack(side=tk.LEFT, padx=5, expand=True)
 
-            # Display items in a grid
-            for i, item in enumerate(items):
-                row = i // num_columns
-                col = i % num_columns
+        def delete():
+            if self.delete_item(item_id):
+                self.refresh_shop()
 
-                item_frame = ttk.Frame(
-                    self.scrollable_frame,
-                    borderwidth=2,
-                    relief="groove",
-                    padding=10
-                )
-                item_frame.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
-                item_frame.columnconfigure(0, weight=1)
-                item_frame.rowconfigure(0, weight=1)  # Make the frame expandable
-
-                # Item image - make it larger to fill more space
-                photo = self.load_image_from_data(item.item_data)
-                if photo:
-                    img_label = ttk.Label(item_frame, image=photo)
-                    img_label.image = photo
-                    img_label.pack(expand=True, fill=tk.BOTH, pady=(0, 10))
-                else:
-                    no_img_label = ttk.Label(item_frame, text="No Image", font=('Arial', 10))
-                    no_img_label.pack(expand=True, fill=tk.BOTH, pady=(0, 10))
-
-                # Item details - in a separate frame to control layout
-                details_frame = ttk.Frame(item_frame)
-                details_frame.pack(fill=tk.X, expand=True)
-
-                ttk.Label(
-                    details_frame,
-                    text=item.Name,
-                    font=('Arial', 12, 'bold')
-                ).pack(fill=tk.X)
-
-                desc_label = ttk.Label(
-                    details_frame,
-                    text=item.Description,
-                    wraplength=200  # Adjust based on column width
-                )
-                desc_label.pack(fill=tk.X)
-
-                ttk.Label(
-                    details_frame,
-                    text=f"Price: {item.Price} points",
-                    font=('Arial', 10)
-                ).pack(fill=tk.X)
-
-                # Action buttons
-                btn_frame = ttk.Frame(item_frame)
-                btn_frame.pack(fill=tk.X, pady=5)
-
-                edit_btn = ttk.Button(
-                    btn_frame,
-                    text="Edit",
-                    command=lambda i=item: self.edit_item_dialog(i)
-                )
-                edit_btn.pack(side=tk.LEFT, padx=5, expand=True)
+        delete_btn = ttk.Button(
+            btn_frame,
+            text="Delete",
+            command=delete
+        )
+        delete_btn.pack(side=tk.LEFT, padx=5, expand=True)
+
+        return item, item_frame, img_label
+
+    def show_thumbnail(self, img_label, item_id):
+        """Put an item's thumbnail, 'No Image' or the loading placeholder on img_label"""
+        if item_id not in self.photos:
+            img_label.config(image=self.get_placeholder(), text="")
+        elif self.photos[item_id] is None:
+            img_label.config(image="", text="No Image")
+        else:
+            self.photos.move_to_end(item_id)
+            img_label.config(image=self.photos[item_id], text="")
+
+    def get_placeholder(self):
+        """Grey square shown while a thumbnail is loading"""
+        if self.placeholder is None:
+            size = item_thumbnails.THEME_SHOP_SIZE
+            self.placeholder = tk.PhotoImage(width=size, height=size)
+            self.placeholder.put("#e3e6f0", to=(0, 0, size, size))
+        return self.placeholder
+
+    def load_thumbnails(self, item_ids):
+        """
+        Fetch and decode thumbnails on a worker thread. A newer request replaces
+        an older one; it covers every card of the page still without an image.
+        """
+        if not item_ids:
+            return
+        size = item_thumbnails.THEME_SHOP_SIZE
 
-                delete_btn = ttk.Button(
-                    btn_frame,
-                    text="Delete",
-                    command=lambda i=item: self.delete_item(i.ItemID)
-                )
-                delete_btn.pack(side=tk.LEFT, padx=5, expand=True)
+        def work():
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    found = item_thumbnails.fetch_thumbnails(cursor, item_ids, size)
+                finally:
+                    cursor.close()
+            # decoding happens here, only the PhotoImage has to be made on the Tk thread
+            return {item_id: Image.frombytes(mode, (size, size), pixels)
+                    for item_id, (mode, pixels) in found.items()}
+
+        def on_done(images):
+            for item_id in item_ids:
+                image = images.get(item_id)
+                self.photos[item_id] = ImageTk.PhotoImage(image) if image is not None else None
+                if item_id in self.cards:
+                    self.show_thumbnail(self.cards[item_id][2], item_id)
+            self.trim_photos()
+
+        def on_error(e):
+            print(f"Image loading error: {e}")
 
-        except pyodbc.Error as e:
-            messagebox.showerror("Database Error", f"Failed to load items:\n{str(e)}")
+        self.tasks.submit("thumbnails", work, on_done, on_error, self.scrollable_frame)
+
+    def trim_photos(self):
+        """Drop the least recently shown thumbnails, never those of the current page"""
+        extra = len(self.photos) - len(self.cards) - PHOTO_CACHE_SIZE
+        for item_id in list(self.photos):
+            if extra <= 0:
+                break
+            if item_id not in self.cards:
+                del self.photos[item_id]
+                extra -= 1
+
+    def forget_card(self, item_id, keep_photo=False):
+        """Destroy the card of an item (and its thumbnail, e.g. after the image changed)"""
+        card = self.cards.pop(item_id, None)
+        if card:
+            card[1].destroy()
+        if not keep_photo:
+            self.photos.pop(item_id, None)
 
     def add_item_dialog(self):
         """Show dialog to add new item"""
@@ -408,13 +523,7 @@ class ThemeShop:
 
         try:
             # Get next ItemID
-            self.cursor.execute("SELECT MAX(ItemID) FROM Items")
-            result = self.cursor.fetchone()
-            if result[0]:
-                last_id = int(result[0][3:])  # Extract numeric part after 'ITM'
-                new_id = f"ITM{last_id + 1:03d}"
-            else:
-                new_id = "ITM001"
+            new_id = next_id("ITM")
 
             # Insert new item
             query = """
@@ -422,11 +531,13 @@ class ThemeShop:
             VALUES (?, ?, ?, ?, ?, ?)
             """
             self.cursor.execute(query, (new_id, name, description, price, image_data, self.lecturer_id))
+            item_thumbnails.save_thumbnails(self.cursor, new_id, image_data)
             self.conn.commit()
+            app_events.publish("items_changed")
 
             messagebox.showinfo("Success", "Item added successfully!")
             return True
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             self.conn.rollback()
             messagebox.showerror("Database Error", f"Failed to add item:\n{str(e)}")
             return False
@@ -598,11 +709,14 @@ class ThemeShop:
             WHERE ItemID = ?
             """
             self.cursor.execute(query, (name, description, price, image_data, self.lecturer_id, item_id))
+            item_thumbnails.save_thumbnails(self.cursor, item_id, image_data)
             self.conn.commit()
+            app_events.publish("items_changed")
+            self.forget_card(item_id)
 
             messagebox.showinfo("Success", "Item updated successfully!")
             return True
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             self.conn.rollback()
             messagebox.showerror("Database Error", f"Failed to update item:\n{str(e)}")
             return False
@@ -700,7 +814,7 @@ class ThemeShop:
             dialog.update_idletasks()
             dialog.minsize(400, 400)
 
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             messagebox.showerror("Database Error", f"Failed to load items:\n{str(e)}")
 
     def delete_item(self, item_id):
@@ -733,6 +847,8 @@ class ThemeShop:
                 (item_id,)
             )
 
+            item_thumbnails.delete_thumbnails(self.cursor, item_id)
+
             # Then delete from Items
             self.cursor.execute(
                 "DELETE FROM Items WHERE ItemID = ?",
@@ -740,9 +856,10 @@ class ThemeShop:
             )
 
             self.conn.commit()
+            app_events.publish("items_changed")
             messagebox.showinfo("Success", "Item deleted successfully!")
             return True
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             self.conn.rollback()
             messagebox.showerror("Database Error", f"Failed to delete item:\n{str(e)}")
             return False
@@ -863,7 +980,7 @@ class ThemeShop:
 
             tree.bind("<Double-1>", on_double_click)
 
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             messagebox.showerror("Database Error", f"Failed to load statistics:\n{str(e)}")
 
     def edit_item_by_id(self, item_id):
@@ -878,25 +995,50 @@ class ThemeShop:
             else:
                 messagebox.showerror("Error", "Item not found in database")
 
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             messagebox.showerror("Database Error", f"Failed to load item:\n{str(e)}")
 
-    def refresh_shop(self):
-        """Refresh the shop display"""
+    def refresh_shop(self, reload_images=False):
+        """
+        Refresh the shop display. Only cards whose item changed are rebuilt,
+        reload_images also fetches every thumbnail again (the Refresh button).
+        """
+        if reload_images:
+            for item_id in list(self.cards):
+                self.forget_card(item_id)
+            self.photos.clear()
         self.load_items()
 
     def on_close(self):
         """Handle window closing"""
         if messagebox.askyesno("Log Out", "Are you sure you want to log out and close the application?"):
+            self.cleanup()
             self.root.destroy()
             sys.exit(0)  # Close the application completely
 
+    def cleanup(self):
+        """Release the database connection when leaving the shop"""
+        try:
+            if getattr(self, 'cursor', None):
+                self.cursor.close()
+            if getattr(self, 'conn', None):
+                self.conn.close()
+        except Exception as e:
+            print(f"Error closing theme shop connection: {e}")
+        if getattr(self, 'tasks', None):
+            self.tasks.shutdown()
+        self.image_references = []
+        self.photos = OrderedDict()
+
+
+def show_theme_shop(root, lecturer_id=None):
+    """Build the theme shop management interface inside the lecturer window"""
+    return ThemeShop(root, lecturer_id)
+
 
 def open_theme_shop(lecturer_id):
     """Function to open the theme shop management interface"""
-    root = tk.Tk()
-    app = ThemeShop(root, lecturer_id)
-    root.mainloop()
+    lecturer_shell.start("theme_shop", lecturer_id)
 
 
 if __name__ == "__main__":  # Fixed: Changed _main_ to __main__
@@ -1,7 +1,7 @@
-import pyodbc
 from database_conn import connect_db
 
 current_lecturer_id = None
+_details_cache = {}  # LecturerID -> details, lecturer screens ask for these on every switch
 
 
 def set_user(lecturer_id):
@@ -21,6 +21,9 @@ def get_user_details():
         print("No lecturer ID set!")  # Debug print
         return None
 
+    if current_lecturer_id in _details_cache:
+        return dict(_details_cache[current_lecturer_id])
+
     try:
         conn = connect_db()
         if not conn:
@@ -34,7 +37,8 @@ def get_user_details():
 
         if user:
             print(f"Found user: {user}")  # Debug print
-            return {"LecturerID": user[0], "Name": user[1], "Email": user[2]}
+            _details_cache[current_lecturer_id] = {"LecturerID": user[0], "Name": user[1], "Email": user[2]}
+            return dict(_details_cache[current_lecturer_id])
         else:
             print("No user found in database!")  # Debug print
             return None
@@ -0,0 +1,31 @@
+# Simple in-process publish/subscribe used to invalidate cached data when something changes.
+#
+# Topics used by the game:
+#   "progress_changed"   a level was completed or reset      (tp_number=...)
+#   "inventory_changed"  an item was purchased or equipped   (tp_number=...)
+#   "items_changed"      a lecturer added, edited or deleted a shop item
+
+_subscribers = {}
+
+
+def subscribe(topic, callback):
+    """Call callback(**data) whenever topic is published"""
+    callbacks = _subscribers.setdefault(topic, [])
+    if callback not in callbacks:
+        callbacks.append(callback)
+
+
+def unsubscribe(topic, callback):
+    """Stop calling callback for topic"""
+    callbacks = _subscribers.get(topic, [])
+    if callback in callbacks:
+        callbacks.remove(callback)
+
+
+def publish(topic, **data):
+    """Notify every subscriber of topic"""
+    for callback in list(_subscribers.get(topic, [])):
+        try:
+            callback(**data)
+        except Exception as e:
+            print(f"Error handling {topic} event: {e}")
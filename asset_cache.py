@@ -0,0 +1,172 @@
+import io
+import os
+import struct
+import hashlib
+
+import pygame
+
+from db_backend import get_backend
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("CAPSTONES_ASSET_CACHE", os.path.join(BASE_DIR, "cache", "assets"))
+
+# Raw surface file: magic, width, height, pixel format, then the pixels as returned by pygame.image.tobytes
+HEADER = struct.Struct("<4sII4s")
+MAGIC = b"CPA1"
+
+# Where each asset source lives: table -> (key column, image column)
+SOURCES = {
+    "Maps": ("MapsID", "Image"),
+    "MapsItems": ("MapsItemsID", "Item_Image"),
+}
+
+
+def _file_name(key, table, row_id, digest, size, alpha):
+    """Content addressed file name, changes whenever the image or the target size changes"""
+    fingerprint = hashlib.sha1(f"{table}:{row_id}:{digest}:{size[0]}x{size[1]}:{int(alpha)}".encode()).hexdigest()
+    return f"{key}-{fingerprint[:16]}.raw"
+
+
+def _read_surface(path, alpha):
+    """Load a pre-scaled surface written by _write_surface"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, width, height, pixel_format = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Not an asset cache file: {path}")
+    surface = pygame.image.frombytes(data[HEADER.size:], (width, height), pixel_format.decode().strip())
+    return surface.convert_alpha() if alpha else surface.convert()
+
+
+def _write_surface(path, surface, alpha):
+    """Store a surface as raw pixels (written to a temp file first so readers never see half a file)"""
+    pixel_format = "RGBA" if alpha else "RGB"
+    width, height = surface.get_size()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, width, height, pixel_format.ljust(4).encode()))
+        f.write(pygame.image.tobytes(surface, pixel_format))
+    os.replace(tmp_path, path)
+
+
+def _fetch_digests(cursor, maps_id, specs):
+    """One small query for the content hash of every image the level needs"""
+    backend = get_backend()
+    parts = []
+    params = []
+    for table, (key_column, image_column) in SOURCES.items():
+        ids = sorted({spec[1] for spec in specs.values() if spec[0] == table})
+        if ids:
+            placeholders = ", ".join("?" for _ in ids)
+            parts.append(f"SELECT '{table}' AS source, {key_column} AS row_id, "
+                         f"{backend.blob_hash_sql(image_column)} AS digest "
+                         f"FROM {table} WHERE {key_column} IN ({placeholders})")
+            params.extend(ids)
+    cursor.execute(" UNION ALL ".join(parts), params)
+    return {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+
+
+def _fetch_images(cursor, wanted):
+    """Fetch the image BLOBs for a set of (table, row id) pairs, one query per table"""
+    images = {}
+    for table, (key_column, image_column) in SOURCES.items():
+        ids = sorted({row_id for source, row_id in wanted if source == table})
+        if ids:
+            placeholders = ", ".join("?" for _ in ids)
+            cursor.execute(f"SELECT {key_column}, {image_column} FROM {table} WHERE {key_column} IN ({placeholders})",
+                           ids)
+            for row_id, data in cursor.fetchall():
+                if data:
+                    images[(table, row_id)] = bytes(data)
+    return images
+
+
+def _decode(data, size, alpha):
+    """Decode an image BLOB and scale it to its on-screen size"""
+    image = pygame.image.load(io.BytesIO(data))
+    image = image.convert_alpha() if alpha else image.convert()
+    return pygame.transform.scale(image, size)
+
+
+def load_level_assets(cursor, maps_id, specs):
+    """
+    Load the images of a level, pre-scaled, from the local asset cache.
+
+    specs maps a name to (table, row id, (width, height), alpha), e.g.
+    {"background": ("Maps", "MAP001", (1440, 810), False)}. Returns a dict of
+    name -> Surface, or None when the row has no image. Only images that are
+    missing from the cache or have changed in the database are fetched.
+    """
+    assets = {}
+    map_dir = os.path.join(CACHE_DIR, str(maps_id))
+
+    try:
+        digests = _fetch_digests(cursor, maps_id, specs)
+    except Exception as e:
+        # no usable hash function on this server, load straight from the database
+        print(f"Asset cache unavailable, loading level images from database: {e}")
+        images = _fetch_images(cursor, {(spec[0], spec[1]) for spec in specs.values()})
+        for name, (table, row_id, size, alpha) in specs.items():
+            data = images.get((table, row_id))
+            assets[name] = _decode(data, size, alpha) if data else None
+        return assets
+
+    os.makedirs(map_dir, exist_ok=True)
+    missing = {}
+    for name, (table, row_id, size, alpha) in specs.items():
+        digest = digests.get((table, row_id))
+        if digest is None:
+            assets[name] = None  # row or image does not exist
+            continue
+        path = os.path.join(map_dir, _file_name(name, table, row_id, digest, size, alpha))
+        try:
+            assets[name] = _read_surface(path, alpha)
+        except (OSError, ValueError, struct.error, pygame.error):
+            missing[name] = path
+
+    if missing:
+        images = _fetch_images(cursor, {(specs[name][0], specs[name][1]) for name in missing})
+        for name, path in missing.items():
+            table, row_id, size, alpha = specs[name]
+            data = images.get((table, row_id))
+            if not data:
+                assets[name] = None
+                continue
+            surface = _decode(data, size, alpha)
+            assets[name] = surface
+            try:
+                _write_surface(path, surface, alpha)
+            except OSError as e:
+                print(f"Could not write asset cache file {path}: {e}")
+
+    _remove_stale(map_dir, specs, digests)
+    return assets
+
+
+def _remove_stale(map_dir, specs, digests):
+    """Delete cache files of these assets that belong to an older image or size"""
+    current = set()
+    for name, (table, row_id, size, alpha) in specs.items():
+        digest = digests.get((table, row_id))
+        if digest is not None:
+            current.add(_file_name(name, table, row_id, digest, size, alpha))
+    try:
+        for file_name in os.listdir(map_dir):
+            name = file_name.rsplit("-", 1)[0]
+            if name in specs and file_name not in current:
+                os.remove(os.path.join(map_dir, file_name))
+    except OSError as e:
+        print(f"Could not clean asset cache {map_dir}: {e}")
+
+
+def clear_cache(maps_id=None):
+    """Remove cached assets of one map, or of every map"""
+    target = os.path.join(CACHE_DIR, str(maps_id)) if maps_id else CACHE_DIR
+    if not os.path.isdir(target):
+        return
+    for root, dirs, files in os.walk(target, topdown=False):
+        for file_name in files:
+            os.remove(os.path.join(root, file_name))
+        for dir_name in dirs:
+            os.rmdir(os.path.join(root, dir_name))
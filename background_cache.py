@@ -0,0 +1,142 @@
+import io
+from collections import OrderedDict
+
+import tkinter as tk
+from PIL import Image, ImageTk
+
+from database_conn import connect_db
+
+
+# How many resized backgrounds to keep (one full-screen RGB image is about 6 MB)
+RESIZED_CACHE_SIZE = 6
+# Wait this long after the last resize event before resampling (ms)
+RESIZE_DELAY = 150
+
+_blobs = {}  # MapsID -> image bytes as stored in Maps.Image
+_decoded = {}  # MapsID -> decoded PIL image
+_resized = OrderedDict()  # (MapsID, width, height) -> resized PIL image, least recently used first
+
+
+def get_background_blob(maps_id):
+    """Maps.Image for maps_id, fetched from the database once"""
+    if maps_id in _blobs:
+        return _blobs[maps_id]
+
+    conn = None
+    try:
+        conn = connect_db()
+        cursor = conn.cursor()
+        cursor.execute("SELECT Image FROM Maps WHERE MapsID = ?", (maps_id,))
+        row = cursor.fetchone()
+        data = bytes(row[0]) if row and row[0] else None
+    except Exception as e:
+        print(f"Error retrieving image from database: {e}")
+        return None  # not cached, try again next time
+    finally:
+        if conn:
+            conn.close()
+
+    _blobs[maps_id] = data
+    return data
+
+
+def get_background_image(maps_id):
+    """Decoded PIL image of a map, or None if it has no image"""
+    image = _decoded.get(maps_id)
+    if image is None:
+        data = get_background_blob(maps_id)
+        if not data:
+            return None
+        image = Image.open(io.BytesIO(data))
+        image = image.convert("RGB")  # decode now, not on every resize
+        _decoded[maps_id] = image
+    return image
+
+
+def get_resized_background(maps_id, width, height):
+    """Map image resized to width x height, the last few sizes are kept"""
+    key = (maps_id, width, height)
+    image = _resized.get(key)
+    if image is not None:
+        _resized.move_to_end(key)
+        return image
+
+    original = get_background_image(maps_id)
+    if original is None:
+        return None
+    image = original.resize((width, height), Image.Resampling.LANCZOS)
+    _resized[key] = image
+    while len(_resized) > RESIZED_CACHE_SIZE:
+        _resized.popitem(last=False)
+    return image
+
+
+def clear_cache(maps_id=None):
+    """Forget the cached images of one map (e.g. after its image changed), or of every map"""
+    if maps_id is None:
+        _blobs.clear()
+        _decoded.clear()
+        _resized.clear()
+        return
+    _blobs.pop(maps_id, None)
+    _decoded.pop(maps_id, None)
+    for key in [key for key in _resized if key[0] == maps_id]:
+        del _resized[key]
+
+
+class WindowBackground:
+    """
+    Full-window background label for a Tk screen. Window resizes are
+    coalesced: the image is only resampled once the size has stopped changing
+    for RESIZE_DELAY ms, and not at all if the size is the same as before.
+    """
+
+    def __init__(self, root, maps_id="Maps01"):
+        self.root = root
+        self.maps_id = maps_id
+        self.shown = None  # (MapsID, width, height) currently on the label
+        self.pending = None  # after() id of the scheduled refresh
+
+        self.label = tk.Label(root)
+        self.label.place(x=0, y=0, relwidth=1, relheight=1)
+        self.label.lower()
+
+        # <Configure> on the root also fires for every child widget, only the window itself matters
+        root.bind("<Configure>", self.on_configure, add="+")
+
+    def on_configure(self, event):
+        if event.widget is self.root:
+            self.refresh_later()
+
+    def refresh_later(self, delay=RESIZE_DELAY):
+        """Refresh after delay ms, replacing any refresh already scheduled"""
+        if self.pending is not None:
+            self.root.after_cancel(self.pending)
+        self.pending = self.root.after(delay, self.refresh)
+
+    def set_map(self, maps_id):
+        """Show another map's image (immediately, the window size is unchanged)"""
+        self.maps_id = maps_id
+        self.refresh()
+
+    def refresh(self):
+        self.pending = None
+        try:
+            if not self.label.winfo_exists():
+                return
+            width = self.root.winfo_width()
+            height = self.root.winfo_height()
+            if width <= 1 or height <= 1:
+                return
+            key = (self.maps_id, width, height)
+            if key == self.shown:
+                return
+
+            image = get_resized_background(self.maps_id, width, height)
+            if image is not None:
+                photo = ImageTk.PhotoImage(image)
+                self.label.config(image=photo)
+                self.label.image = photo
+                self.shown = key
+        except Exception as e:
+            print(f"Error loading image: {e}")
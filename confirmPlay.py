@@ -1,6 +1,7 @@
 import pygame
 from PyQt5 import QtWidgets
 from database_conn import connect_db
+from text_cache import get_font, render_text
 
 pygame.init()
 
@@ -66,10 +67,10 @@ class ConfirmPlay:
         self.level_name, self.level_desc = self.db.get_level_info(self.level_id)
 
         # UI Setup
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 26)
-        self.title_font = pygame.font.Font(None, 48)
-        self.instruction_font = pygame.font.Font(None, 20)  # Font for the escape instruction
+        self.font = get_font(None, 36)
+        self.small_font = get_font(None, 26)
+        self.title_font = get_font(None, 48)
+        self.instruction_font = get_font(None, 20)  # Font for the escape instruction
 
         # Create play button at bottom center
         self.play_button_rect = pygame.Rect(
@@ -89,7 +90,7 @@ class ConfirmPlay:
         pygame.draw.rect(self.screen, (0, 0, 0), rect, 2, border_radius=10)  # Border
 
         # Draw text
-        text_surface = self.font.render(text, True, BUTTON_TEXT_COLOR)
+        text_surface = render_text(self.font, text, True, BUTTON_TEXT_COLOR)
         text_rect = text_surface.get_rect(center=rect.center)
         self.screen.blit(text_surface, text_rect)
 
@@ -119,11 +120,11 @@ class ConfirmPlay:
             self.screen.fill(BG_COLOR)
 
             # Draw "Press Escape to go back" instruction in top left
-            escape_text = self.instruction_font.render("Press [Esc] to go back", True, (200, 200, 200))
+            escape_text = render_text(self.instruction_font, "Press [Esc] to go back", True, (200, 200, 200))
             self.screen.blit(escape_text, (20, 20))
 
             # Draw level information
-            title_text = self.title_font.render(f"Level {self.level_number}: {self.level_name}", True, (255, 255, 255))
+            title_text = render_text(self.title_font, f"Level {self.level_number}: {self.level_name}", True, (255, 255, 255))
             title_rect = title_text.get_rect(center=(self.screen.get_width() // 2, 100))
             self.screen.blit(title_text, title_rect)
 
@@ -133,7 +134,7 @@ class ConfirmPlay:
             paragraph_spacing = 20  # Extra space between paragraphs
 
             for paragraph in self.level_desc_paragraphs:
-                desc_text = self.small_font.render(paragraph, True, (200, 200, 200))
+                desc_text = render_text(self.small_font, paragraph, True, (200, 200, 200))
                 desc_rect = desc_text.get_rect(center=(self.screen.get_width() // 2, y_offset))
                 self.screen.blit(desc_text, desc_rect)
                 y_offset += line_height + paragraph_spacing
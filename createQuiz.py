@@ -1,31 +1,14 @@
 import tkinter as tk
 from tkinter import messagebox
 import sys
-import subprocess
 from database_conn import connect_db
+from background_cache import WindowBackground
+import lecturer_shell
+from id_allocator import next_id
 from UserData import get_user_details, set_user
-from PIL import Image, ImageTk
-import io
 import random
 
 
-def get_background_image(chapter_id="Maps01"):
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT Image FROM Maps WHERE MapsID = ?", (chapter_id,))
-        image_data = cursor.fetchone()
-        if image_data:
-            return image_data[0]
-        return None
-    except Exception as e:
-        print(f"Error retrieving image from database: {e}")
-        return None
-    finally:
-        if conn:
-            conn.close()
-
-
 def get_random_maps_item(chapter_number):
     conn = connect_db()
     cursor = conn.cursor()
@@ -50,17 +33,9 @@ def get_random_maps_item(chapter_number):
     return f"MIT{chapter_number}0{item_number}"
 
 
-def create_quiz(lecturer_id=None, chapter_number=1):
+def create_quiz(root, lecturer_id=None, chapter_number=1):
     if lecturer_id:
         set_user(lecturer_id)
-    elif len(sys.argv) > 1:
-        set_user(sys.argv[1])
-
-    if len(sys.argv) > 2:
-        try:
-            chapter_number = int(sys.argv[2])
-        except ValueError:
-            chapter_number = 1
 
     def submit_question():
         question_text = entry_question.get("1.0", "end-1c").strip()
@@ -93,15 +68,7 @@ def create_quiz(lecturer_id=None, chapter_number=1):
         try:
             cursor = conn.cursor()
 
-            cursor.execute("select max(QuestionID) from QuestionDetails")
-            max_id = cursor.fetchone()[0]
-
-            if max_id:
-                last_num = int(max_id[3:])
-                new_num = last_num + 1
-                question_id = f"QST{new_num:03d}"
-            else:
-                question_id = "QST101"
+            question_id = next_id("QST")
 
             level_id = f"LVL{chapter_number:03d}"
             maps_items_id = get_random_maps_item(chapter_number)
@@ -122,46 +89,17 @@ def create_quiz(lecturer_id=None, chapter_number=1):
             conn.close()
 
     def go_back():
-        root.destroy()
-        lecturer_id = sys.argv[1] if len(sys.argv) > 1 else None
-        chapter_number = int(sys.argv[2]) if len(sys.argv) > 2 else 1
-        subprocess.run([sys.executable, f"Chapter{chapter_number}.py", str(lecturer_id)])
+        lecturer_shell.navigate(f"chapter{chapter_number}")
 
-    root = tk.Tk()
     root.title(f"Create Quiz - Chapter {chapter_number}")
     root.state("zoomed")
 
     # Set window close protocol to use go_back function
     root.protocol("WM_DELETE_WINDOW", go_back)
 
-    background_label = tk.Label(root)
-    background_label.place(x=0, y=0, relwidth=1, relheight=1)
-    background_label.lower()
-
-    def resize_background():
-        try:
-            width = root.winfo_width()
-            height = root.winfo_height()
-
-            if width > 1 and height > 1:
-                maps_id = f"Maps{chapter_number:02d}"
-                image_data = get_background_image(maps_id)
-                if image_data:
-                    image_stream = io.BytesIO(image_data)
-                    bg_image = Image.open(image_stream)
-                    bg_image = bg_image.resize((width, height), Image.Resampling.LANCZOS)
-                    bg_photo = ImageTk.PhotoImage(bg_image)
-
-                    background_label.config(image=bg_photo)
-                    background_label.image = bg_photo
-        except Exception as e:
-            print(f"Error loading image: {e}")
-
-    def on_window_resize(event):
-        resize_background()
-
-    root.bind("<Configure>", on_window_resize)
-    root.after(100, resize_background)
+    # Background image, only resampled once the window has stopped changing size
+    background = WindowBackground(root, f"Maps{chapter_number:02d}")
+    background.refresh_later(100)
 
     main_frame = tk.Frame(root, bg="#424242", bd=5, relief=tk.RIDGE)
     main_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER, width=600, height=500)
@@ -195,12 +133,9 @@ def create_quiz(lecturer_id=None, chapter_number=1):
     back_btn = tk.Button(root, text="Back", command=go_back, bg="#333333", fg="white", font=("Arial", 12, "bold"), width=10)
     back_btn.place(x=20, y=20)
 
-    root.mainloop()
 
 
 if __name__ == "__main__":
     lecturer_id = sys.argv[1] if len(sys.argv) > 1 else None
     chapter_number = int(sys.argv[2]) if len(sys.argv) > 2 else 1
-    create_quiz(lecturer_id)
-
-
+    lecturer_shell.start("create_quiz", lecturer_id, chapter_number=chapter_number)
@@ -1,29 +1,294 @@
-import pyodbc
+import os
+import threading
+import time
+import atexit
+from contextlib import contextmanager
+
+import frame_profiler
+from db_backend import Error, OperationalError, ProgrammingError, get_backend
+
+
+# Pool settings (can be overridden with environment variables or configure_pool())
+POOL_SIZE = int(os.environ.get("CAPSTONES_POOL_SIZE", 5))  # connections kept open while idle
+POOL_MAX_OVERFLOW = int(os.environ.get("CAPSTONES_POOL_MAX_OVERFLOW", 10))  # extra connections allowed under load
+POOL_IDLE_TIMEOUT = float(os.environ.get("CAPSTONES_POOL_IDLE_TIMEOUT", 300))  # seconds before an idle connection is closed
+POOL_WAIT_TIMEOUT = float(os.environ.get("CAPSTONES_POOL_WAIT_TIMEOUT", 30))  # seconds to wait for a free connection
+HEALTH_CHECK_AFTER = 30  # seconds idle before a connection is pinged on borrow
+
+
+def _open_connection():
+    """Open a brand new connection through the configured storage backend"""
+    return frame_profiler.wrap_connection(get_backend().connect())
+
+
+class PooledConnection:
+    """
+    Connection borrowed from the pool. Behaves like the underlying pyodbc
+    connection, except close() hands it back to the pool instead of closing it.
+    """
+
+    def __init__(self, pool, conn):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        conn = object.__getattribute__(self, "_conn")
+        if conn is None:
+            raise ProgrammingError("Attempt to use a connection that was returned to the pool")
+        return getattr(conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def close(self):
+        """Return the connection to the pool"""
+        conn = self._conn
+        if conn is not None:
+            object.__setattr__(self, "_conn", None)
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # same semantics as pyodbc: commit on success, rollback on error, keep the connection
+        if self._conn is not None:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        return False
+
+    def __del__(self):
+        # connections that are never closed explicitly still go back to the pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Process-wide pool that reuses and health-checks database connections"""
+
+    def __init__(self, connect=_open_connection, size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW,
+                 idle_timeout=POOL_IDLE_TIMEOUT, wait_timeout=POOL_WAIT_TIMEOUT):
+        self.connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+
+        self._idle = []  # list of (connection, last_used) tuples, most recent last
+        self._open = 0  # connections currently open (idle + borrowed)
+        self._cond = threading.Condition()
+        self._stats = {
+            "hits": 0,  # borrowed an idle connection
+            "misses": 0,  # had to open a new connection
+            "waits": 0,  # had to wait for a connection to be returned
+            "wait_time": 0.0,  # total seconds spent waiting
+            "opens": 0,  # physical connections opened
+            "closes": 0,  # physical connections closed
+            "health_check_failures": 0
+        }
+
+    def acquire(self, timeout=None):
+        """Borrow a connection, opening a new one only if no idle connection is available"""
+        timeout = self.wait_timeout if timeout is None else timeout
+        conn = None
+        last_used = 0
+        with self._cond:
+            started = time.perf_counter()
+            waited = False
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._stats["hits"] += 1
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    self._stats["misses"] += 1
+                    break
+
+                # pool exhausted, wait for a connection to be released
+                waited = True
+                remaining = timeout - (time.perf_counter() - started)
+                if remaining <= 0:
+                    self._stats["waits"] += 1
+                    self._stats["wait_time"] += time.perf_counter() - started
+                    raise OperationalError("Timed out waiting for a database connection")
+                self._cond.wait(remaining)
+
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_time"] += time.perf_counter() - started
+
+        if conn is not None and time.time() - last_used > HEALTH_CHECK_AFTER and not self._is_alive(conn):
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            self._close(conn, reopen=True)
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self.connect()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats["opens"] += 1
+
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Take a connection back, discarding any uncommitted work"""
+        try:
+            conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+        except Exception:
+            # broken connection, do not hand it out again
+            self._close(conn)
+            return
+
+        with self._cond:
+            if len(self._idle) >= self.size:
+                keep = False
+            else:
+                self._idle.append((conn, time.time()))
+                keep = True
+            self._cond.notify()
+
+        if not keep:
+            self._close(conn)
+
+    def _is_alive(self, conn):
+        """Cheap round trip to check a connection that has been idle for a while"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle(self):
+        """Close connections that have been idle longer than idle_timeout (caller holds the lock)"""
+        now = time.time()
+        expired = [entry for entry in self._idle if now - entry[1] > self.idle_timeout]
+        if not expired:
+            return
+        self._idle = [entry for entry in self._idle if now - entry[1] <= self.idle_timeout]
+        for conn, _ in expired:
+            self._open -= 1
+            self._stats["closes"] += 1
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _close(self, conn, reopen=False):
+        """Close a physical connection; with reopen=True its slot stays reserved for the caller"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["closes"] += 1
+            if not reopen:
+                self._open -= 1
+                self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection (borrowed ones are closed when returned)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._stats["closes"] += len(idle)
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """Snapshot of the pool counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+                atexit.register(_pool.close_all)
+    return _pool
+
+
+def configure_pool(size=None, max_overflow=None, idle_timeout=None, wait_timeout=None):
+    """Change the pool settings at runtime"""
+    pool = get_pool()
+    if size is not None:
+        pool.size = size
+    if max_overflow is not None:
+        pool.max_overflow = max_overflow
+    if idle_timeout is not None:
+        pool.idle_timeout = idle_timeout
+    if wait_timeout is not None:
+        pool.wait_timeout = wait_timeout
+
+
+def pool_stats():
+    """Pool counters: hits, misses, waits, wait_time, opens, closes, open, idle"""
+    return get_pool().stats()
 
 
 def connect_db():
     """
     Standardized database connection function used across the application.
-    Returns a database connection object or None if connection fails.
+    Returns a pooled database connection or None if connection fails.
+    Calling close() on it returns it to the pool.
     """
     try:
-        conn = pyodbc.connect(
-            "DRIVER={ODBC Driver 17 for SQL Server};"
-            "SERVER=localhost;"
-            "DATABASE=Capstones;"
-            "Trusted_Connection=yes;"
-        )
-        return conn
-    except pyodbc.Error as e:
+        return get_pool().acquire()
+    except Error as e:
         print("Database connection failed:", e)
         return None
 
 
+@contextmanager
+def pooled_connection():
+    """Borrow a connection for the duration of a with block"""
+    conn = get_pool().acquire()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
 # Test the connection when this module is run directly
 if __name__ == "__main__":
     conn = connect_db()
     if conn:
         print("Database connection successful!")
         conn.close()
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            print("Test query executed successfully.")
+        print("Pool stats:", pool_stats())
     else:
         print("Failed to connect to database.")
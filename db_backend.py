@@ -0,0 +1,453 @@
+import os
+import sys
+import sqlite3
+import hashlib
+import threading
+
+# Database errors to catch whatever the backend: pyodbc's when it can be imported,
+# sqlite3's on a machine without pyodbc or the ODBC driver manager (SQLite only:
+# CI, benchmarks). The SQLite backend raises these too.
+try:
+    import pyodbc as _driver
+except ImportError:
+    _driver = sqlite3
+Error = _driver.Error
+OperationalError = _driver.OperationalError
+IntegrityError = _driver.IntegrityError
+DataError = _driver.DataError
+ProgrammingError = _driver.ProgrammingError
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Backend selection: "sqlserver" (default) or "sqlite" for offline kiosks, benchmarks and CI
+BACKEND = os.environ.get("CAPSTONES_DB_BACKEND", "sqlserver").lower()
+SQLSERVER_CONNECTION_STRING = os.environ.get(
+    "CAPSTONES_CONNECTION_STRING",
+    "DRIVER={ODBC Driver 17 for SQL Server};"
+    "SERVER=localhost;"
+    "DATABASE=Capstones;"
+    "Trusted_Connection=yes;"
+)
+SQLITE_PATH = os.environ.get("CAPSTONES_SQLITE_PATH", os.path.join(BASE_DIR, "database", "capstones.db"))
+
+# Capstones schema, in foreign key order. {blob} and {text} are filled in per dialect.
+SCHEMA = [
+    ("Lecturers", """
+        LecturerID VARCHAR(6) NOT NULL PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Email VARCHAR(100) NOT NULL,
+        Password VARCHAR(100) NOT NULL
+    """),
+    ("Maps", """
+        MapsID VARCHAR(6) NOT NULL PRIMARY KEY,
+        Image {blob}
+    """),
+    ("MapsItems", """
+        MapsItemsID VARCHAR(6) NOT NULL PRIMARY KEY,
+        Item_Image {blob},
+        MapsID VARCHAR(6) REFERENCES Maps (MapsID)
+    """),
+    ("Levels", """
+        LevelID VARCHAR(6) NOT NULL PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Description {text} NOT NULL,
+        MapsID VARCHAR(6) REFERENCES Maps (MapsID)
+    """),
+    ("Students", """
+        TP_Number VARCHAR(8) NOT NULL PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Email VARCHAR(100) NOT NULL,
+        Password VARCHAR(100) NOT NULL,
+        Score INT,
+        current_level INT
+    """),
+    ("Items", """
+        ItemID VARCHAR(6) NOT NULL PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Description {text},
+        Price INT NOT NULL,
+        item_data {blob},
+        LecturerID VARCHAR(6) REFERENCES Lecturers (LecturerID)
+    """),
+    ("QuestionDetails", """
+        QuestionID VARCHAR(6) NOT NULL PRIMARY KEY,
+        Question_text {text} NOT NULL,
+        correct_answer {text} NOT NULL,
+        passcode INT NOT NULL,
+        MapsItemsID VARCHAR(6) REFERENCES MapsItems (MapsItemsID),
+        LevelID VARCHAR(6) REFERENCES Levels (LevelID),
+        LecturerID VARCHAR(6) REFERENCES Lecturers (LecturerID)
+    """),
+    ("Notes", """
+        NotesID VARCHAR(6) NOT NULL PRIMARY KEY,
+        Title {text} NOT NULL,
+        Content {text} NOT NULL,
+        Hint {text} NOT NULL,
+        LevelID VARCHAR(6) REFERENCES Levels (LevelID),
+        LecturerID VARCHAR(6) REFERENCES Lecturers (LecturerID)
+    """),
+    ("LevelSelection", """
+        LevelSelectionID VARCHAR(6) NOT NULL PRIMARY KEY,
+        is_locked TINYINT,
+        is_completed TINYINT,
+        time_remaining INT,
+        TP_Number VARCHAR(8) REFERENCES Students (TP_Number),
+        LevelID VARCHAR(6) REFERENCES Levels (LevelID)
+    """),
+    ("Inventory", """
+        InventoryID VARCHAR(6) NOT NULL PRIMARY KEY,
+        ItemID VARCHAR(6) REFERENCES Items (ItemID),
+        TP_Number VARCHAR(8) REFERENCES Students (TP_Number),
+        status INT NOT NULL
+    """),
+    ("Submissions", """
+        SubmissionID VARCHAR(8) NOT NULL PRIMARY KEY,
+        QuestionID VARCHAR(6) REFERENCES QuestionDetails (QuestionID),
+        TP_Number VARCHAR(8) REFERENCES Students (TP_Number),
+        student_answer {text},
+        status INT NOT NULL
+    """),
+]
+
+# Indexes for the lookups the game runs most often (SQLite only, SQL Server is provisioned from the bacpac)
+SQLITE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS IX_Submissions_Student ON Submissions (TP_Number, QuestionID)",
+    "CREATE INDEX IF NOT EXISTS IX_LevelSelection_Student ON LevelSelection (TP_Number, LevelID)",
+    "CREATE INDEX IF NOT EXISTS IX_QuestionDetails_Level ON QuestionDetails (LevelID)",
+    "CREATE INDEX IF NOT EXISTS IX_Inventory_Student ON Inventory (TP_Number)",
+    "CREATE INDEX IF NOT EXISTS IX_Notes_Level ON Notes (LevelID)",
+]
+
+
+class SqlServerBackend:
+    """SQL Server through pyodbc (the production database)"""
+    name = "sqlserver"
+    types = {"blob": "VARBINARY(MAX)", "text": "VARCHAR(MAX)"}
+
+    def __init__(self, connection_string=SQLSERVER_CONNECTION_STRING):
+        self.connection_string = connection_string
+
+    def connect(self):
+        """Open a new connection"""
+        try:
+            import pyodbc  # only SQL Server needs it
+        except ImportError as e:
+            raise Error(f"SQL Server needs pyodbc and an ODBC driver ({e}), or set CAPSTONES_DB_BACKEND=sqlite")
+        return pyodbc.connect(self.connection_string)
+
+    def ensure_table(self, cursor, name, columns):
+        """Create a table if it does not exist yet"""
+        cursor.execute(f"IF OBJECT_ID(N'dbo.{name}', N'U') IS NULL CREATE TABLE {name} ({columns.format(**self.types)})")
+
+    def create_schema(self):
+        """The SQL Server schema is deployed from database/Capstones.bacpac"""
+        pass
+
+    def blob_hash_sql(self, column):
+        """SQL expression returning the SHA-256 hex digest of a BLOB column"""
+        return f"CONVERT(VARCHAR(64), HASHBYTES('SHA2_256', {column}), 2)"
+
+    def page_clause(self, offset, limit):
+        """Clause to put after ORDER BY that returns limit rows from offset, and its parameters"""
+        return "OFFSET ? ROWS FETCH NEXT ? ROWS ONLY", [offset, limit]
+
+
+class Row:
+    """Result row with index, attribute and unpacking access, like pyodbc.Row"""
+    __slots__ = ("_columns", "_values")
+
+    def __init__(self, columns, values):
+        object.__setattr__(self, "_columns", columns)
+        object.__setattr__(self, "_values", list(values))
+
+    def __getattr__(self, name):
+        try:
+            return self._values[self._columns[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        if name not in self._columns:
+            raise AttributeError(name)
+        self._values[self._columns[name]] = value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self._values[index])
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        self._values[index] = value
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __eq__(self, other):
+        return tuple(self._values) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self._values))
+
+    def __repr__(self):
+        return repr(tuple(self._values))
+
+
+def _translate_error(error):
+    """Re-raise sqlite3 errors as the matching error above so the same handlers catch them"""
+    if isinstance(error, sqlite3.IntegrityError):
+        return IntegrityError(str(error))
+    if isinstance(error, sqlite3.OperationalError):
+        return OperationalError(str(error))
+    if isinstance(error, sqlite3.DataError):
+        return DataError(str(error))
+    if isinstance(error, sqlite3.ProgrammingError):
+        return ProgrammingError(str(error))
+    return Error(str(error))
+
+
+class SqliteCursor:
+    """sqlite3 cursor that accepts pyodbc style parameters and returns pyodbc style rows"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._columns = None
+
+    def execute(self, sql, *params):
+        # pyodbc accepts both execute(sql, a, b) and execute(sql, (a, b))
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        try:
+            self._cursor.execute(sql, params)
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+        self._columns = None
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        try:
+            self._cursor.executemany(sql, seq_of_params)
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+        self._columns = None
+        return self
+
+    def _row(self, values):
+        if values is None:
+            return None
+        if self._columns is None:
+            self._columns = {column[0]: i for i, column in enumerate(self._cursor.description or ())}
+        return Row(self._columns, values)
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(values) for values in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(values) for values in self._cursor.fetchall()]
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class SqliteConnection:
+    """sqlite3 connection with the parts of the pyodbc connection API the app uses"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return SqliteCursor(self._conn.cursor())
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    @property
+    def autocommit(self):
+        return self._conn.isolation_level is None
+
+    @autocommit.setter
+    def autocommit(self, value):
+        if value and self._conn.in_transaction:
+            self._conn.commit()  # same as pyodbc, switching autocommit on commits pending work
+        self._conn.isolation_level = None if value else "DEFERRED"
+
+    def commit(self):
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+
+def _sha256(data):
+    """sha256() SQL function behind SqliteBackend.blob_hash_sql (image cache fingerprints)"""
+    if data is None:
+        return None
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest().upper()
+
+
+class SqliteBackend:
+    """Embedded SQLite database with the Capstones schema"""
+    name = "sqlite"
+    types = {"blob": "BLOB", "text": "TEXT"}
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._schema_ready = False
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Open a new connection, creating the database file and schema on first use"""
+        if not self._schema_ready:
+            with self._lock:
+                if not self._schema_ready:
+                    self.create_schema()
+                    self._schema_ready = True
+        return SqliteConnection(self._open())
+
+    def _open(self):
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # the pool may hand a connection to a worker thread, so do not pin it to its creator
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        # blob_hash_sql() expressions call sha256(), SQLite has no built-in hash
+        conn.create_function("sha256", 1, _sha256, deterministic=True)
+        return conn
+
+    def ensure_table(self, cursor, name, columns):
+        """Create a table if it does not exist yet"""
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {name} ({columns.format(**self.types)})")
+
+    def blob_hash_sql(self, column):
+        """SQL expression returning the SHA-256 hex digest of a BLOB column"""
+        return f"sha256({column})"
+
+    def page_clause(self, offset, limit):
+        """Clause to put after ORDER BY that returns limit rows from offset, and its parameters"""
+        return "LIMIT ? OFFSET ?", [limit, offset]
+
+    def create_schema(self):
+        """Create every Capstones table that does not exist yet"""
+        conn = self._open()
+        try:
+            for name, columns in SCHEMA:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {name} ({columns.format(**self.types)})")
+            for statement in SQLITE_INDEXES:
+                conn.execute(statement)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the configured storage backend"""
+    global _backend
+    if _backend is None:
+        if BACKEND == "sqlite":
+            _backend = SqliteBackend()
+        elif BACKEND == "sqlserver":
+            _backend = SqlServerBackend()
+        else:
+            raise ValueError(f"Unknown database backend: {BACKEND}")
+    return _backend
+
+
+def set_backend(backend):
+    """Replace the storage backend (call before the first connection is opened)"""
+    global _backend
+    _backend = backend
+
+
+def copy_database(source, target):
+    """Copy every Capstones table from one backend to another, e.g. SQL Server into a kiosk SQLite file"""
+    src = source.connect()
+    dst = target.connect()
+    try:
+        src_cursor = src.cursor()
+        dst_cursor = dst.cursor()
+        # clear target in reverse foreign key order, then copy in foreign key order
+        for name, _ in reversed(SCHEMA):
+            dst_cursor.execute(f"DELETE FROM {name}")
+        for name, _ in SCHEMA:
+            src_cursor.execute(f"SELECT * FROM {name}")
+            columns = [column[0] for column in src_cursor.description]
+            placeholders = ", ".join("?" for _ in columns)
+            insert = f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({placeholders})"
+            rows = src_cursor.fetchmany(500)
+            count = 0
+            while rows:
+                dst_cursor.executemany(insert, [tuple(row) for row in rows])
+                count += len(rows)
+                rows = src_cursor.fetchmany(500)
+            print(f"Copied {count} rows into {name}")
+        dst.commit()
+    except Exception:
+        dst.rollback()
+        raise
+    finally:
+        src.close()
+        dst.close()
+
+
+if __name__ == "__main__":
+    # python db_backend.py init [path]      create an empty SQLite database
+    # python db_backend.py copy [path]      copy the SQL Server database into a SQLite file
+    command = sys.argv[1] if len(sys.argv) > 1 else "init"
+    path = sys.argv[2] if len(sys.argv) > 2 else SQLITE_PATH
+    if command == "init":
+        SqliteBackend(path).create_schema()
+        print(f"SQLite database ready at {path}")
+    elif command == "copy":
+        copy_database(SqlServerBackend(), SqliteBackend(path))
+        print(f"SQL Server data copied to {path}")
+    else:
+        print("Usage: python db_backend.py [init|copy] [sqlite path]")
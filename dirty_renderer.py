@@ -0,0 +1,67 @@
+import pygame
+
+
+class DirtyRenderer:
+    """
+    Retained-mode renderer. The static layer (background and map items) is
+    composed once; each frame only the regions covered by moving or changing
+    elements, this frame and last frame, are redrawn and sent to the display
+    with pygame.display.update(rects).
+    """
+
+    # above this many rects a single full update is cheaper than many small ones
+    MAX_RECTS = 40
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.static_layer = None
+        self.static_dirty = True
+        self.full_redraw = True
+        self._previous = []  # regions drawn last frame
+        self._current = []  # regions drawn this frame
+
+    def invalidate_static(self):
+        """Rebuild the static layer on the next frame (e.g. an item was collected)"""
+        self.static_dirty = True
+
+    def invalidate(self):
+        """Redraw the whole screen on the next frame (e.g. another screen drew over it)"""
+        self.full_redraw = True
+
+    def begin_frame(self, build_static):
+        """Start a frame: restore last frame's dirty regions from the static layer"""
+        if self.static_dirty or self.static_layer is None:
+            self.static_layer = build_static()
+            self.static_dirty = False
+            self.full_redraw = True
+
+        if self.full_redraw:
+            self.screen.blit(self.static_layer, (0, 0))
+        else:
+            for rect in self._previous:
+                self.screen.blit(self.static_layer, rect, rect)
+        self._current = []
+
+    def blit(self, surface, dest, area=None):
+        """Blit onto the screen and remember the region"""
+        rect = self.screen.blit(surface, dest, area)
+        self._current.append(rect)
+        return rect
+
+    def mark(self, rect):
+        """Remember a region drawn directly (pygame.draw.* returns its bounding rect)"""
+        rect = pygame.Rect(rect)
+        self._current.append(rect)
+        return rect
+
+    def end_frame(self):
+        """Send the changed regions to the display"""
+        if self.full_redraw or len(self._previous) + len(self._current) > self.MAX_RECTS:
+            pygame.display.update()
+            self.full_redraw = False
+        else:
+            dirty = self._previous + self._current
+            if dirty:
+                pygame.display.update(dirty)
+        self._previous = self._current
+        self._current = []
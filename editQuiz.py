@@ -1,41 +1,15 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 from database_conn import connect_db
+from background_cache import WindowBackground
+import lecturer_shell
 from UserData import get_user_details, set_user
 import sys
-import subprocess
-from PIL import Image, ImageTk
-import io
 
 
-def get_background_image(chapter_id="Maps01"):
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT Image FROM Maps WHERE MapsID = ?", (chapter_id,))
-        image_data = cursor.fetchone()
-        if image_data:
-            return image_data[0]
-        return None
-    except Exception as e:
-        print(f"Error retrieving image from database: {e}")
-        return None
-    finally:
-        if conn:
-            conn.close()
-
-
-def edit_quiz(lecturer_id=None, chapter_number=1):
+def edit_quiz(root, lecturer_id=None, chapter_number=1):
     if lecturer_id:
         set_user(lecturer_id)
-    elif len(sys.argv) > 1:
-        set_user(sys.argv[1])
-
-    if len(sys.argv) > 2:
-        try:
-            chapter_number = int(sys.argv[2])
-        except ValueError:
-            chapter_number = 1
 
     def load_questions():
         user_data = get_user_details()
@@ -158,46 +132,17 @@ def edit_quiz(lecturer_id=None, chapter_number=1):
         current_question['id'] = None
 
     def go_back():
-        root.destroy()
-        lecturer_id = sys.argv[1] if len(sys.argv) > 1 else None
-        chapter_number = int(sys.argv[2]) if len(sys.argv) > 2 else 1
-        subprocess.run([sys.executable, f"Chapter{chapter_number}.py", str(lecturer_id)])
+        lecturer_shell.navigate(f"chapter{chapter_number}")
 
-    root = tk.Tk()
     root.title(f"Edit Quiz - Chapter {chapter_number}")
     root.state("zoomed")
 
     # Set window close protocol to use go_back function
     root.protocol("WM_DELETE_WINDOW", go_back)
 
-    background_label = tk.Label(root)
-    background_label.place(x=0, y=0, relwidth=1, relheight=1)
-    background_label.lower()
-
-    def resize_background():
-        try:
-            width = root.winfo_width()
-            height = root.winfo_height()
-
-            if width > 1 and height > 1:
-                maps_id = f"Maps{chapter_number:02d}"
-                image_data = get_background_image(maps_id)
-                if image_data:
-                    image_stream = io.BytesIO(image_data)
-                    bg_image = Image.open(image_stream)
-                    bg_image = bg_image.resize((width, height), Image.Resampling.LANCZOS)
-                    bg_photo = ImageTk.PhotoImage(bg_image)
-
-                    background_label.config(image=bg_photo)
-                    background_label.image = bg_photo
-        except Exception as e:
-            print(f"Error loading image: {e}")
-
-    def on_window_resize(event):
-        resize_background()
-
-    root.bind("<Configure>", on_window_resize)
-    root.after(100, resize_background)
+    # Background image, only resampled once the window has stopped changing size
+    background = WindowBackground(root, f"Maps{chapter_number:02d}")
+    background.refresh_later(100)
 
     main_frame = tk.Frame(root, bg="#424242", bd=5, relief=tk.RIDGE)
     main_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER, width=1300, height=600)
@@ -276,15 +221,9 @@ def edit_quiz(lecturer_id=None, chapter_number=1):
     back_btn.place(x=20, y=20)
 
     refresh_question_list()
-    root.mainloop()
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        set_user(sys.argv[1])
-
     lecturer_id = sys.argv[1] if len(sys.argv) > 1 else None
     chapter_number = int(sys.argv[2]) if len(sys.argv) > 2 else 1
-    edit_quiz(lecturer_id, chapter_number)
-
-
+    lecturer_shell.start("edit_quiz", lecturer_id, chapter_number=chapter_number)
@@ -0,0 +1,412 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+# Frame profiler for the pygame screens. Off unless CAPSTONES_PROFILE=1 (or a
+# trace path) is set; when off every call below returns straight away and no
+# hooks are installed. When on:
+#   - the screens time their frame and its sections (events, update, render layers, flip)
+#   - database round trips and new pygame surfaces are counted
+#   - F3 shows an overlay with fps, a frame time histogram, DB round trips and
+#     surface allocations per second and the slowest sections
+#   - CAPSTONES_PROFILE_TRACE=<path> writes a Chrome trace-event file on exit
+#     (open it in chrome://tracing or https://ui.perfetto.dev)
+TRACE_PATH = os.environ.get("CAPSTONES_PROFILE_TRACE")
+ENABLED = os.environ.get("CAPSTONES_PROFILE", "0") not in ("", "0") or bool(TRACE_PATH)
+
+HISTORY = 120  # frames in the histogram
+WINDOW = 1.0  # seconds per overlay update of the per-second figures
+HISTOGRAM_MAX_MS = 50  # frame times above this go in the last bar
+FRAME_BUDGET_MS = 1000 / 60
+MAX_TRACE_EVENTS = 1000000  # about 100 MB of JSON, later events are dropped
+OVERLAY_SIZE = (330, 250)
+
+
+class FrameProfiler:
+    """Collects frame and section timings; one per process (see the module functions)"""
+
+    def __init__(self, trace_path=None):
+        self.trace_path = trace_path
+        self.trace = [] if trace_path else None
+        self.pid = os.getpid()
+        self.main_thread = threading.get_ident()
+        self.lock = threading.Lock()
+        self.overlay_visible = False
+
+        self.screen_name = None
+        self.frame_start = None
+        self.lap_start = None
+        self.frame_times = deque(maxlen=HISTORY)  # ms of work per frame
+
+        # counters, read per frame and per window
+        self.db_calls = 0
+        self.db_time = 0.0
+        self.surfaces = 0
+        self.frame_db_calls = 0
+        self.frame_surfaces = 0
+
+        # figures of the last complete window, shown by the overlay
+        self.window_start = time.perf_counter()
+        self.window_frames = 0
+        self.window_db_calls = 0
+        self.window_surfaces = 0
+        self.window_sections = {}  # name -> total seconds in this window
+        self.shown = {"fps": 0.0, "db": 0, "surfaces": 0, "sections": []}
+        self.overlay = None
+        self.overlay_font = None
+
+    # --- trace events ---
+
+    def _event(self, name, category, start, duration, args=None, thread=None):
+        if self.trace is None or len(self.trace) >= MAX_TRACE_EVENTS:
+            return
+        event = {"name": name, "cat": category, "ph": "X", "pid": self.pid,
+                 "tid": thread or self.main_thread, "ts": start * 1e6, "dur": duration * 1e6}
+        if args:
+            event["args"] = args
+        self.trace.append(event)
+
+    def _counter(self, name, timestamp, values):
+        if self.trace is not None and len(self.trace) < MAX_TRACE_EVENTS:
+            self.trace.append({"name": name, "ph": "C", "pid": self.pid, "ts": timestamp * 1e6, "args": values})
+
+    def save_trace(self, path=None):
+        path = path or self.trace_path
+        if not path or self.trace is None:
+            return
+        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+        threads[self.main_thread] = "game loop"
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": ident, "args": {"name": name}}
+                    for ident, name in threads.items()]
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": metadata + self.trace, "displayTimeUnit": "ms"}, f)
+            print(f"Frame trace written to {path} ({len(self.trace)} events)")
+        except Exception as e:
+            print(f"Error writing frame trace: {e}")
+
+    # --- frames and sections ---
+
+    def begin_frame(self, screen_name):
+        now = time.perf_counter()
+        self.screen_name = screen_name
+        self.frame_start = self.lap_start = now
+        self.frame_db_calls = self.db_calls
+        self.frame_surfaces = self.surfaces
+
+    def lap(self, name):
+        if self.lap_start is None:
+            return
+        now = time.perf_counter()
+        self._add_section(name, self.lap_start, now - self.lap_start)
+        self.lap_start = now
+
+    def add_section(self, name, start, duration):
+        self._add_section(name, start, duration)
+
+    def _add_section(self, name, start, duration):
+        self.window_sections[name] = self.window_sections.get(name, 0.0) + duration
+        self._event(name, "section", start, duration)
+
+    def end_frame(self):
+        if self.frame_start is None:
+            return
+        now = time.perf_counter()
+        duration = now - self.frame_start
+        self.frame_times.append(duration * 1000)
+        db_calls = self.db_calls - self.frame_db_calls
+        surfaces = self.surfaces - self.frame_surfaces
+        self._event(self.screen_name, "frame", self.frame_start, duration,
+                    {"db_calls": db_calls, "new_surfaces": surfaces})
+        self._counter("per frame", now, {"db_calls": db_calls, "new_surfaces": surfaces})
+        self.frame_start = self.lap_start = None
+
+        self.window_frames += 1
+        elapsed = now - self.window_start
+        if elapsed >= WINDOW:
+            sections = sorted(self.window_sections.items(), key=lambda item: item[1], reverse=True)
+            self.shown = {
+                "fps": self.window_frames / elapsed,
+                "db": (self.db_calls - self.window_db_calls) / elapsed,
+                "surfaces": (self.surfaces - self.window_surfaces) / elapsed,
+                "sections": [(name, total * 1000 / self.window_frames) for name, total in sections[:6]],
+            }
+            self.window_start = now
+            self.window_frames = 0
+            self.window_db_calls = self.db_calls
+            self.window_surfaces = self.surfaces
+            self.window_sections = {}
+            self.overlay = None  # redrawn with the new figures
+
+    def db_call(self, sql, start, duration):
+        with self.lock:
+            self.db_calls += 1
+            self.db_time += duration
+        thread = threading.get_ident()
+        self._event("db", "db", start, duration, {"sql": " ".join(str(sql).split())[:120]}, thread)
+
+    def surface_created(self):
+        self.surfaces += 1
+
+    # --- overlay ---
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.overlay = None
+
+    def draw_overlay(self, surface):
+        if not self.overlay_visible:
+            return None
+        if self.overlay is None:
+            self.overlay = self._build_overlay()
+        return surface.blit(self.overlay, (10, 10))
+
+    def _forget_font(self):
+        self.overlay_font = None
+        self.overlay = None
+
+    def _build_overlay(self):
+        import pygame
+        if self.overlay_font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self.overlay_font = pygame.font.Font(None, 20)
+            pygame.register_quit(self._forget_font)  # fonts die with pygame.quit()
+        font = self.overlay_font
+        width, height = OVERLAY_SIZE
+        overlay = _base_surface((width, height), pygame.SRCALPHA)  # not counted as a game allocation
+        overlay.fill((0, 0, 0, 190))
+
+        times = list(self.frame_times)
+        average = sum(times) / len(times) if times else 0
+        worst = max(times) if times else 0
+        lines = [
+            f"{self.screen_name or '-'}  {self.shown['fps']:.0f} fps",
+            f"frame {average:.1f} ms avg, {worst:.1f} ms max",
+            f"DB {self.shown['db']:.0f} round trips/s",
+            f"surfaces {self.shown['surfaces']:.0f} new/s",
+        ]
+        y = 6
+        for line in lines:
+            overlay.blit(font.render(line, True, (255, 255, 255)), (8, y))
+            y += 17
+
+        # frame time histogram, one bar per frame, newest on the right
+        chart = pygame.Rect(8, y + 4, width - 16, 60)
+        pygame.draw.rect(overlay, (60, 60, 60, 220), chart)
+        bar_width = max(1, chart.width // HISTORY)
+        for i, ms in enumerate(times):
+            bar_height = max(1, int(min(ms, HISTOGRAM_MAX_MS) / HISTOGRAM_MAX_MS * chart.height))
+            colour = (80, 220, 80) if ms <= FRAME_BUDGET_MS else (240, 80, 60)
+            x = chart.right - (len(times) - i) * bar_width
+            pygame.draw.rect(overlay, colour, (x, chart.bottom - bar_height, bar_width, bar_height))
+        budget_y = chart.bottom - int(FRAME_BUDGET_MS / HISTOGRAM_MAX_MS * chart.height)
+        pygame.draw.line(overlay, (255, 255, 0), (chart.left, budget_y), (chart.right, budget_y))
+        y = chart.bottom + 6
+
+        for name, ms in self.shown["sections"]:
+            overlay.blit(font.render(name, True, (200, 200, 200)), (8, y))
+            figure = font.render(f"{ms:.2f} ms", True, (200, 200, 200))
+            overlay.blit(figure, (width - 8 - figure.get_width(), y))
+            y += 16
+        return overlay
+
+
+class _Section:
+    """Times a with block as a section of the current frame"""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _profiler.add_section(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSection:
+    """What section() returns while profiling is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NO_SECTION = _NoSection()
+_profiler = None
+_base_surface = None  # pygame.Surface before the counting hook replaced it
+
+
+# --- database round trips ---
+
+class ProfiledCursor:
+    """Cursor that reports the time of every statement to the profiler"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, *params):
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(sql, *params)
+        finally:
+            _profiler.db_call(sql, start, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_of_params)
+        finally:
+            _profiler.db_call(sql, start, time.perf_counter() - start)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._cursor.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class ProfiledConnection:
+    """Connection whose cursors and commits are reported to the profiler"""
+
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+
+    def cursor(self):
+        return ProfiledCursor(self._conn.cursor())
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            self._conn.commit()
+        finally:
+            _profiler.db_call("COMMIT", start, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._conn.__exit__(exc_type, exc_value, traceback)
+
+
+def wrap_connection(conn):
+    """The connection itself while profiling is off, otherwise one that reports its statements"""
+    if _profiler is None:
+        return conn
+    return ProfiledConnection(conn)
+
+
+# --- surface allocations ---
+
+def _install_surface_hooks():
+    """Count new surfaces: pygame.Surface(), transform.* and image loading"""
+    global _base_surface
+    import pygame
+    if _base_surface is not None:
+        return
+    _base_surface = pygame.Surface
+
+    class CountedSurface(pygame.Surface):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            _profiler.surface_created()
+
+    def counted(function):
+        def wrapper(*args, **kwargs):
+            _profiler.surface_created()
+            return function(*args, **kwargs)
+        wrapper.__name__ = function.__name__
+        return wrapper
+
+    pygame.Surface = CountedSurface
+    for module, names in ((pygame.transform, ("scale", "smoothscale", "rotate", "rotozoom", "flip")),
+                          (pygame.image, ("load", "frombytes", "fromstring", "frombuffer"))):
+        for name in names:
+            if hasattr(module, name):
+                setattr(module, name, counted(getattr(module, name)))
+
+
+# --- module functions used by the screens ---
+
+def begin_frame(screen_name):
+    """Start timing a frame of screen_name"""
+    if _profiler is not None:
+        _profiler.begin_frame(screen_name)
+
+
+def lap(name):
+    """Record the time since the frame or the previous lap started as section name"""
+    if _profiler is not None:
+        _profiler.lap(name)
+
+
+def section(name):
+    """with section(name): times the block as a section of the current frame"""
+    if _profiler is None:
+        return _NO_SECTION
+    return _Section(name)
+
+
+def end_frame():
+    """Finish timing the frame (call before waiting for the next one)"""
+    if _profiler is not None:
+        _profiler.end_frame()
+
+
+def handle_event(event):
+    """F3 toggles the overlay, returns True if the event was used"""
+    if _profiler is None:
+        return False
+    import pygame
+    if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+        _profiler.toggle_overlay()
+        return True
+    return False
+
+
+def draw_overlay(surface):
+    """Draw the overlay if it is shown, returns the rect it covered (or None)"""
+    if _profiler is None:
+        return None
+    return _profiler.draw_overlay(surface)
+
+
+def save_trace(path=None):
+    if _profiler is not None:
+        _profiler.save_trace(path)
+
+
+if ENABLED:
+    _profiler = FrameProfiler(TRACE_PATH)
+    _install_surface_hooks()
+    atexit.register(save_trace)
@@ -0,0 +1,122 @@
+import os
+import time
+
+import pygame
+
+
+# The game is simulated in fixed steps of STEP seconds whatever the frame rate,
+# so movement speed and timers are the same on a 30 fps laptop and a 144 Hz screen
+SIM_RATE = 60
+STEP = 1.0 / SIM_RATE
+
+# Frames drawn per second at most (CAPSTONES_MAX_FPS=30 halves the rendering work)
+MAX_FPS = int(os.environ.get("CAPSTONES_MAX_FPS", 60))
+
+# A longer gap between two frames (a dialog, a slow query) is not caught up on,
+# otherwise the simulation would run hundreds of steps at once
+MAX_FRAME_TIME = 0.25
+
+
+class GameClock:
+    """
+    Monotonic clock for a game loop with a fixed simulation timestep.
+
+    Each frame, tick() waits for the frame-rate cap and returns how many steps
+    of STEP seconds to simulate for the real time that passed. The left over
+    fraction of a step is kept for the next frame, and alpha tells how far
+    the renderer is between the last two simulated states (for interpolation).
+    While paused no time is simulated, so timers driven by steps stop too.
+    """
+
+    def __init__(self, step=STEP, max_fps=MAX_FPS, max_frame_time=MAX_FRAME_TIME):
+        self.step = step
+        self.max_fps = max_fps
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.time = 0.0  # simulated seconds, pauses excluded
+        self.paused = False
+        self.last_steps = 0  # what the last tick() returned (recorded with the input)
+        self._limiter = pygame.time.Clock()
+        self._last = time.perf_counter()
+
+    def tick(self):
+        """Wait for the frame-rate cap, then the number of fixed steps to simulate this frame"""
+        if self.max_fps:
+            self._limiter.tick(self.max_fps)
+        now = time.perf_counter()
+        frame_time = min(now - self._last, self.max_frame_time)
+        self._last = now
+        if self.paused:
+            self.last_steps = 0
+            return 0
+
+        self.accumulator += frame_time
+        steps = int(self.accumulator / self.step)
+        self.accumulator -= steps * self.step
+        self.time += steps * self.step
+        self.last_steps = steps
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction (0..1) of a step between the last simulated state and the next one"""
+        return self.accumulator / self.step
+
+    def pause(self):
+        """Stop simulated time (menus, dialogs)"""
+        self.paused = True
+        self.accumulator = 0.0
+
+    def resume(self):
+        """Continue simulated time, the paused period is not simulated"""
+        self.paused = False
+        self.resync()
+
+    def resync(self):
+        """Forget the real time since the last tick, call after a blocking call returns"""
+        self._last = time.perf_counter()
+
+
+class StepClock(GameClock):
+    """
+    Ticks without waiting, for replays and benchmarks. With a ScriptedInput
+    each tick simulates the steps the recorded frame had, so a recording
+    made at 30 fps or with dropped frames moves and times out the same way
+    when replayed, otherwise one step per tick.
+    """
+
+    def __init__(self, script=None, step=STEP):
+        super().__init__(step, max_fps=0)
+        self.script = script
+
+    def tick(self):
+        if self.paused:
+            self.last_steps = 0
+            return 0
+        steps = self.script.next_steps() if self.script else 1
+        self.time += steps * self.step
+        self.last_steps = steps
+        return steps
+
+
+class SecondTimer:
+    """Counts whole seconds of simulated time, only runs while it is advanced"""
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def advance(self, dt):
+        """Add dt seconds, returns how many whole seconds completed"""
+        self.elapsed += dt
+        seconds = int(self.elapsed)
+        self.elapsed -= seconds
+        return seconds
+
+    def reset(self):
+        self.elapsed = 0.0
+
+
+def lerp(previous, current, alpha):
+    """Point between previous and current (x, y) positions, rounded to whole pixels"""
+    return (round(previous[0] + (current[0] - previous[0]) * alpha),
+            round(previous[1] + (current[1] - previous[1]) * alpha))
@@ -0,0 +1,192 @@
+import json
+
+import pygame
+
+
+# Input scripts are JSON: {"frames": [...]}, where each entry is either the
+# list of events of one frame or {"wait": n} for n frames without events.
+# A frame that simulated other than one step is written {"events": [...], "steps": k}
+# or {"wait": n, "steps": k}, a StepClock replays those step counts.
+# Events are written with readable key names, e.g.
+#   [{"type": "KEYDOWN", "key": "d"}], {"wait": 60}, [{"type": "KEYUP", "key": "d"}]
+#   [{"type": "MOUSEBUTTONDOWN", "pos": [700, 60], "button": 1}]
+#   [{"type": "TEXTINPUT", "text": "a"}]  (typed answers and passcodes)
+# Held keys and the mouse position follow from the events, like on a real keyboard.
+EVENT_TYPES = {
+    "KEYDOWN": pygame.KEYDOWN,
+    "KEYUP": pygame.KEYUP,
+    "MOUSEMOTION": pygame.MOUSEMOTION,
+    "MOUSEBUTTONDOWN": pygame.MOUSEBUTTONDOWN,
+    "MOUSEBUTTONUP": pygame.MOUSEBUTTONUP,
+    "TEXTINPUT": pygame.TEXTINPUT,
+}
+EVENT_NAMES = {value: name for name, value in EVENT_TYPES.items()}
+
+
+class LiveInput:
+    """Keyboard and mouse straight from pygame (what a student plays with)"""
+
+    def get_events(self):
+        return pygame.event.get()
+
+    def get_pressed(self):
+        return pygame.key.get_pressed()
+
+    def get_mouse_pos(self):
+        return pygame.mouse.get_pos()
+
+    def set_cursor(self, cursor):
+        pygame.mouse.set_cursor(cursor)
+
+
+class HeldKeys:
+    """Stand-in for pygame.key.get_pressed(): keys[K_w] is True while K_w is held"""
+
+    def __init__(self, keys=()):
+        self.keys = set(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+def encode_event(event):
+    """JSON-ready dict of a keyboard, text or mouse event, None for other events"""
+    name = EVENT_NAMES.get(event.type)
+    if name is None:
+        return None
+    if event.type == pygame.TEXTINPUT:
+        return {"type": name, "text": event.text}
+    if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+        data = {"type": name, "key": pygame.key.name(event.key)}
+        if getattr(event, "unicode", ""):
+            data["unicode"] = event.unicode
+        return data
+    data = {"type": name, "pos": list(event.pos)}
+    if event.type != pygame.MOUSEMOTION:
+        data["button"] = event.button
+    return data
+
+
+def decode_event(data):
+    """pygame event from a dict written by encode_event (or by hand)"""
+    attributes = dict(data)
+    event_type = EVENT_TYPES[attributes.pop("type")]
+    if "key" in attributes:
+        key = attributes["key"]
+        attributes["key"] = pygame.key.key_code(key) if isinstance(key, str) else key
+        attributes.setdefault("unicode", "")
+        attributes.setdefault("mod", 0)
+    if "pos" in attributes:
+        attributes["pos"] = tuple(attributes["pos"])
+    return pygame.event.Event(event_type, attributes)
+
+
+class ScriptedInput:
+    """
+    Replays an input script, one frame per get_events() call, so a play
+    through can be repeated exactly (benchmarks, reproducing bugs). The
+    screen's own events (window close) are still drained so the window
+    does not stop responding, but they are not acted on.
+    """
+
+    def __init__(self, frames, mouse_pos=(0, 0)):
+        self.frames = list(frames)
+        self.position = 0  # index into frames
+        self.waiting = 0  # empty frames left of the current {"wait": n}
+        self.held = HeldKeys()
+        self.mouse_pos = tuple(mouse_pos)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["frames"])
+
+    @property
+    def finished(self):
+        return self.waiting == 0 and self.position >= len(self.frames)
+
+    def get_events(self):
+        pygame.event.pump()
+        pygame.event.clear()
+        if self.waiting:
+            self.waiting -= 1
+            return []
+        if self.position >= len(self.frames):
+            return []
+
+        frame = self.frames[self.position]
+        self.position += 1
+        if isinstance(frame, dict) and "events" not in frame:
+            self.waiting = max(0, int(frame.get("wait", 1)) - 1)
+            return []
+
+        events = [decode_event(data) for data in (frame["events"] if isinstance(frame, dict) else frame)]
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                self.held.keys.add(event.key)
+            elif event.type == pygame.KEYUP:
+                self.held.keys.discard(event.key)
+            elif hasattr(event, "pos"):
+                self.mouse_pos = event.pos
+        return events
+
+    def next_steps(self):
+        """Steps the recording simulated in the frame the next get_events() call replays"""
+        if self.waiting:
+            frame = self.frames[self.position - 1]
+        elif self.position < len(self.frames):
+            frame = self.frames[self.position]
+        else:
+            return 1
+        return int(frame.get("steps", 1)) if isinstance(frame, dict) else 1
+
+    def get_pressed(self):
+        return self.held
+
+    def get_mouse_pos(self):
+        return self.mouse_pos
+
+    def set_cursor(self, cursor):
+        pass  # nobody is looking at the pointer
+
+
+class InputRecorder:
+    """
+    Passes another input source through and writes what it saw as an input
+    script, with the steps clock simulated in each frame (clock.last_steps)
+    """
+
+    def __init__(self, source, clock=None):
+        self.source = source
+        self.clock = clock
+        self.frames = []
+
+    def get_events(self):
+        events = self.source.get_events()
+        steps = self.clock.last_steps if self.clock else 1
+        recorded = [data for data in (encode_event(event) for event in events) if data]
+        last = self.frames[-1] if self.frames else None
+        if recorded:
+            self.frames.append(recorded if steps == 1 else {"events": recorded, "steps": steps})
+        elif isinstance(last, dict) and "wait" in last and last.get("steps", 1) == steps:
+            last["wait"] += 1
+        else:
+            self.frames.append({"wait": 1} if steps == 1 else {"wait": 1, "steps": steps})
+        return events
+
+    def get_pressed(self):
+        return self.source.get_pressed()
+
+    def get_mouse_pos(self):
+        return self.source.get_mouse_pos()
+
+    def set_cursor(self, cursor):
+        self.source.set_cursor(cursor)
+
+    def save(self, path):
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"frames": self.frames}, f, indent=1)
+            print(f"Input recorded to {path}")
+        except Exception as e:
+            print(f"Error saving recorded input: {e}")
@@ -1,29 +1,57 @@
+import os
 import pygame
-import pyodbc
+import db_backend
 import sys
-import io
 from pygame.locals import *
 from database_conn import connect_db
-import random
+from text_cache import get_font, render_text
+from ui_panels import PreparedPanel, wrap_text
+from dirty_renderer import DirtyRenderer
+from spatial_index import SpatialGrid
+from level_data import load_level
+from asset_cache import load_level_assets
+from game_clock import GameClock, SecondTimer, SIM_RATE, STEP, lerp
+from game_input import LiveInput, InputRecorder
+import frame_profiler
+import id_allocator
+import level_stats
+import gameplay_journal
+from level_session import LevelSession
 from options import Options
 from levelSelection import levelSelection
 
 class GameLevel:
-    def __init__(self, user_data):
+    def __init__(self, user_data, input_source=None, clock=None):
         pygame.init()
         self.user_data = user_data  # Store user information
         self.tp_number = user_data['username']
         self.level_number = user_data['level']
         self.level = f"LVL00{self.level_number}"
 
-        # Get level-specific configuration
-        self.level_config = self.get_level_config(self.level_number)
+        # Fixed-step game clock (a StepClock replays the steps of a recording)
+        self.game_clock = clock or GameClock()
+
+        # Keyboard and mouse (a ScriptedInput replays a recorded play through instead)
+        self.input = input_source or LiveInput()
+        self.record_path = os.environ.get("CAPSTONES_RECORD_INPUT")
+        if self.record_path:
+            self.input = InputRecorder(self.input, self.game_clock)
+
+        # Per-level totals table used by the dashboards, created before this connection writes to it
+        try:
+            level_stats.ensure_ready()
+        except Exception as e:
+            print(f"Error preparing level statistics: {e}")
 
         # Initialize database connection
         self.conn = None
         self.cursor = None
         self.ensure_connection()
 
+        # writes of an earlier level (or run) still in the journal must be in the database before reading it
+        if not gameplay_journal.wait_until_applied():
+            print("Warning: earlier gameplay writes are not in the database yet")
+
         # Get display info and set up display
         self.info = pygame.display.Info()
         self.original_width = 1920
@@ -33,6 +61,11 @@ class GameLevel:
         self.width = int(self.original_width * 0.75)  # Start at 75% of original size
         self.height = int(self.original_height * 0.75)
         self.scale_factor = 0.75
+        self.grid_cell_size = int(128 * self.scale_factor)  # spatial index cell, about one interaction radius
+
+        # Level layout (levels/level<n>.json), pre-scaled and indexed
+        self.level_config = load_level(self.level_number, self.scale_factor, self.grid_cell_size)
+        self.item_slots = self.level_config['slots']  # item ID -> index into question_ids
 
         # Create a non-resizable window
         pygame.display.init()
@@ -45,19 +78,18 @@ class GameLevel:
         self.screen.fill((0, 0, 0))  # Clear screen
         pygame.display.flip()
 
-        # Database connection
-        self.conn = connect_db()
-        self.cursor = self.conn.cursor()
-
         # Load assets
         self.load_assets()
         self.setup_game_objects()
 
+        # only regions that change are redrawn each frame
+        self.renderer = DirtyRenderer(self.screen)
+
         # Game state
         self.running = True
-        self.clock = pygame.time.Clock()
-        self.tel_cooldown = 500
-        self.last_tel_time = 0
+        self.countdown = SecondTimer()  # whole seconds of play for the level timer
+        self.tel_cooldown = 0.5  # seconds of simulated time between teleports
+        self.last_tel_time = -self.tel_cooldown
         self.is_completed = False
 
         try:
@@ -84,27 +116,13 @@ class GameLevel:
                 # Reset timer if time remaining = 0 (student reattempting level)
                 if self.time_remaining == 0:
                     self.time_remaining = 600
-                    try:
-                        self.cursor.execute("""
-                            UPDATE LevelSelection 
-                            SET time_remaining = ?
-                            WHERE TP_Number = ? AND LevelID = ?
-                        """, self.time_remaining, self.tp_number, self.level)
-                        self.conn.commit()
-                    except Exception as e:
-                        print(f"Error updating time remaining: {e}")
+                    self.save_time_remaining()
             else:
                 # Default time (10 minutes = 600 seconds)
                 self.time_remaining = 600
 
                 # Get LevelSelectionID
-                self.cursor.execute("""
-                    SELECT MAX(CAST(SUBSTRING(LevelSelectionID, 3, LEN(LevelSelectionID)) AS INT))
-                    FROM LevelSelection
-                    WHERE LevelSelectionID LIKE 'LS%'
-                """)
-                max_id = self.cursor.fetchone()[0] or 0
-                next_id = f"LS{max_id + 1:04d}"
+                next_id = id_allocator.next_id("LS")
                 print(next_id)
 
                 # Insert new entry
@@ -112,21 +130,19 @@ class GameLevel:
                             INSERT INTO LevelSelection (LevelSelectionID, is_locked, is_completed, time_remaining, TP_Number, LevelID)
                             VALUES (?, ?, ?, ?, ?, ?)
                         """, next_id, 0, 0, self.time_remaining, self.tp_number, self.level)
+                level_stats.sync_level_state(self.cursor, self.tp_number, self.level)
                 self.conn.commit()
 
         except Exception as e:
             print(f"Error handling time remaining: {e}")
             self.time_remaining = 600  # Default fallback
 
-        # Convert seconds to minutes:seconds for display
-        self.start_time = pygame.time.get_ticks()
-        self.last_second = 0
-        print(self.time_remaining, self.start_time)
+        print(self.time_remaining)
 
         pygame.key.set_repeat(500, 50)  # Enable key repeat for backspace
         self.input_active = False
         self.input_text = ""
-        self.input_font = pygame.font.Font(None, int(30 * self.scale_factor))
+        self.input_font = get_font(None, int(30 * self.scale_factor))
         self.input_rect = None
         self.is_correct = False
 
@@ -134,7 +150,7 @@ class GameLevel:
         self.default_cursor = pygame.SYSTEM_CURSOR_ARROW
         self.hover_cursor = pygame.SYSTEM_CURSOR_HAND
         self.text_cursor = pygame.SYSTEM_CURSOR_IBEAM
-        pygame.mouse.set_cursor(self.default_cursor)
+        self.input.set_cursor(self.default_cursor)
 
         self.active_door = None  # initialize door tracking
         self.points = 0
@@ -149,6 +165,12 @@ class GameLevel:
         self.hints_surface = None
         self.hints_pos = (0, 0)
 
+        # note, hint and completed panels are composed once and reused every frame
+        self.notes_panel = PreparedPanel(self.build_notes_surface)
+        self.hints_panel = PreparedPanel(self.build_hints_surface)
+        self.completed_panel = PreparedPanel(self.build_completed_surface)
+        self.load_notes()
+
         # feedback message initialization
         self.feedback_message = None
         self.feedback_color = (255, 255, 255)
@@ -162,60 +184,19 @@ class GameLevel:
         # unlock door message properties
         self.door_message_visible = True
         self.door_message_radius = 22
-        self.door_message_font = pygame.font.Font(None, 38)
+        self.door_message_font = get_font(None, 38)
         self.door_message_text = "!"
-        self.door_message_text_surface = self.door_message_font.render("!", True, (255, 0, 0))
-        if self.level == "LVL001":
-            self.door_message_position = (780 * self.scale_factor + 38, 160 * self.scale_factor - 25)
-        elif self.level == "LVL002":
-            self.door_message_position = (1407 * self.scale_factor + 150, 0 * self.scale_factor + 35)
-        elif self.level == "LVL003":
-            self.door_message_position = (840 * self.scale_factor + 88, 0 * self.scale_factor + 70)
-        elif self.level == "LVL004":
-            self.door_message_position = (520 * self.scale_factor + 38, 714 * self.scale_factor + 40)
-        elif self.level == "LVL005":
-            self.door_message_position = (1735 * self.scale_factor + 42, 107 * self.scale_factor + 40)
-
-        # initialize all question IDs used in the current run
-        self.question_ids = []
-        try:
-            print("\nDebug: Initializing question IDs for level:", self.level)
-            
-            # First, get all questions for Level 1
-            self.cursor.execute("""
-                SELECT QuestionID, MapsItemsID
-                FROM QuestionDetails
-                WHERE LevelID = ?
-            """, self.level)
-            all_questions = self.cursor.fetchall()
-            print(f"Debug: All questions for Level {self.level}:", all_questions)
-
-            # Group questions by MapsItemsID
-            questions_by_item = {}
-            for question_id, maps_items_id in all_questions:
-                if maps_items_id not in questions_by_item:
-                    questions_by_item[maps_items_id] = []
-                questions_by_item[maps_items_id].append(question_id)
-
-            print("Debug: Questions grouped by MapsItemsID:", questions_by_item)
-
-            # Initialize question_ids list with None for all positions
-            self.question_ids = [None] * 6  # We need exactly 6 questions
-
-            # For each MapsItemsID from MIT101 to MIT106, get one random question
-            for i in range(1, 7):
-                maps_items_id = f'MIT{self.level[-1]}0{i}'  # Use the level number from self.level
-                if maps_items_id in questions_by_item and questions_by_item[maps_items_id]:
-                    # Randomly select one question for this MapsItemsID
-                    random_question = random.choice(questions_by_item[maps_items_id])
-                    self.question_ids[i-1] = random_question
-                    print(f"Debug: Selected question {random_question} for {maps_items_id}")
-
-            print("Debug: Final question_ids array:", self.question_ids)
+        self.door_message_text_surface = render_text(self.door_message_font, "!", True, (255, 0, 0))
+        self.door_message_position = self.level_config['door_message_position']
 
+        # questions picked for this play with their answers, passcodes and the
+        # student's submission status, loaded in one query (kept in sync by check_answer())
+        try:
+            self.session = LevelSession.load(self.cursor, self.tp_number, self.level)
+            print("Debug: Final question_ids array:", self.session.question_ids)
         except Exception as e:
             print(f"Error getting question IDs: {e}")
-            print("Debug: Exception traceback:", e.__traceback__)
+            self.session = LevelSession(self.level)
 
         self.current_question = {
             'surface': None,
@@ -249,321 +230,6 @@ class GameLevel:
         self.show_fail = False
         self.show_hints = False
 
-    def get_level_config(self, level_number):
-        """Get level-specific configuration"""
-        configs = {
-            1: {
-                'maps_id': 'Maps01',
-                'items_prefix': 'MIT10',
-                'walls': [
-                    (0, 378, 553, 90),  # room1h
-                    (553, 0, 19, 452),  # room1v
-                    (1154, 0, 19, 676),  # room2v
-                    (1176, 594, 748, 90),  # room2 lower horizontal
-                    (1176, 0, 744, 142),  # room2 upper horizontal
-                    (0, 704, 574, 2),  # room3h
-                    (558, 759, 14, 328),  # room3v
-                    (574, 108, 580, 90)  # room4
-                ],
-                'objects': [
-                    (968, 214, 118, 14),  # vending machine
-                    (1100, 653, 54, 20),  # bookshelf
-                    (1602, 702, 320, 20),  # lockers
-                    (836, 756, 107, 79),  # table & chairs (left)
-                    (968, 774, 40, 5),  # t&c (right)
-                    (1095, 922, 240, 11),  # t&c (room3 right)
-                    (257, 972, 259, 214),  # table and chair (room3 left)
-                    (0, 808, 168, 90),  # chair (room3 left)
-                    (1176, 706, 90, 8),  # plant
-                    (1423, 150, 24, 8),  # podium (room2)
-                    (1215, 163, 64, 20),  # drawers (left)
-                    (1793, 163, 64, 20),  # drawers (right)
-                    (1217, 324, 127, 130),  # t&c1 (room2)
-                    (1471, 324, 127, 130),  # t&c2 (room2)
-                    (1725, 324, 127, 130),  # t&c3 (room2)
-                    (236, 0, 1, 382),  # t&c1 (room1)
-                    (326, 0, 1, 382)  # t&c2 (room1)
-                ],
-                'doors': [
-                    {
-                        "door_area": (142, 436, 174, 149),
-                        "floor_area": (142, 558, 144, 38),
-                        "destination": (240, 254)
-                    },
-                    {
-                        "door_area": (142, 436, 174, 149),
-                        "floor_area": (142, 315, 144, 58),
-                        "destination": (240, 474)
-                    },
-                    {
-                        "door_area": (1420, 654, 176, 149),
-                        "floor_area": (1420, 770, 176, 38),
-                        "destination": (1450, 486)
-                    },
-                    {
-                        "door_area": (1420, 654, 176, 149),
-                        "floor_area": (1420, 533, 176, 58),
-                        "destination": (1450, 692)
-                    },
-                    {
-                        "door_area": (556, 920, 48, 123),
-                        "floor_area": (576, 920, 54, 125),
-                        "destination": (448, 864)
-                    },
-                    {
-                        "door_area": (556, 920, 48, 125),
-                        "floor_area": (529, 920, 54, 125),
-                        "destination": (605, 864)
-                    },
-                    {
-                        "door_area": (780, 160, 104, 133),
-                        "floor_area": (780, 292, 104, 38),
-                        "destination": (798, 0)
-                    }
-                ],
-                'items': [
-                    {'id': 'MIT101', 'type': 'bag', 'pos': (115, 29), 'size': (91, 59),
-                    'stickynotes': [{'id': 'MIT107', 'offset': (32, 68)}]},
-
-                    {'id': 'MIT102', 'type': 'computer', 'pos': (88, 788), 'size': (94, 77),
-                    'stickynotes': [{'id': 'MIT107', 'offset': (-8, 80)}]},
-
-                    {'id': 'MIT103', 'type': 'pencil', 'pos': (850, 776), 'size': (53, 43),
-                    'stickynotes': [{'id': 'MIT107', 'offset': (58, 12)}]},
-
-                    {'id': 'MIT104', 'type': 'picture', 'pos': (1218, 113), 'size': (59, 47),
-                    'stickynotes': [{'id': 'MIT107', 'offset': (76, 33)}]},
-
-                    {'id': 'MIT105', 'type': 'plant', 'pos': (1176, 707), 'size': (94, 95),
-                    'stickynotes': [{'id': 'MIT107', 'offset': (-8, -43)}]},
-
-                    {'id': 'MIT106', 'type': 'shoes', 'pos': (1390, 394), 'size': (90, 45),
-                    'stickynotes': [{'id': 'MIT107', 'offset': (100, -59)}]}
-                ]
-            },
-            2: {
-                'maps_id': 'Maps02',
-                'items_prefix': 'MIT20',
-                'walls': [
-                    (176, 324, 11, 68),  # stairs
-                    (190, 324, 1706, 42),  # lower floor wall
-                    (1473, 0, 448, 34)  # upper floor room
-                ],
-                'objects': [
-                    (256, 594, 352, 2),  # t&c row1 column1
-                    (256, 702, 352, 2),  # t&c r2c1
-                    (256, 810, 352, 2),  # t&c r3c1
-                    (256, 918, 352, 2),  # t&c r4c1
-                    (768, 594, 352, 2),  # t&c r1c2
-                    (768, 702, 352, 2),  # t&c r2c2
-                    (768, 810, 352, 2),  # t&c r3c2
-                    (768, 918, 352, 2),  # t&c r4c2
-                    (1280, 594, 352, 2),  # t&c r1c3
-                    (1280, 702, 352, 2),  # t&c r2c3
-                    (1280, 810, 352, 2),  # t&c r3c3
-                    (1280, 918, 352, 2),  # t&c r4c3
-                    (1869, 592, 53, 34),  # bookshelf
-                    (1780, 368, 69, 20),  # drum
-                    (120, 55, 133, 10),  # piano
-                    (788, 135, 43, 10),  # mic
-                    (976, 176, 24, 8),  # podium
-                    (1510, 45, 48, 8)  # guitar
-                ],
-                'doors': [
-                    {
-                        "door_area": (142, 436, 174, 149),
-                        "floor_area": (142, 558, 144, 38),
-                        "destination": (240, 254)
-                    }
-                ],
-                'items': [
-                    {'id': 'MIT201', 'type': 'basketball', 'pos': (710, 822), 'size': (48, 41),
-                    'stickynotes': [{'id': 'MIT207', 'offset': (72, -2)}]},
-
-                    {'id': 'MIT202', 'type': 'drum', 'pos': (1780, 415), 'size': (69, 68),
-                    'stickynotes': [{'id': 'MIT207', 'offset': (15, -50)}]},
-
-                    {'id': 'MIT203', 'type': 'guitar', 'pos': (1510, 45), 'size': (48, 97),
-                    'stickynotes': [{'id': 'MIT207', 'offset': (-30, -30)}]},
-
-                    {'id': 'MIT204', 'type': 'mic', 'pos': (788, 135), 'size': (43, 97),
-                    'stickynotes': [{'id': 'MIT207', 'offset': (2, 30)}]},
-
-                    {'id': 'MIT205', 'type': 'piano', 'pos': (120, 56), 'size': (133, 97),
-                    'stickynotes': [{'id': 'MIT207', 'offset': (-10, 24)}]},
-
-                    {'id': 'MIT206', 'type': 'racket', 'pos': (1643, 888), 'size': (67, 54),
-                    'stickynotes': [{'id': 'MIT207', 'offset': (-61, 40)}]}
-                ]
-            },
-            3: {
-                'maps_id': 'Maps03',
-                'items_prefix': 'MIT30',
-                'walls': [
-                    (0, 594, 552, 89),  # room1 lh
-                    (0, 0, 552, 140),  # room1 uh
-                    (554, 0, 21, 683),  # room1v
-                    (1345, 0, 21, 683),  # room2v
-                    (1367, 594, 552, 89),  # room2 lh
-                    (1367, 0, 552, 140),  # room3 uh
-                    (577, 0, 766, 120)  # room3
-                ],
-                'objects': [
-                    (577, 216, 59, 459),  # lockers & bookshelf (left)
-                    (1286, 216, 59, 461),  # lockers (right)
-                    (1346, 700, 122, 25),  # bookshelf (right)
-                    (85, 884, 50, 5),  # c1a
-                    (128, 866, 128, 214),  # t1
-                    (256, 973, 65, 5),  # c1b
-                    (450, 866, 256, 214),  # t&c2
-                    (1217, 973, 65, 5),  # c3a
-                    (1282, 866, 128, 214),  # t3
-                    (1410, 884, 65, 5),  # c3b
-                    (1600, 866, 193, 214),  # t&c4
-                    (1793, 884, 40, 5),  # c4
-                    (321, 162, 127, 20),  # lockers (room1)
-                    (1471, 162, 127, 20),  # lockers (room2)
-                    (64, 324, 126, 26),  # t&c1 (room1)
-                    (320, 324, 126, 26),  # t&c2 (room1)
-                    (64, 487, 126, 26),  # t&c3 (room1)
-                    (320, 487, 126, 26),  # t&c4 (room1)
-                    (1473, 324, 126, 26),  # t&c1 (room2)
-                    (1729, 324, 126, 26),  # t&c2 (room2)
-                    (1473, 487, 126, 26),  # t&c3 (room2)
-                    (1729, 487, 126, 26),  # t&c4 (room2)
-                ],
-                'doors': [
-                    {
-                        "door_area": (73, 650, 183, 130),
-                        "floor_area": (73, 780, 183, 50),
-                        "destination": (220, 480)
-                    },
-                    {
-                        "door_area": pygame.Rect(73, 650, 183, 130),
-                        "floor_area": pygame.Rect(73, 544, 183, 50),
-                        "destination": (110, 690)
-                    },
-                    {
-                        "door_area": pygame.Rect(1671, 650, 183, 130),
-                        "floor_area": pygame.Rect(1671, 544, 183, 50),
-                        "destination": (1700, 690)
-                    },
-                    {
-                        "door_area": pygame.Rect(1671, 650, 183, 130),
-                        "floor_area": pygame.Rect(1671, 780, 183, 50),
-                        "destination": (1650, 480)
-                    },
-                    {
-                        "door_area": pygame.Rect(840, 25, 230, 163),
-                        "floor_area": pygame.Rect(840, 188, 230, 30),
-                        "destination": (1700, 690)
-                    }
-                ],
-                'items': [
-                    {'id': 'MIT301', 'type': 'burger', 'pos': (355, 482), 'size': (91, 59),
-                    'stickynotes': [{'id': 'MIT307', 'offset': (45, 48)}]},  # burger with note
-
-                    {'id': 'MIT302', 'type': 'cake', 'pos': (358, 132), 'size': (94, 77),
-                    'stickynotes': [{'id': 'MIT307', 'offset': (-23, 53)}]},  # cake with note
-
-                    {'id': 'MIT303', 'type': 'chocolate', 'pos': (1720, 880), 'size': (53, 43),
-                    'stickynotes': [{'id': 'MIT307', 'offset': (-40, 20)}]},  # chocolate with note
-
-                    {'id': 'MIT304', 'type': 'donut', 'pos': (137, 970), 'size': (59, 47),
-                    'stickynotes': [{'id': 'MIT307', 'offset': (8, -50)}]},  # donut with note
-
-                    {'id': 'MIT305', 'type': 'drinks', 'pos': (1771, 302), 'size': (94, 95),
-                    'stickynotes': [{'id': 'MIT307', 'offset': (37, 58)}]},  # drinks with note
-
-                    {'id': 'MIT306', 'type': 'taco', 'pos': (1284, 975), 'size': (90, 45),
-                    'stickynotes': [{'id': 'MIT307', 'offset': (16, -55)}]}  # taco with note
-                ]
-            },
-            4: {
-                'maps_id': 'Maps04',
-                'items_prefix': 'MIT40',
-                'walls': [
-                    (680, 0, 22, 210),  # v1
-                    (232, 180, 471, 5),  # h1
-                    (232, 269, 22, 480),  # v2
-                    (232, 749, 1456, 139),  # h2
-                    (1664, 0, 24, 749),  # v3
-                ],
-                'objects': [
-                    (385, 269, 126, 20),  # vending machine
-                    (384, 447, 64, 3),  # chair1
-                    (384, 553, 64, 3),  # chair2
-                    (577, 647, 62, 3),  # chair3
-                ],
-                'doors': [
-                    {
-                        "door_area": pygame.Rect(520, 754, 110, 135),
-                        "floor_area": pygame.Rect(520, 704, 170, 20),
-                        "destination": (535, 800)
-                    }
-                ],
-                'items': [
-                    {'id': 'MIT401', 'type': 'bag', 'pos': (515, 240), 'size': (91, 59),
-                     'stickynotes': [{'id': 'MIT407', 'offset': (32, 68)}]},
-
-                    {'id': 'MIT402', 'type': 'ball', 'pos': (260, 588), 'size': (94, 77),
-                     'stickynotes': [{'id': 'MIT407', 'offset': (-8, 80)}]},
-
-                    {'id': 'MIT403', 'type': 'bat', 'pos': (850, 690), 'size': (53, 43),
-                     'stickynotes': [{'id': 'MIT407', 'offset': (58, 12)}]},
-
-                    {'id': 'MIT404', 'type': 'drink', 'pos': (1218, 113), 'size': (59, 47),
-                     'stickynotes': [{'id': 'MIT407', 'offset': (76, 33)}]},
-
-                    {'id': 'MIT405', 'type': 'gloves', 'pos': (1176, 640), 'size': (94, 95),
-                     'stickynotes': [{'id': 'MIT407', 'offset': (-8, -43)}]},
-
-                    {'id': 'MIT406', 'type': 'shoes', 'pos': (1390, 394), 'size': (90, 45),
-                     'stickynotes': [{'id': 'MIT407', 'offset': (100, -59)}]}
-                ]
-            },
-            5: {
-                'maps_id': 'Maps05',
-                'items_prefix': 'MIT50',
-                'walls': [
-                    (64, 163, 575, 10),  # fence1
-                    (64, 1024, 575, 10),  # fence2
-                    (1215, 1024, 575, 10),  # fence3
-                    (1665, 0, 585, 140),  # room
-                ],
-                'objects': [
-                    (1599, 109, 65, 20),  # vending machine
-                ],
-                'doors': [
-                    {
-                        "door_area": pygame.Rect(1735, 107, 111, 134),
-                        "floor_area": pygame.Rect(1735, 241, 111, 30),
-                        "destination": (535, 800)
-                    }
-                ],
-                'items': [
-                    {'id': 'MIT501', 'type': 'bag', 'pos': (514, 224), 'size': (91, 59),
-                    'stickynotes': [{'id': 'MIT507', 'offset': (64, -14)}]},
-
-                    {'id': 'MIT502', 'type': 'ball', 'pos': (1110, 631), 'size': (94, 77),
-                    'stickynotes': [{'id': 'MIT507', 'offset': (-40, 39)}]},
-
-                    {'id': 'MIT503', 'type': 'bush', 'pos': (662, 990), 'size': (53, 43),
-                    'stickynotes': [{'id': 'MIT507', 'offset': (178, 10)}]},
-
-                    {'id': 'MIT504', 'type': 'cone', 'pos': (1830, 856), 'size': (59, 47),
-                    'stickynotes': [{'id': 'MIT507', 'offset': (-45, 4)}]},
-
-                    {'id': 'MIT505', 'type': 'gloves', 'pos': (328, 735), 'size': (94, 95),
-                    'stickynotes': [{'id': 'MIT507', 'offset': (-42, 35)}]},
-
-                    {'id': 'MIT506', 'type': 'rock', 'pos': (1063, 125), 'size': (90, 45),
-                    'stickynotes': [{'id': 'MIT507', 'offset': (97, 6)}]}
-                ]
-            }
-        }
-        return configs.get(level_number, configs[1])  # Default to level 1 config if not found
-
     def ensure_connection(self):
         """Ensure we have an active database connection"""
         if self.conn is None:
@@ -574,7 +240,7 @@ class GameLevel:
                     return False
                 self.cursor = self.conn.cursor()
                 return True
-            except pyodbc.Error as e:
+            except db_backend.Error as e:
                 print(f"Database error: {e}")
                 return False
         return True
@@ -592,205 +258,126 @@ class GameLevel:
             self.conn = None
             self.cursor = None
 
-    def get_background_from_db(self):
-        """Retrieve background image from database and convert to Pygame surface"""
-        try:
-            # Query the database for the image
-            self.cursor.execute("SELECT Image FROM Maps WHERE MapsID = ?", self.level_config['maps_id'])
-            row = self.cursor.fetchone()
-
-            if row and row[0]:
-                # Convert binary data to bytes
-                image_data = bytes(row[0])
-
-                # Create a file-like object from the bytes
-                image_file = io.BytesIO(image_data)
-
-                # Load the image with Pygame
-                return pygame.image.load(image_file).convert()
-            else:
-                print(f"No image found for MapsID: {self.level_config['maps_id']}")
-                # Fallback to a solid color if no image is found
-                surf = pygame.Surface((self.width, self.height))
-                surf.fill((50, 50, 50))  # Gray background
-                return surf
-
-        except Exception as e:
-            print("Error loading image from database:", e)
-            # Fallback to a solid color if there's an error
-            surf = pygame.Surface((self.width, self.height))
-            surf.fill((255, 0, 0))  # Red background to indicate error
-            return surf
-
     def load_assets(self):
         """Load and scale all game assets"""
-        # Background - loaded from database
-        self.background = self.get_background_from_db()
-        self.background = pygame.transform.scale(self.background, (self.width, self.height))
+        maps_id = self.level_config['maps_id']
+        prefix = self.level_config['items_prefix']
+        self.char_width, self.char_height = int(60 * self.scale_factor), int(100 * self.scale_factor)
+        self.npc_width, self.npc_height = 350, 350
+        self.stickynote_size = self.level_config['stickynote_size']
+
+        # every image of the level, already at its on-screen size
+        specs = {
+            'background': ("Maps", maps_id, (self.width, self.height), False),
+            'character': ("MapsItems", f"{prefix}9", (self.char_width, self.char_height), True),
+            'npc': ("MapsItems", f"{prefix}8", (self.npc_width, self.npc_height), True)
+        }
+        for prop in self.level_config['items']:
+            specs[prop['id']] = ("MapsItems", prop['id'], prop['size'], True)
+            for stickynote in prop['stickynotes']:
+                specs[stickynote['id']] = ("MapsItems", stickynote['id'], self.stickynote_size, True)
 
-        # Character - loaded from database
         try:
-            self.cursor.execute("""
-                SELECT Item_Image 
-                FROM MapsItems 
-                WHERE MapsItemsID = ? AND MapsID = ?
-            """, (f"{self.level_config['items_prefix']}9", self.level_config['maps_id']))
-            row = self.cursor.fetchone()
-            
-            if row and row[0]:
-                # Convert binary data to bytes
-                image_data = bytes(row[0])
-                image_file = io.BytesIO(image_data)
-                self.character_img = pygame.image.load(image_file).convert_alpha()
-            else:
-                print("Error: Player image not found in database")
-                # Fallback to a placeholder if image not found
-                self.character_img = pygame.Surface((60, 100))
-                self.character_img.fill((255, 0, 255))  # Magenta placeholder
+            self.assets = load_level_assets(self.cursor, maps_id, specs)
         except Exception as e:
-            print(f"Error loading player image from database: {e}")
-            # Fallback to a placeholder if error occurs
-            self.character_img = pygame.Surface((60, 100))
-            self.character_img.fill((255, 0, 255))  # Magenta placeholder
+            print("Error loading level assets:", e)
+            self.assets = {}
 
-        self.char_width, self.char_height = int(60 * self.scale_factor), int(100 * self.scale_factor)
-        self.character = pygame.transform.scale(self.character_img, (self.char_width, self.char_height))
+        # Background - loaded from database (through the asset cache)
+        self.background = self.assets.get('background')
+        if self.background is None:
+            print(f"No image found for MapsID: {maps_id}")
+            # Fallback to a solid color if no image is found
+            self.background = pygame.Surface((self.width, self.height))
+            self.background.fill((50, 50, 50))  # Gray background
+
+        # Character - loaded from database
+        self.character = self.assets.get('character')
+        if self.character is None:
+            print("Error: Player image not found in database")
+            # Fallback to a placeholder if image not found
+            self.character = pygame.Surface((self.char_width, self.char_height))
+            self.character.fill((255, 0, 255))  # Magenta placeholder
         self.char_x, self.char_y = (self.width // 2 - self.char_width // 2), (self.height // 2 - self.char_height // 2)
+        self.prev_char_pos = (self.char_x, self.char_y)  # position one simulation step ago, for interpolation
 
         # NPC
-        try:
-            self.cursor.execute("""
-                SELECT Item_Image 
-                FROM MapsItems 
-                WHERE MapsItemsID = ? AND MapsID = ?
-            """, (f"{self.level_config['items_prefix']}8", self.level_config['maps_id']))
-            row = self.cursor.fetchone()
-
-            if row and row[0]:
-                # Convert binary data to bytes
-                image_data = bytes(row[0])
-                image_file = io.BytesIO(image_data)
-                self.npc_img = pygame.image.load(image_file).convert_alpha()
-            else:
-                print("Error: NPC image not found in database")
-                # Fallback to a placeholder if image not found
-                self.npc_img = pygame.Surface((60, 100))
-                self.npc_img.fill((255, 0, 255))  # Magenta placeholder
-        except Exception as e:
-            print(f"Error loading NPC image from database: {e}")
-            # Fallback to a placeholder if error occurs
-            self.npc_img = pygame.Surface((60, 100))
-            self.npc_img.fill((255, 0, 255))  # Magenta placeholder
-
-        self.npc_width, self.npc_height = 350, 350
-        self.npc = pygame.transform.scale(self.npc_img, (self.npc_width, self.npc_height))
+        self.npc = self.assets.get('npc')
+        if self.npc is None:
+            print("Error: NPC image not found in database")
+            # Fallback to a placeholder if image not found
+            self.npc = pygame.Surface((self.npc_width, self.npc_height))
+            self.npc.fill((255, 0, 255))  # Magenta placeholder
         self.npc_x, self.npc_y = (1050, self.screen.get_height() - self.npc_height + 15)
 
         # Text
-        self.font = pygame.font.Font(None, int(36 * self.scale_factor))
-        self.hover_text = self.font.render("F", False, "Black")
+        self.font = get_font(None, int(36 * self.scale_factor))
+        self.hover_text = render_text(self.font, "F", False, "Black")
 
-        # Load items from database with specific positions
+        # Place items with specific positions
         self.load_items_from_db()
 
-        # Game speed
-        self.speed = int(6 * self.scale_factor)
+        # Game speed (pixels per second): the original whole pixels per frame at 60 fps
+        self.speed = int(6 * self.scale_factor) * SIM_RATE
 
     def load_items_from_db(self):
-        """Load items from database with their exact positions"""
+        """Place the level items (loaded by load_assets) at their precomputed positions"""
         try:
             self.items = []
             self.item_positions = []
             self.item_rects = []
             self.item_info = {}  # stores item data by ID
             self.stickynote_to_item = {}  # maps note IDs to item IDs
+            all_loaded = True
 
             for prop in self.level_config['items']:
-                # Get item from database
-                self.cursor.execute("""
-                    SELECT Item_Image 
-                    FROM MapsItems 
-                    WHERE MapsItemsID = ? AND MapsID = ?
-                """, (prop['id'], self.level_config['maps_id']))
-
-                row = self.cursor.fetchone()
-
-                if row and row[0]:
-                    # Convert binary data to surface
-                    image_data = bytes(row[0])
-                    image_file = io.BytesIO(image_data)
-                    img = pygame.image.load(image_file).convert_alpha()
-
-                    # Scale item
-                    scaled_size = (
-                        int(prop['size'][0] * self.scale_factor),
-                        int(prop['size'][1] * self.scale_factor)
-                    )
-                    scaled_img = pygame.transform.scale(img, scaled_size)
-
-                    # Scale position
-                    scaled_pos = (
-                        int(prop['pos'][0] * self.scale_factor),
-                        int(prop['pos'][1] * self.scale_factor)
-                    )
+                scaled_img = self.assets.get(prop['id'])
 
+                if scaled_img is not None:
                     # add main items to lists
                     self.items.append(scaled_img)
-                    self.item_positions.append(scaled_pos)
-                    item_rect = pygame.Rect(scaled_pos[0], scaled_pos[1], scaled_size[0], scaled_size[1])
-                    self.item_rects.append(item_rect)
+                    self.item_positions.append(prop['pos'])
+                    self.item_rects.append(prop['rect'])
 
                     # store item information
                     self.item_info[prop['id']] = {
                         'type': prop['type'],
-                        'rect': item_rect,
+                        'rect': prop['rect'],
                         'stickynotes': []
                     }
 
                     # associated sticky notes
                     for stickynote in prop['stickynotes']:
-                        stickynote_pos = (
-                            scaled_pos[0] + int(stickynote['offset'][0] * self.scale_factor),
-                            scaled_pos[1] + int(stickynote['offset'][1] * self.scale_factor)
-                        )
-
-                        # load sticky note img
-                        self.cursor.execute("SELECT Item_Image FROM MapsItems WHERE MapsItemsID = ?",
-                                            stickynote['id'])
-                        stickynote_img_data = self.cursor.fetchone()
-                        if stickynote_img_data and stickynote_img_data[0]:
-                            stickynote_img = pygame.image.load(
-                                io.BytesIO(bytes(stickynote_img_data[0]))).convert_alpha()
-                            stickynote_img = pygame.transform.scale(stickynote_img,
-                                                                    (int(35 * self.scale_factor),
-                                                                     int(34 * self.scale_factor)))
-
+                        stickynote_img = self.assets.get(stickynote['id'])
+                        if stickynote_img is not None:
                             # Store sticky note data
                             self.items.append(stickynote_img)
-                            self.item_positions.append(stickynote_pos)
-                            stickynote_rect = pygame.Rect(stickynote_pos[0], stickynote_pos[1],
-                                                          int(35 * self.scale_factor),
-                                                          int(34 * self.scale_factor))
-                            self.item_rects.append(stickynote_rect)
+                            self.item_positions.append(stickynote['position'])
+                            self.item_rects.append(stickynote['rect'])
 
                             # map sticky notes to respective items
                             self.stickynote_to_item[stickynote['id']] = prop['id']
-                            self.item_info[prop['id']]['stickynotes'].append({
-                                'id': stickynote['id'],
-                                'rect': stickynote_rect,
-                                'position': stickynote_pos
-                            })
+                            self.item_info[prop['id']]['stickynotes'].append(stickynote)
+                        else:
+                            all_loaded = False
 
                 else:
                     print(f"Item {prop['id']} not found in database")
+                    all_loaded = False
                     # Add placeholder if item missing
                     surf = pygame.Surface((10, 10))
                     surf.fill((255, 0, 255))  # Magenta placeholder
                     self.items.append(surf)
-                    self.item_positions.append((
-                        int(prop['pos'][0] * self.scale_factor),
-                        int(prop['pos'][1] * self.scale_factor))
-                    )
+                    self.item_positions.append(prop['pos'])
+
+            if all_loaded:
+                self.stickynote_index = self.level_config['stickynote_index']
+            else:
+                # only index the notes that are actually on the map
+                self.stickynote_index = SpatialGrid(self.grid_cell_size)
+                for item_id, item_data in self.item_info.items():
+                    for stickynote in item_data['stickynotes']:
+                        self.stickynote_index.insert(stickynote['rect'], (item_id, stickynote))
 
             print(f"Loaded {len(self.items)} items for map {self.level_config['maps_id']}")
 
@@ -801,63 +388,34 @@ class GameLevel:
             self.item_positions = []
             self.item_rects = []
             self.item_info = {}
-            self.stickynotenote_to_item = {}
+            self.stickynote_to_item = {}
+            self.stickynote_index = SpatialGrid(self.grid_cell_size)
 
     def setup_game_objects(self):
-        """Setup all game objects with collision"""
-        def scale_rect(rect):
-            return pygame.Rect(
-                int(rect[0] * self.scale_factor),
-                int(rect[1] * self.scale_factor),
-                int(rect[2] * self.scale_factor),
-                int(rect[3] * self.scale_factor)
-            )
-
-        # Walls
-        self.walls = [scale_rect(wall) for wall in self.level_config['walls']]
-
-        # Objects
-        self.objects = [scale_rect(obj) for obj in self.level_config['objects']]
-
-        # Doors
-        def scale_door(door):
-            return {
-                "door_area": scale_rect(door["door_area"]),
-                "floor_area": scale_rect(door["floor_area"]),
-                "destination": (
-                    int(door["destination"][0] * self.scale_factor),
-                    int(door["destination"][1] * self.scale_factor)
-                )
-            }
-
-        self.doors = [scale_door(door) for door in self.level_config['doors']]
+        """Setup all game objects with collision (already scaled and indexed by level_data)"""
+        self.walls = self.level_config['walls']
+        self.objects = self.level_config['objects']
+        self.collision_index = self.level_config['collision_index']
+        self.doors = self.level_config['doors']
 
     def check_collision(self, new_x, new_y):
         """Check for collisions with walls and objects"""
         char_rect = pygame.Rect(new_x, new_y, self.char_width, self.char_height)
-        for wall in self.walls:
-            if char_rect.colliderect(wall):
-                return True
-        for obj in self.objects:
-            if char_rect.colliderect(obj):
-                return True
-        return False
+        return self.collision_index.collides(char_rect)
+
+    def nearby_stickynotes(self):
+        """(item ID, sticky note) pairs within interaction range of the character"""
+        char_center = pygame.Rect(self.char_x, self.char_y, self.char_width, self.char_height).center
+        interaction_radius = 130 * self.scale_factor
+        return self.stickynote_index.query_radius(char_center, interaction_radius)
     
     def handle_events(self):
         """Handle all pygame events"""
-        for event in pygame.event.get():
+        for event in self.input.get_events():
+            if frame_profiler.handle_event(event):
+                continue
             if event.type == QUIT:
-                if self.ensure_connection():
-                    try:
-                        self.cursor.execute("""
-                            UPDATE LevelSelection
-                            SET time_remaining = ?
-                            WHERE TP_Number = ? AND LevelID = ?
-                            """, self.time_remaining, self.tp_number, self.level)
-                        self.conn.commit()
-                    except Exception as e:
-                        self.conn.rollback()
-                        print(f"Database error: {e}")
+                self.save_time_remaining()
                 self.close_connection()
                 self.running = False
                 
@@ -865,19 +423,12 @@ class GameLevel:
                 if event.key == K_ESCAPE:
                     # Create and run options menu
                     options = Options(self.screen, self.tp_number, self.level, self.time_remaining)
+                    self.game_clock.pause()  # the timer does not run while the menu is open
                     result = options.run()
+                    self.game_clock.resume()
+                    self.renderer.invalidate()  # the options menu drew over the level
                     if result == 'exit':
-                        if self.ensure_connection():
-                            try:
-                                self.cursor.execute("""
-                                    UPDATE LevelSelection
-                                    SET time_remaining = ?
-                                    WHERE TP_Number = ? AND LevelID = ?
-                                    """, self.time_remaining, self.tp_number, self.level)
-                                self.conn.commit()
-                            except Exception as e:
-                                self.conn.rollback()
-                                print(f"Database error: {e}")
+                        self.save_time_remaining()
                         self.close_connection()
                         self.running = False
                     # If result is 'return', continue the game
@@ -896,28 +447,16 @@ class GameLevel:
                     if self.show_notes:
                         self.show_notes = False
                     elif self.is_completed:
-                        self.conn.autocommit = False
                         try:
-                            self.cursor.execute("""
-                                UPDATE s
-                                SET s.student_answer = '', s.status = 0
-                                FROM Submissions s
-                                JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-                                WHERE s.TP_Number = ? AND q.LevelID = ?
-                            """, self.tp_number, self.level)
-                            self.conn.commit()
-
-                            self.cursor.execute("""
-                                UPDATE LevelSelection
-                                SET is_completed = 0, time_remaining = 600
-                                WHERE TP_Number = ? AND LevelID = ?
-                            """, self.tp_number, self.level)
+                            # submissions and timer are reset in the background (progress_changed follows)
+                            gameplay_journal.record("level_reset", tp_number=self.tp_number, level_id=self.level)
                             self.time_remaining = 600
-                            self.conn.commit()
+                            self.countdown.reset()
+                            # every submission of this level was reset to incorrect
+                            self.session.reset()
+                            self.renderer.invalidate_static()
                         except Exception as e:
-                            self.conn.rollback()
-                            print(f"Database error: {e}")
-                        self.conn.autocommit = True
+                            print(f"Error saving progress: {e}")
                         self.is_completed = False  # to levelSelection
 
                 elif (event.key == K_p and not self.current_question['visible'] and not self.door_unlocked
@@ -931,86 +470,26 @@ class GameLevel:
 
                 elif event.key == K_q and (self.is_completed or self.show_completion or self.show_fail) and not(self.show_notes):
                     if self.is_completed:
-                        self.conn.autocommit = False
-                        try:
-                            self.cursor.execute("""
-                                UPDATE LevelSelection
-                                SET time_remaining = ?
-                                WHERE TP_Number = ? AND LevelID = ?
-                            """, self.time_remaining, self.tp_number, self.level)
-                            self.conn.commit()
-                        except Exception as e:
-                            self.conn.rollback()
-                            print(f"Database error: {e}")
-                        finally:
-                            self.conn.autocommit = True
-                            # Proper cleanup before switching
-                            pygame.quit()
-                            pygame.init()
-                            # Create new display with consistent size
-                            level_selection_screen = pygame.display.set_mode((1024, 768))
-                            levelSelection(level_selection_screen, self.tp_number).run()
-                            self.running = False
+                        self.save_time_remaining()
+                        # Proper cleanup before switching
+                        pygame.quit()
+                        pygame.init()
+                        # Create new display with consistent size
+                        level_selection_screen = pygame.display.set_mode((1024, 768))
+                        levelSelection(level_selection_screen, self.tp_number).run()
+                        self.running = False
                     elif self.show_completion or self.show_fail:
                         if self.show_completion:
-                            self.conn.autocommit = False
                             try:
-                                self.cursor.execute("""
-                                    UPDATE LevelSelection
-                                    SET time_remaining = ?, is_completed = ?
-                                    WHERE TP_Number = ? AND LevelID = ?
-                                """, self.time_remaining, 1, self.tp_number, self.level)
-
-                                level_index = int(self.level[-1]) + 1
-                                next_level = f"LVL00{level_index}"
-
-                                self.cursor.execute("""
-                                    SELECT current_level
-                                    FROM Students
-                                    WHERE TP_Number = ?
-                                """, self.tp_number)
-                                db_level = self.cursor.fetchone()
-
-                                if db_level[0] < level_index:
-                                    if self.level != "LVL005":
-                                        self.cursor.execute("""
-                                            UPDATE Students
-                                            SET Score = Score + ?, current_level = ?
-                                            WHERE TP_Number = ?
-                                        """, self.points, level_index, self.tp_number)
-
-                                        # unlock next level (not necessary for last level LVL005)
-                                        self.cursor.execute("""
-                                            UPDATE LevelSelection
-                                            SET is_locked = 0
-                                            WHERE TP_Number = ? AND LevelID = ?
-                                        """, self.tp_number, next_level)
-                                    else:
-                                        self.cursor.execute("""
-                                            UPDATE Students
-                                            SET Score = Score + ?
-                                            WHERE TP_Number = ?
-                                        """, self.points, self.tp_number)
-
-                                self.conn.commit()
+                                # completion, points and the next level's unlock are applied in the background
+                                gameplay_journal.record("level_completed", tp_number=self.tp_number, level_id=self.level,
+                                                        time_remaining=self.time_remaining, points=self.points)
                             except Exception as e:
-                                self.conn.rollback()
-                                print(f"Database error: {e}")
+                                print(f"Error saving progress: {e}")
 
                         elif self.show_fail:
-                            self.conn.autocommit = False
-                            try:
-                                self.cursor.execute("""
-                                    UPDATE LevelSelection
-                                    SET time_remaining = ?
-                                    WHERE TP_Number = ? AND LevelID = ?
-                                """, self.time_remaining, self.tp_number, self.level)
-                                self.conn.commit()
-                            except Exception as e:
-                                self.conn.rollback()
-                                print(f"Database error: {e}")
+                            self.save_time_remaining()
 
-                        self.conn.autocommit = True
                         # Proper cleanup before switching
                         pygame.quit()
                         pygame.init()
@@ -1114,26 +593,14 @@ class GameLevel:
                     if hasattr(self, 'input_rect') and self.input_rect and self.input_rect.collidepoint(mouse_pos):
                         self.input_active = True
                 else:
-                    # Check if click is on a sticky note
-                    for item_id, item_data in self.item_info.items():
-                        for stickynote in item_data['stickynotes']:
-                            if stickynote['rect'].collidepoint(mouse_pos):
-                                char_center = pygame.Rect(self.char_x, self.char_y, self.char_width, self.char_height).center
-                                stickynote_center = stickynote['rect'].center
-                                distance = ((char_center[0] - stickynote_center[0]) ** 2 + (
-                                        char_center[1] - stickynote_center[1]) ** 2) ** 0.5
-                                interaction_radius = 130 * self.scale_factor
-
-                                if distance <= interaction_radius:
-                                    print(f"Clicked note near {item_data['type']} (ID: {item_id})")
-                                    index = int(item_id[-1]) - 1
-                                    question_id = self.question_ids[index]
-                                    self.handle_stickynote_interaction(question_id)
-                                    break  # Exit the loop once we've found and handled the clicked note
-
-            elif event.type == MOUSEMOTION:
-                # Force cursor update on mouse movement
-                self.render()
+                    # Check if click is on a sticky note within reach
+                    for item_id, stickynote in self.nearby_stickynotes():
+                        if stickynote['rect'].collidepoint(mouse_pos):
+                            print(f"Clicked note near {self.item_info[item_id]['type']} (ID: {item_id})")
+                            index = self.item_slots[item_id]
+                            question_id = self.session.question_ids[index]
+                            self.handle_stickynote_interaction(question_id)
+                            break  # Exit the loop once we've found and handled the clicked note
 
     def draw_timer(self):
         """Render the countdown timer on screen"""
@@ -1141,8 +608,8 @@ class GameLevel:
         seconds = self.time_remaining % 60
         time_text = f"Time: {minutes:02d}:{seconds:02d}"
 
-        timer_font = pygame.font.Font(None, int(28 * self.scale_factor))
-        timer_surface = timer_font.render(time_text, True, (255, 255, 255))
+        timer_font = get_font(None, int(28 * self.scale_factor))
+        timer_surface = render_text(timer_font, time_text, True, (255, 255, 255))
 
         # Position in top-right corner with some padding
         timer_x = self.width - timer_surface.get_width() - 20
@@ -1155,12 +622,13 @@ class GameLevel:
             timer_surface.get_width() + 20,
             timer_surface.get_height() + 10
         )
-        pygame.draw.rect(self.screen, (50, 50, 50, 200), bg_rect)
-        pygame.draw.rect(self.screen, (200, 200, 200), bg_rect, 2)
+        self.renderer.mark(pygame.draw.rect(self.screen, (50, 50, 50, 200), bg_rect))
+        self.renderer.mark(pygame.draw.rect(self.screen, (200, 200, 200), bg_rect, 2))
 
-        self.screen.blit(timer_surface, (timer_x, timer_y))
+        self.renderer.blit(timer_surface, (timer_x, timer_y))
 
-    def display_notes(self):
+    def load_notes(self):
+        """Fetch the notes of this level (once per level)"""
         try:
             self.cursor.execute("""
                 SELECT Title, Content, Hint
@@ -1182,226 +650,148 @@ class GameLevel:
             self.note_content = ""
             self.note_hint = ""
 
-        # notes surface
+    def display_notes(self):
+        """Prepare the notes panel (rebuilt only when the size or notes change)"""
         notes_width = min(self.width - 100, 1200)
         notes_height = 750
-        self.notes_surface = pygame.Surface((notes_width, notes_height), pygame.SRCALPHA)
-        self.notes_surface.fill((50, 50, 50))
+        self.notes_surface = self.notes_panel.get(notes_width, notes_height, self.note_title, self.note_content)
         self.notes_pos = ((self.width - notes_width) // 2, (self.height - notes_height) // 2)
 
-        title_font = pygame.font.Font(None, 32)
-        content_font = pygame.font.Font(None, 24)
-        other_font = pygame.font.Font(None, int(26 * self.scale_factor))
+    def build_notes_surface(self, notes_width, notes_height, note_title, note_content):
+        """Compose the notes panel"""
+        notes_surface = pygame.Surface((notes_width, notes_height), pygame.SRCALPHA)
+        notes_surface.fill((50, 50, 50))
+
+        title_font = get_font(None, 32)
+        content_font = get_font(None, 24)
+        other_font = get_font(None, int(26 * self.scale_factor))
 
         # Render title
-        title_surface = title_font.render(self.note_title, True, (255, 255, 255))
-        self.notes_surface.blit(title_surface, (20, 20))
+        title_surface = render_text(title_font, note_title, True, (255, 255, 255))
+        notes_surface.blit(title_surface, (20, 20))
 
         y_offset = 70
         line_height = 30
 
-        # Split content by newlines
-        paragraphs = self.note_content.split('\\n')
-
-        for paragraph in paragraphs:
-            # Handle empty paragraphs (just add spacing)
-            if not paragraph.strip():
-                y_offset += line_height
-                continue
-
-            # Split long lines into multiple lines if needed
-            words = paragraph.split(' ')
-            current_line = ""
-
-            for word in words:
-                test_line = f"{current_line} {word}".strip()
-                if content_font.size(test_line)[0] <= notes_width - 40:
-                    current_line = test_line
-                else:
-                    # Render the current line
-                    line_surface = content_font.render(current_line, True, (255, 255, 255))
-                    self.notes_surface.blit(line_surface, (20, y_offset))
-                    y_offset += line_height
-                    current_line = word
-
-            # Render the last line of the paragraph
-            if current_line:
-                line_surface = content_font.render(current_line, True, (255, 255, 255))
-                self.notes_surface.blit(line_surface, (20, y_offset))
-                y_offset += line_height
+        # Split content by newlines and wrap long lines
+        for line in wrap_text(content_font, note_content, notes_width - 40, '\\n'):
+            if line:
+                line_surface = content_font.render(line, True, (255, 255, 255))
+                notes_surface.blit(line_surface, (20, y_offset))
+            y_offset += line_height
 
         # "Press [Tab] to close" text
-        skip_text = other_font.render("Press [Enter] to skip", True, (200, 200, 0))
-        self.notes_surface.blit(skip_text, (20, notes_height - 30))
+        skip_text = render_text(other_font, "Press [Enter] to skip", True, (200, 200, 0))
+        notes_surface.blit(skip_text, (20, notes_height - 30))
+        return notes_surface
 
     def is_completed_message(self):
+        """Prepare the 'level already completed' panel"""
         message_width = min(self.width - 70, 600)
         message_height = 150
-        self.completed_surface = pygame.Surface((message_width, message_height), pygame.SRCALPHA)
-        self.completed_surface.fill((50, 50, 50))
+        self.completed_surface = self.completed_panel.get(message_width, message_height)
         self.completed_pos = ((self.width - message_width) // 2, (self.height - message_height) // 2)
 
-        message_font = pygame.font.Font(None, 30)
-        other_font = pygame.font.Font(None, 26)
+    def build_completed_surface(self, message_width, message_height):
+        """Compose the 'level already completed' panel"""
+        completed_surface = pygame.Surface((message_width, message_height), pygame.SRCALPHA)
+        completed_surface.fill((50, 50, 50))
+
+        message_font = get_font(None, 30)
+        other_font = get_font(None, 26)
         y_offset = 20
 
         # render message
-        message_surface = message_font.render("Level already completed. Would you like to reattempt?", True, (255, 255, 255))
+        message_surface = render_text(message_font, "Level already completed. Would you like to reattempt?", True, (255, 255, 255))
         message_x = (message_width - message_surface.get_width()) // 2
-        self.completed_surface.blit(message_surface, (message_x, y_offset))
+        completed_surface.blit(message_surface, (message_x, y_offset))
 
         # "Press [Enter]" text
-        yes_text = other_font.render("Yes (Press [Enter])", True, (200, 200, 0))
+        yes_text = render_text(other_font, "Yes (Press [Enter])", True, (200, 200, 0))
         yes_x = (message_width - yes_text.get_width()) // 2
-        self.completed_surface.blit(yes_text, (yes_x, y_offset + 50))
+        completed_surface.blit(yes_text, (yes_x, y_offset + 50))
 
         # "Press [Q]" text
-        no_text = other_font.render("No (Press [Q])", True, (200, 200, 0))
+        no_text = render_text(other_font, "No (Press [Q])", True, (200, 200, 0))
         no_x = (message_width - no_text.get_width()) // 2
-        self.completed_surface.blit(no_text, (no_x, y_offset + 90))
+        completed_surface.blit(no_text, (no_x, y_offset + 90))
+        return completed_surface
 
     def get_all_passcodes(self):
-        """Retrieve all passcodes from the database"""
-        if not self.ensure_connection():
-            return []
-
-        passcodes = []
-        for id in self.question_ids:
-            try:
-                self.cursor.execute("""
-                    SELECT passcode
-                    FROM QuestionDetails
-                    WHERE QuestionID LIKE ?
-                """, id)
-                result = self.cursor.fetchone()
-                passcodes.append((result, id))
-                print("pass: ", passcodes)
-            except Exception as e:
-                print(f"Error fetching passcodes: {e}")
-                return []
-        return passcodes
+        """(passcode, QuestionID, MapsItemsID) of the questions of this play"""
+        return self.session.passcodes()
 
     def display_hints(self):
-        # hints surface
+        """Prepare the hints panel (rebuilt only when the size or hint changes)"""
         hints_width = min(self.width - 100, 800)
         hints_height = 500
-        self.hints_surface = pygame.Surface((hints_width, hints_height), pygame.SRCALPHA)
-        self.hints_surface.fill((50, 50, 50))
+        self.hints_surface = self.hints_panel.get(hints_width, hints_height, self.note_hint)
         self.hints_pos = ((self.width - hints_width) // 2, (self.height - hints_height) // 2)
 
-        title_font = pygame.font.Font(None, 36)
-        hint_font = pygame.font.Font(None, 26)
-        other_font = pygame.font.Font(None, int(26 * self.scale_factor))
+    def build_hints_surface(self, hints_width, hints_height, note_hint):
+        """Compose the hints panel"""
+        hints_surface = pygame.Surface((hints_width, hints_height), pygame.SRCALPHA)
+        hints_surface.fill((50, 50, 50))
+
+        title_font = get_font(None, 36)
+        hint_font = get_font(None, 26)
+        other_font = get_font(None, int(26 * self.scale_factor))
 
         # render title
-        title_surface = title_font.render("Hints", True, (255, 255, 255))
-        self.hints_surface.blit(title_surface, ((self.hints_surface.get_width() - title_surface.get_width()) // 2, 20))
+        title_surface = render_text(title_font, "Hints", True, (255, 255, 255))
+        hints_surface.blit(title_surface, ((hints_surface.get_width() - title_surface.get_width()) // 2, 20))
 
         y_offset = 70
         line_height = 30
 
-        # split content by newlines
-        paragraphs = self.note_hint.split('\\n')
-
-        for paragraph in paragraphs:
-            if not paragraph.strip():
-                y_offset += line_height
-                continue
-
-            # split long lines if needed
-            words = paragraph.split(' ')
-            current_line = ""
-
-            for word in words:
-                test_line = f"{current_line} {word}".strip()
-                if hint_font.size(test_line)[0] <= hints_width - 40:
-                    current_line = test_line
-                else:
-                    line_surface = hint_font.render(current_line, True, (255, 255, 255))
-                    self.hints_surface.blit(line_surface, (20, y_offset))
-                    y_offset += line_height
-                    current_line = word
-
-            if current_line:
-                line_surface = hint_font.render(current_line, True, (255, 255, 255))
-                self.hints_surface.blit(line_surface, (20, y_offset))
-                y_offset += line_height
+        # split content by newlines and wrap long lines
+        for line in wrap_text(hint_font, note_hint, hints_width - 40, '\\n'):
+            if line:
+                line_surface = hint_font.render(line, True, (255, 255, 255))
+                hints_surface.blit(line_surface, (20, y_offset))
+            y_offset += line_height
 
         # "Press [Tab] to close" text
-        skip_text = other_font.render("Press [Tab] to close", True, (200, 200, 0))
-        self.hints_surface.blit(skip_text, (20, hints_height - 30))
+        skip_text = render_text(other_font, "Press [Tab] to close", True, (200, 200, 0))
+        hints_surface.blit(skip_text, (20, hints_height - 30))
+        return hints_surface
 
     def handle_stickynote_call(self):
         if self.current_question['visible'] or self.current_passcode_input['visible']:
             return
 
         # check distance
-        for item_id, item_data in self.item_info.items():
-            for stickynote in item_data['stickynotes']:
-                char_center = pygame.Rect(self.char_x, self.char_y, self.char_width, self.char_height).center
-                stickynote_center = stickynote['rect'].center
-                distance = ((char_center[0] - stickynote_center[0]) ** 2 + (
-                        char_center[1] - stickynote_center[1]) ** 2) ** 0.5
-                interaction_radius = 130 * self.scale_factor
-
-                if distance <= interaction_radius:
-                    print(f"Clicked note near {item_data['type']} (ID: {item_id})")
-                    index = int(item_id[-1]) - 1
-                    question_id = self.question_ids[index]
-                    self.handle_stickynote_interaction(question_id)
-                    self.is_correct = False
+        for item_id, stickynote in self.nearby_stickynotes():
+            print(f"Clicked note near {self.item_info[item_id]['type']} (ID: {item_id})")
+            index = self.item_slots[item_id]
+            question_id = self.session.question_ids[index]
+            self.handle_stickynote_interaction(question_id)
+            self.is_correct = False
 
     def handle_stickynote_interaction(self, question_id):
         # check if completed submission available
         print(f"\nDebug: Handling sticky note interaction for question_id: {question_id}")
-        try:
-            self.cursor.execute("""
-                        SELECT s.status, q.passcode
-                        FROM QuestionDetails q
-                        LEFT JOIN Submissions s ON q.QuestionID = s.QuestionID AND s.TP_Number = ?
-                        WHERE q.QuestionID = ?
-                    """, self.tp_number, question_id)
-
-            submission = self.cursor.fetchone()
-            print(f"Debug: Submission query result: {submission}")
-            
-            if submission:
-                status = submission[0] if submission[0] is not None else 0
-                passcode = submission[1]
-                print(f"Debug: Status: {status}, Passcode: {passcode}")
-
-                if status == 1:
-                    self.show_passcode(question_id, passcode)
-                    self.passcode_visible = True
-                else:
-                    try:
-                        print("Debug: Fetching question details...")
-                        self.cursor.execute("""
-                                        SELECT Question_text, correct_answer, MapsItemsID
-                                        FROM QuestionDetails
-                                        WHERE QuestionID = ?
-                                    """, question_id)
-
-                        row = self.cursor.fetchone()
-                        print(f"Debug: Question details row: {row}")
-                        
-                        if row:
-                            self.current_question_id = question_id
-                            self.current_question_text = row[0]
-                            self.current_correct_answer = row[1]  # Store the correct answer
-                            self.current_item_id = row[2]  # Store the item ID for answer checking
-                            print(f"Debug: Showing question with text: {self.current_question_text}")
-                            self.show_question(self.current_question_text, self.current_item_id)
-                        else:
-                            print("Debug: No question details found")
-                            self.show_question("This question appears to be blank.", self.current_item_id)
-                    except Exception as e:
-                        print(f"Error fetching note content: {e}")
-                        self.show_question("You found a question!")
+        question = self.session.question(question_id)
+        if not question:
+            print("Debug: No question details found")
+            return
+
+        # status from memory: the latest answer may still be on its way to the database
+        status = self.session.get_status(question_id)
+        print(f"Debug: Status: {status}, Passcode: {question['passcode']}")
+
+        if status == 1:
+            self.show_passcode(question_id, question['passcode'])
+            self.passcode_visible = True
+        else:
+            self.current_question_id = question_id
+            self.current_question_text = question['text']
+            self.current_correct_answer = question['correct_answer']  # Store the correct answer
+            self.current_item_id = question['maps_items_id']  # Store the item ID for answer checking
+            print(f"Debug: Showing question with text: {self.current_question_text}")
+            self.show_question(self.current_question_text or "This question appears to be blank.",
+                               self.current_item_id)
 
-        except Exception as e:
-            print(f"Error checking submissions: {e}")
-            
     def show_question(self, text, item_id=None):
         """display question and input box"""
         print(f"\nDebug: Showing question with text: {text}")
@@ -1411,7 +801,7 @@ class GameLevel:
         question_surface.fill((50, 50, 50, 220))  # question background
 
         # render text
-        ques_font = pygame.font.Font(None, int(32 * self.scale_factor))
+        ques_font = get_font(None, int(32 * self.scale_factor))
         words = text.split(' ')
         lines = []
         current_line = ""
@@ -1430,13 +820,13 @@ class GameLevel:
         # render lines
         y_offset = 20
         for line in lines:
-            text_surf = ques_font.render(line, True, (255, 255, 255))
+            text_surf = render_text(ques_font, line, True, (255, 255, 255))
             question_surface.blit(text_surf, (20, y_offset))
             y_offset += 25
 
         # "Press [Tab] to close" text
-        other_font = pygame.font.Font(None, int(26 * self.scale_factor))
-        close_text = other_font.render("Press [Tab] to close", True, (200, 200, 0))
+        other_font = get_font(None, int(26 * self.scale_factor))
+        close_text = render_text(other_font, "Press [Tab] to close", True, (200, 200, 0))
         question_surface.blit(close_text, (20, 160))
 
         # input box
@@ -1461,7 +851,7 @@ class GameLevel:
         pygame.draw.rect(question_surface, border_colour, (input_x, input_y, input_width, input_height), 2)
 
         # submit instruction
-        submit_text = other_font.render("Press [Enter] to submit", True, (200, 200, 0))
+        submit_text = render_text(other_font, "Press [Enter] to submit", True, (200, 200, 0))
         question_surface.blit(submit_text, (20, 135))
 
         # Initialize input properties
@@ -1494,24 +884,14 @@ class GameLevel:
             return  # No active question
 
         print(f"Submitted: {self.input_text}")
-        index = int(self.current_item_id[-1]) - 1
-        question_id = self.question_ids[index]
+        index = self.item_slots[self.current_item_id]
+        question_id = self.session.question_ids[index]
 
         try:
-            self.cursor.execute("""
-                SELECT correct_answer, passcode
-                FROM QuestionDetails
-                WHERE MapsItemsID = ? AND QuestionID = ?
-                """, self.current_item_id, question_id)
-
-            self.is_correct = False
-            row = self.cursor.fetchone()
-            if row:
-                correct_answer = row[0]
-                passcode = row[1]
-                user_answer = self.input_text.strip()
-                self.is_correct = (user_answer == correct_answer)
-
+            # answers were loaded with the level, checking one never waits on the database
+            result = self.session.check_answer(question_id, self.current_item_id, self.input_text.strip())
+            self.is_correct = bool(result)
+            if result is not None:
                 if self.is_correct:
                     print("Correct answer")
                     self.show_feedback(f"Correct! Reopen this note to get your passcode.", (0, 255, 0))
@@ -1522,33 +902,13 @@ class GameLevel:
                 print("No correct answer found in database")
                 self.show_feedback("Error validating answer.", (255, 165, 0))  # Orange for error
 
-            # get SubmissionID
-            self.cursor.execute("""
-                SELECT MAX(CAST(SUBSTRING(SubmissionID, 4, LEN(SubmissionID)) AS INT))
-                FROM Submissions
-                WHERE SubmissionID LIKE 'SBM%'
-                """)
-            max_id = self.cursor.fetchone()[0] or 0
-            next_id = f"SBM{max_id + 1:05d}"
-
-            # record submission in database
-            self.cursor.execute("""
-                MERGE INTO Submissions AS target
-                USING (VALUES (?, ?, ?, ?, ?)) AS source (SubmissionID, QuestionID, TP_Number, student_answer, status)
-                ON target.TP_Number = source.TP_Number AND target.QuestionID = source.QuestionID
-                WHEN MATCHED THEN
-                    UPDATE SET status = source.status, student_answer = CAST(source.student_answer AS varchar(max))
-                WHEN NOT MATCHED THEN
-                    INSERT (SubmissionID, QuestionID, TP_Number, student_answer, status)
-                    VALUES (source.SubmissionID, source.QuestionID, source.TP_Number, CAST(source.student_answer AS varchar(max)), source.status);
-            """,
-                                next_id,
-                                self.current_question_id,
-                                self.tp_number,
-                                self.input_text,
-                                1 if self.is_correct else 0)
-
-            self.conn.commit()
+            # record submission (written to the database in the background)
+            status = 1 if self.is_correct else 0
+            gameplay_journal.record("submission", tp_number=self.tp_number, level_id=self.level,
+                                    question_id=self.current_question_id, answer=self.input_text, status=status)
+
+            if self.session.set_status(self.current_question_id, status):
+                self.renderer.invalidate_static()  # item collected or back on the map
 
         except Exception as e:
             print(f"Error checking answer: {e}")
@@ -1558,6 +918,14 @@ class GameLevel:
             # Reset input
             self.input_text = ""
 
+    def save_time_remaining(self):
+        """Journal the timer of this level, the database is updated in the background"""
+        try:
+            gameplay_journal.record("time_saved", tp_number=self.tp_number, level_id=self.level,
+                                    time_remaining=self.time_remaining)
+        except Exception as e:
+            print(f"Error saving time remaining: {e}")
+
     def show_feedback(self, message, colour):
         """Store feedback message to be displayed in render()"""
         self.feedback_message = message
@@ -1571,15 +939,9 @@ class GameLevel:
         item_type = "Item"
 
         # Get MapsItemsID based on QuestionID
-        self.cursor.execute("""
-            SELECT MapsItemsID
-            FROM QuestionDetails
-            WHERE QuestionID = ?
-        """, question_id)
-
-        item_id_row = self.cursor.fetchone()
-        if item_id_row:
-            item_id = item_id_row[0]  # Extract the string value from the row
+        question = self.session.question(question_id)
+        if question:
+            item_id = question['maps_items_id']
 
             if item_id and item_id in self.item_info:
                 print(f"Item info for {item_id}: {self.item_info[item_id]}")
@@ -1597,8 +959,8 @@ class GameLevel:
         passcode_surface.fill((50, 50, 50, 220))
 
         # render passcode
-        p_font = pygame.font.Font(None, 26)
-        t_font = pygame.font.Font(None, 30)
+        p_font = get_font(None, 26)
+        t_font = get_font(None, 30)
 
         # Draw item image if available (scaled down)
         if item_img:
@@ -1612,23 +974,23 @@ class GameLevel:
             img_x = (passcode_width - img_width) // 2
             passcode_surface.blit(scaled_img, (img_x, 10))
 
-            passcode_text = p_font.render(f"Passcode: {passcode}", True, (0, 255, 0))
+            passcode_text = render_text(p_font, f"Passcode: {passcode}", True, (0, 255, 0))
             passcode_surface.blit(passcode_text,
                                   ((passcode_width - passcode_text.get_width()) // 2, 100))
 
         else:
-            item_text = t_font.render(f"Item: {item_type}", True, (255, 255, 255))
+            item_text = render_text(t_font, f"Item: {item_type}", True, (255, 255, 255))
             passcode_surface.blit(item_text,
                                   ((passcode_width - item_text.get_width()) // 2, 20))
 
-            passcode_text = p_font.render(f"Passcode: {passcode}", True, (0, 255, 0))
+            passcode_text = render_text(p_font, f"Passcode: {passcode}", True, (0, 255, 0))
             passcode_surface.blit(passcode_text,
                                   ((passcode_width - passcode_text.get_width()) // 2, 70))
 
 
         # "Press [Tab] to close" text
-        other_font = pygame.font.Font(None, int(26 * self.scale_factor))
-        close_text = other_font.render("Press [Tab] to close, then press [P] to input passcode", True, (200, 200, 0))
+        other_font = get_font(None, int(26 * self.scale_factor))
+        close_text = render_text(other_font, "Press [Tab] to close, then press [P] to input passcode", True, (200, 200, 0))
         passcode_surface.blit(close_text, ((passcode_width - close_text.get_width()) // 2, passcode_height - 35))
 
         self.current_passcode_input = {
@@ -1654,12 +1016,12 @@ class GameLevel:
         passcode_surface = pygame.Surface((surface_width, surface_height), pygame.SRCALPHA)
         passcode_surface.fill((50, 50, 50, 220))
 
-        title_font = pygame.font.Font(None, 34)
-        input_font = pygame.font.Font(None, 26)
-        other_font = pygame.font.Font(None, int(26 * self.scale_factor))
+        title_font = get_font(None, 34)
+        input_font = get_font(None, 26)
+        other_font = get_font(None, int(26 * self.scale_factor))
 
         # Title
-        title_text = title_font.render("Enter All Passcodes:", True, (255, 255, 255))
+        title_text = render_text(title_font, "Enter All Passcodes:", True, (255, 255, 255))
         title_x = (surface_width - title_text.get_width()) // 2
         passcode_surface.blit(title_text, (title_x, 30))
 
@@ -1676,15 +1038,7 @@ class GameLevel:
         y_pos = 120
         input_y_pos = y_pos + item_size + 30
 
-        for i, (passcode, question_id) in enumerate(passcodes):
-            # Get the MapsItemsID for this question
-            self.cursor.execute("""
-                SELECT MapsItemsID 
-                FROM QuestionDetails 
-                WHERE QuestionID = ?
-            """, question_id)
-            maps_items_id = self.cursor.fetchone()[0]
-
+        for i, (passcode, question_id, maps_items_id) in enumerate(passcodes):
             # Find the item in our item_info
             if maps_items_id in self.item_info:
                 item_data = self.item_info[maps_items_id]
@@ -1734,11 +1088,11 @@ class GameLevel:
             })
 
         # "Press [Enter] to submit" text
-        submit_text = other_font.render("Press [Enter] to submit", True, (200, 200, 0))
+        submit_text = render_text(other_font, "Press [Enter] to submit", True, (200, 200, 0))
         passcode_surface.blit(submit_text, (20, surface_height - 70))
 
         # "Press [Tab] to close" text
-        close_text = other_font.render("Press [Tab] to close", True, (200, 200, 0))
+        close_text = render_text(other_font, "Press [Tab] to close", True, (200, 200, 0))
         passcode_surface.blit(close_text, (20, surface_height - 40))
 
         # Store as current passcode input
@@ -1764,7 +1118,7 @@ class GameLevel:
             else:
                 try:
                     input_value = int(input_box['text'])
-                    correct_passcode = int(input_box['correct_passcode'][0])
+                    correct_passcode = int(input_box['correct_passcode'])
                     passcode_count += 1
                     if input_value != correct_passcode:
                         self.show_feedback("Not all passwords are correct. Please try again.", (255, 0, 0))
@@ -1794,16 +1148,16 @@ class GameLevel:
         message_surface = pygame.Surface((surface_width, surface_height), pygame.SRCALPHA)
         message_surface.fill((50, 50, 50, 220))
 
-        title_font = pygame.font.Font(None, 38)
-        other_font = pygame.font.Font(None, int(26 * self.scale_factor))
+        title_font = get_font(None, 38)
+        other_font = get_font(None, int(26 * self.scale_factor))
 
         # Title
-        title_text = title_font.render("Time's up! Game over.", True, (255, 0, 0))
+        title_text = render_text(title_font, "Time's up! Game over.", True, (255, 0, 0))
         title_x = (surface_width - title_text.get_width()) // 2
         message_surface.blit(title_text, (title_x, 35))
 
         # "Press [Q] to return to Level Selection" text
-        return_text = other_font.render("Press [Q] to return to Level Selection", True, (200, 200, 0))
+        return_text = render_text(other_font, "Press [Q] to return to Level Selection", True, (200, 200, 0))
         message_surface.blit(return_text, (20, surface_height - 30))
 
         self.fail_message = {
@@ -1819,16 +1173,16 @@ class GameLevel:
         message_surface = pygame.Surface((surface_width, surface_height), pygame.SRCALPHA)
         message_surface.fill((50, 50, 50, 220))
 
-        title_font = pygame.font.Font(None, 38)
-        other_font = pygame.font.Font(None, int(26 * self.scale_factor))
+        title_font = get_font(None, 38)
+        other_font = get_font(None, int(26 * self.scale_factor))
 
         # Title
-        title_text = title_font.render("Level Completed!", True, (0, 255, 0))
+        title_text = render_text(title_font, "Level Completed!", True, (0, 255, 0))
         title_x = (surface_width - title_text.get_width()) // 2
         message_surface.blit(title_text, (title_x, 25))
 
         # "Press [Q] to return to Level Selection" text
-        return_text = other_font.render("Press [Q] to return to Level Selection", True, (200, 200, 0))
+        return_text = render_text(other_font, "Press [Q] to return to Level Selection", True, (200, 200, 0))
         message_surface.blit(return_text, (20, surface_height - 30))
 
         self.completion_message = {
@@ -1837,40 +1191,42 @@ class GameLevel:
             'visible': True
         }
 
-    def update(self):
-        """Update game state"""
-        # Update timer once notes close
-        if not self.show_notes and not self.is_completed:
-            current_time = pygame.time.get_ticks()
-            elapsed_seconds = (current_time - self.start_time) // 1000
+    def update(self, steps=1):
+        """Update game state by the fixed simulation steps due this frame"""
+        keys = self.input.get_pressed()
+        for _ in range(steps):
+            self.simulate_step(keys, STEP)
+
+    def simulate_step(self, keys, dt):
+        """Advance the game by dt seconds"""
+        self.prev_char_pos = (self.char_x, self.char_y)
 
-            # Only decrement if a full second has passed
-            if elapsed_seconds > self.last_second and not self.door_unlocked:
-                self.last_second = elapsed_seconds
+        # Update timer once notes close (simulated time only, so it stops while paused)
+        if not self.show_notes and not self.is_completed and not self.door_unlocked:
+            for _ in range(self.countdown.advance(dt)):
                 if self.time_remaining > 0:
                     self.time_remaining -= 1
-                else:
+                elif not self.show_fail:
                     # Time's up - handle game over
                     self.time_remaining = 0
                     self.show_fail = True
                     self.show_fail_message()
 
-        keys = pygame.key.get_pressed()
-
         # Only allow movement when no UI elements are visible
         if (not self.current_question['visible'] and not self.current_passcode_input['visible']
                 and not self.show_completion and not self.show_fail):
             new_x, new_y = self.char_x, self.char_y
+            distance = self.speed * dt
 
             # Calculate potential new positions first
             if keys[K_w] or keys[K_UP]:
-                new_y -= self.speed
+                new_y -= distance
             if keys[K_s] or keys[K_DOWN]:
-                new_y += self.speed
+                new_y += distance
             if keys[K_a] or keys[K_LEFT]:
-                new_x -= self.speed
+                new_x -= distance
             if keys[K_d] or keys[K_RIGHT]:
-                new_x += self.speed
+                new_x += distance
 
             # Check collision before actually moving
             if not self.check_collision(new_x, new_y):
@@ -1882,7 +1238,7 @@ class GameLevel:
 
         # Door interactions
         char_rect = pygame.Rect(self.char_x, self.char_y, self.char_width, self.char_height)
-        current_time = pygame.time.get_ticks()
+        current_time = self.game_clock.time
         self.active_door = None
 
         for door in self.doors:
@@ -1894,33 +1250,26 @@ class GameLevel:
                 self.active_door = door
                 if keys[K_f] and (current_time - self.last_tel_time > self.tel_cooldown):
                     self.char_x, self.char_y = door["destination"]
+                    self.prev_char_pos = (self.char_x, self.char_y)  # jump, don't slide there
                     self.last_tel_time = current_time
                 break
         else:
             self.active_door = None
 
-    def render(self):
-        # Add protection at start of render
-        if not hasattr(self, 'items') or not self.items:
-            print("ERROR: Items list is empty or missing!")
-            # Fallback rendering or early return
-            self.screen.fill((255, 0, 0))  # Red error screen
-            pygame.display.flip()
-            return
-
-        """Render all game objects"""
-        self.screen.blit(self.background, (0, 0))
+    def build_static_layer(self):
+        """Compose the background with the sticky notes and the items that are not collected yet"""
+        static_layer = self.background.copy()
 
         # Pre-calculate sticky note dimensions
-        sticky_note_width = int(35 * self.scale_factor)
-        sticky_note_height = int(34 * self.scale_factor)
+        sticky_note_width = self.stickynote_size[0]
+        sticky_note_height = self.stickynote_size[1]
 
         try:
             # First draw all sticky notes
             for item, pos in zip(self.items, self.item_positions):
                 try:
                     if item.get_width() == sticky_note_width and item.get_height() == sticky_note_height:
-                        self.screen.blit(item, pos)
+                        static_layer.blit(item, pos)
                 except Exception as e:
                     print(f"Error drawing sticky note at {pos}: {e}")
 
@@ -1939,53 +1288,65 @@ class GameLevel:
                         item_rect = item_data.get('rect')
                         if item_rect and item_rect.x == pos[0] and item_rect.y == pos[1]:
                             item_id = potential_id
-                            index = int(item_id[-1]) - 1
-                            question_id = self.question_ids[index]
+                            index = self.item_slots[item_id]
+                            question_id = self.session.question_ids[index]
                             break
 
                     if not item_id:
                         print(f"No matching item ID found for item at {pos}")
-                        self.screen.blit(item, pos)
+                        static_layer.blit(item, pos)
                         continue
 
-                    # Check submission status
-                    self.cursor.execute('''
-                                    SELECT s.status
-                                    FROM Submissions s
-                                    INNER JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-                                    WHERE s.TP_Number = ? AND q.MapsItemsID = ? AND s.QuestionID = ?
-                                ''', (self.tp_number, item_id, question_id))
-
-                    submission = self.cursor.fetchone()
+                    # Check submission status (kept in the level session)
+                    submission = self.session.status.get(question_id)
 
                     # Draw if no submission or submission incorrect
-                    if submission is None or submission[0] == 0:
-                        self.screen.blit(item, pos)
+                    if submission is None or submission == 0:
+                        static_layer.blit(item, pos)
 
                 except Exception as e:
                     print(f"Error processing item at {pos}: {e}")
                     # Fallback: draw the item anyway
-                    self.screen.blit(item, pos)
+                    static_layer.blit(item, pos)
 
         except Exception as e:
             print(f"Critical error in render loop: {e}")
             # Fallback: draw all items without checks
             for item, pos in zip(self.items, self.item_positions):
-                self.screen.blit(item, pos)
+                static_layer.blit(item, pos)
+
+        return static_layer
+
+    def render(self):
+        # Add protection at start of render
+        if not hasattr(self, 'items') or not self.items:
+            print("ERROR: Items list is empty or missing!")
+            # Fallback rendering or early return
+            self.screen.fill((255, 0, 0))  # Red error screen
+            pygame.display.flip()
+            return
+
+        """Render all game objects"""
+        # restore last frame's dirty regions from the static layer (background + items)
+        self.renderer.begin_frame(self.build_static_layer)
+        frame_profiler.lap("render.static")
 
         # Draw character
-        self.screen.blit(self.character, (self.char_x, self.char_y))
+        # drawn between the last two simulated positions, so movement stays smooth at any frame rate
+        char_pos = lerp(self.prev_char_pos, (self.char_x, self.char_y), self.game_clock.alpha)
+        self.renderer.blit(self.character, char_pos)
+        frame_profiler.lap("render.character")
 
         # Draw notes and NPC
         if self.show_notes:
             self.display_notes()
-            self.screen.blit(self.notes_surface, (self.notes_pos))
-            self.screen.blit(self.npc, (self.npc_x, self.npc_y))
+            self.renderer.blit(self.notes_surface, (self.notes_pos))
+            self.renderer.blit(self.npc, (self.npc_x, self.npc_y))
 
         # Draw completed message if available
         if self.is_completed and not self.show_notes:
             self.is_completed_message()
-            self.screen.blit(self.completed_surface, (self.completed_pos))
+            self.renderer.blit(self.completed_surface, (self.completed_pos))
 
         # Draw door instructions if available
         if self.active_door:
@@ -1994,28 +1355,20 @@ class GameLevel:
             text_y = door["door_area"].y
             circle_radius = int(20 * self.scale_factor)
             circle_center = (text_x + circle_radius // 2, text_y + circle_radius // 2)
-            pygame.draw.circle(self.screen, "Black", circle_center, circle_radius + 2)
-            pygame.draw.circle(self.screen, "White", circle_center, circle_radius)
-            self.screen.blit(self.hover_text, (text_x, text_y))
+            self.renderer.mark(pygame.draw.circle(self.screen, "Black", circle_center, circle_radius + 2))
+            self.renderer.mark(pygame.draw.circle(self.screen, "White", circle_center, circle_radius))
+            self.renderer.blit(self.hover_text, (text_x, text_y))
 
         # Draw sticky note instructions if available
-        for item_id, item_data in self.item_info.items():
-            for stickynote in item_data['stickynotes']:
-                char_center = pygame.Rect(self.char_x, self.char_y, self.char_width, self.char_height).center
-                stickynote_center = stickynote['rect'].center
-                distance = ((char_center[0] - stickynote_center[0]) ** 2 + (
-                        char_center[1] - stickynote_center[1]) ** 2) ** 0.5
-                interaction_radius = 130 * self.scale_factor
-
-                if distance <= interaction_radius:
-                    note_x = stickynote['rect'].x - 30
-                    note_y = stickynote['rect'].y - 5
-                    n_circle_radius = int(20 * self.scale_factor)
-                    n_circle_center = (note_x + n_circle_radius // 2, note_y + n_circle_radius // 2)
-                    pygame.draw.circle(self.screen, "Black", n_circle_center, n_circle_radius + 2)
-                    pygame.draw.circle(self.screen, "White", n_circle_center, n_circle_radius)
-                    note_text = self.font.render("E", True, 'Black')
-                    self.screen.blit(note_text, (note_x, note_y))
+        for item_id, stickynote in self.nearby_stickynotes():
+            note_x = stickynote['rect'].x - 30
+            note_y = stickynote['rect'].y - 5
+            n_circle_radius = int(20 * self.scale_factor)
+            n_circle_center = (note_x + n_circle_radius // 2, note_y + n_circle_radius // 2)
+            self.renderer.mark(pygame.draw.circle(self.screen, "Black", n_circle_center, n_circle_radius + 2))
+            self.renderer.mark(pygame.draw.circle(self.screen, "White", n_circle_center, n_circle_radius))
+            note_text = render_text(self.font, "E", True, 'Black')
+            self.renderer.blit(note_text, (note_x, note_y))
 
         # Draw "!" above closed door
         if self.door_message_visible and self.door_unlocked:
@@ -2026,41 +1379,43 @@ class GameLevel:
                 self.door_message_radius * 2
             )
 
-            pygame.draw.circle(self.screen, (255, 255, 255),
+            self.renderer.mark(pygame.draw.circle(self.screen, (255, 255, 255),
                                self.door_message_position,
-                               self.door_message_radius)
-            pygame.draw.circle(self.screen, 'black',
+                               self.door_message_radius))
+            self.renderer.mark(pygame.draw.circle(self.screen, 'black',
                                self.door_message_position,
-                               self.door_message_radius, 2)
+                               self.door_message_radius, 2))
             text_rect = self.door_message_text_surface.get_rect(center=self.door_message_position)
-            self.screen.blit(self.door_message_text_surface, text_rect)
+            self.renderer.blit(self.door_message_text_surface, text_rect)
 
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = self.input.get_mouse_pos()
             if exclamation_rect.collidepoint(mouse_pos):
-                pygame.mouse.set_cursor(self.hover_cursor)
+                self.input.set_cursor(self.hover_cursor)
 
         # Draw "?" button for notes
         if not self.show_notes and not self.show_fail and not self.show_completion:
-            pygame.draw.circle(self.screen, (255, 255, 255),
+            self.renderer.mark(pygame.draw.circle(self.screen, (255, 255, 255),
                                (self.width - 30, 65),
-                               15)
-            pygame.draw.circle(self.screen, 'black',
+                               15))
+            self.renderer.mark(pygame.draw.circle(self.screen, 'black',
                                (self.width - 30, 65),
-                               15, 2)
+                               15, 2))
 
-            hint_button_text_font = pygame.font.Font(None, 28)
-            hint_button_text_surface = hint_button_text_font.render("?", True, 'black')
+            hint_button_text_font = get_font(None, 28)
+            hint_button_text_surface = render_text(hint_button_text_font, "?", True, 'black')
             self.hint_button_position = (self.width - 30, 65)
             self.hint_text_rect = hint_button_text_surface.get_rect(center=self.hint_button_position)
-            self.screen.blit(hint_button_text_surface, self.hint_text_rect)
+            self.renderer.blit(hint_button_text_surface, self.hint_text_rect)
 
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = self.input.get_mouse_pos()
             if self.hint_text_rect.collidepoint(mouse_pos):
-                pygame.mouse.set_cursor(self.hover_cursor)
+                self.input.set_cursor(self.hover_cursor)
+
+        frame_profiler.lap("render.prompts")
 
         # Draw question if available
         if hasattr(self, 'current_question') and self.current_question['visible']:
-            self.screen.blit(self.current_question['surface'], self.current_question['position'])
+            self.renderer.blit(self.current_question['surface'], self.current_question['position'])
 
             # Only render input if input_properties exists and isn't None
             if (hasattr(self, 'current_question') and 'input_properties' in self.current_question and
@@ -2071,21 +1426,21 @@ class GameLevel:
 
                 # Render the input text
                 if hasattr(self, 'input_text'):
-                    passcode_text_surface = self.input_font.render(self.input_text, True, (255, 255, 255))
-                    self.screen.blit(passcode_text_surface, (input_screen_x + 10, input_screen_y + 10))
+                    passcode_text_surface = render_text(self.input_font, self.input_text, True, (255, 255, 255))
+                    self.renderer.blit(passcode_text_surface, (input_screen_x + 10, input_screen_y + 10))
 
                     # Render cursor if active and blinking
                     if hasattr(self, 'input_active') and self.input_active and int(
                             pygame.time.get_ticks() / 600) % 2 == 0 and not self.is_correct:
                         cursor_x = input_screen_x + 10 + passcode_text_surface.get_width()
-                        pygame.draw.line(self.screen, (255, 255, 255),
+                        self.renderer.mark(pygame.draw.line(self.screen, (255, 255, 255),
                                          (cursor_x, input_screen_y + 8),
-                                         (cursor_x, input_screen_y + input_props['height'] - 8), 2)
+                                         (cursor_x, input_screen_y + input_props['height'] - 8), 2))
 
         # Draw feedback if available
         if self.feedback_message:
-            feedback_font = pygame.font.Font(None, 24)
-            feedback_text = feedback_font.render(self.feedback_message, True, self.feedback_color)
+            feedback_font = get_font(None, 24)
+            feedback_text = render_text(feedback_font, self.feedback_message, True, self.feedback_color)
 
             # Calculate dimensions with padding
             padding = 8
@@ -2108,12 +1463,12 @@ class GameLevel:
             else:
                 surface_rect = feedback_surface.get_rect(center=(self.width // 2, self.height // 2 - 130))
 
-            self.screen.blit(feedback_surface, surface_rect)
+            self.renderer.blit(feedback_surface, surface_rect)
 
         # Draw passcode input screen if visible
         if self.current_passcode_input['visible']:
             # Draw the main passcode input surface
-            self.screen.blit(self.current_passcode_input['surface'], self.current_passcode_input['position'])
+            self.renderer.blit(self.current_passcode_input['surface'], self.current_passcode_input['position'])
 
             if not self.passcode_visible:
                 # Draw each passcode input box
@@ -2126,28 +1481,30 @@ class GameLevel:
 
                     # Draw the input box border
                     border_color = (0, 255, 0) if input_box['active'] else (200, 200, 200)
-                    pygame.draw.rect(self.screen, border_color,
-                                     (box_x, box_y, box_width, box_height), 2)
+                    self.renderer.mark(pygame.draw.rect(self.screen, border_color,
+                                     (box_x, box_y, box_width, box_height), 2))
 
                     # Draw the entered text (if any)
                     if input_box['text']:
-                        text_surface = self.input_font.render(input_box['text'], True, (255, 255, 255))
+                        text_surface = render_text(self.input_font, input_box['text'], True, (255, 255, 255))
                         text_x = box_x + (box_width - text_surface.get_width()) // 2
                         text_y = box_y + (box_height - text_surface.get_height()) // 2
-                        self.screen.blit(text_surface, (text_x, text_y))
+                        self.renderer.blit(text_surface, (text_x, text_y))
 
                     # Draw blinking cursor if active
                     if input_box['active'] and int(pygame.time.get_ticks() / 500) % 2 == 0:
                         cursor_x = box_x + box_width // 2
-                        pygame.draw.line(self.screen, (255, 255, 255),
+                        self.renderer.mark(pygame.draw.line(self.screen, (255, 255, 255),
                                          (cursor_x, box_y + 5),
-                                         (cursor_x, box_y + box_height - 5), 2)
+                                         (cursor_x, box_y + box_height - 5), 2))
 
         # draw hints surface
         if self.show_hints:
             self.display_hints()
             surf_pos = ((self.width - self.hints_surface.get_width()) // 2, (self.height - self.hints_surface.get_height()) // 2)
-            self.screen.blit(self.hints_surface, surf_pos)
+            self.renderer.blit(self.hints_surface, surf_pos)
+
+        frame_profiler.lap("render.panels")
 
         # Draw timer (unless completion message showing)
         if not self.show_completion:
@@ -2156,7 +1513,7 @@ class GameLevel:
         # Draw completion message if available
         if self.show_completion:
             # Draw the completion message surface
-            self.screen.blit(self.completion_message['surface'], self.completion_message['position'])
+            self.renderer.blit(self.completion_message['surface'], self.completion_message['position'])
 
             # Draw the time remaining in the completion message
             minutes = self.time_remaining // 60
@@ -2164,15 +1521,15 @@ class GameLevel:
             time_text = f"Time Remaining: {minutes:02d}:{seconds:02d}"
 
             # Calculate position relative to the completion message surface
-            time_font = pygame.font.Font(None, 28)
-            time_surface = time_font.render(time_text, True, (255, 255, 255))
+            time_font = get_font(None, 28)
+            time_surface = render_text(time_font, time_text, True, (255, 255, 255))
 
             # Position the time text below the "Level Completed" title
             time_x = self.completion_message['position'][0] + \
                      (self.completion_message['surface'].get_width() - time_surface.get_width()) // 2
             time_y = self.completion_message['position'][1] + 80
 
-            self.screen.blit(time_surface, (time_x, time_y))
+            self.renderer.blit(time_surface, (time_x, time_y))
 
             # Draw points earned
             if self.time_remaining and self.time_remaining > 0:
@@ -2181,19 +1538,21 @@ class GameLevel:
                 self.points = 50
 
             points_text = f"Points Earned: {int(self.points)}"
-            points_surface = time_font.render(points_text, True, (255, 255, 255))
+            points_surface = render_text(time_font, points_text, True, (255, 255, 255))
             points_x = self.completion_message['position'][0] + \
                        (self.completion_message['surface'].get_width() - points_surface.get_width()) // 2
             points_y = time_y + 40
 
-            self.screen.blit(points_surface, (points_x, points_y))
+            self.renderer.blit(points_surface, (points_x, points_y))
 
         # Draw "Time's up" message if available
         if self.show_fail:
-            self.screen.blit(self.fail_message['surface'], self.fail_message['position'])
+            self.renderer.blit(self.fail_message['surface'], self.fail_message['position'])
+
+        frame_profiler.lap("render.messages")
 
         # Check for hover states
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.input.get_mouse_pos()
         cursor = self.default_cursor
 
         # Initialize input_rect if it doesn't exist
@@ -2231,17 +1590,30 @@ class GameLevel:
                         cursor = self.hover_cursor
 
         # Set the cursor
-        pygame.mouse.set_cursor(cursor)
-        pygame.display.flip()
+        self.input.set_cursor(cursor)
+        overlay_rect = frame_profiler.draw_overlay(self.screen)  # F3
+        if overlay_rect:
+            self.renderer.mark(overlay_rect)
+        frame_profiler.lap("render.cursor")
+        self.renderer.end_frame()
+        frame_profiler.lap("flip")
+
+    def frame(self):
+        """One pass of the game loop"""
+        steps = self.game_clock.tick()  # waits for the frame-rate cap
+        frame_profiler.begin_frame("GameLevel")
+        self.handle_events()
+        frame_profiler.lap("events")
+        self.update(steps)
+        frame_profiler.lap("update")
+        self.render()
+        frame_profiler.end_frame()
 
     def run(self):
         """Main game loop"""
         try:
             while self.running:
-                self.handle_events()
-                self.update()
-                self.render()
-                self.clock.tick(60)
+                self.frame()
         
         except Exception as e:
             print(f"Error in game loop: {e}")
@@ -2269,5 +1641,7 @@ class GameLevel:
                     self.cursor.close()
                 except:
                     pass
+            if self.record_path:
+                self.input.save(self.record_path)
             pygame.quit()
             sys.exit()
\ No newline at end of file
@@ -0,0 +1,257 @@
+import os
+import sys
+
+# No window: SDL draws into memory, so the benchmark also runs on a build server
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from db_backend import SQLITE_PATH, SqliteBackend, set_backend
+from game_clock import StepClock
+from game_input import ScriptedInput
+
+
+# Replays a scripted play through of every level on a copy of the local SQLite
+# stand-in database (python db_backend.py copy) and reports, per level:
+#   load     time to construct GameLevel (queries, assets, first layout)
+#   frame    p50/p95/p99 time of handle_events + update + render
+#   db       SQL statements run by the game thread per frame (mean / max)
+#   alloc    Python memory allocated within a frame, peak above its start (KiB, p50/p95),
+#            measured in a second pass because tracemalloc slows the frames down.
+#            Surface pixels are allocated by SDL and are not included.
+# Usage:
+#   python gameplay_benchmark.py [--levels 1 3] [--frames 600] [--script walk.json]
+#                                [--json results.json] [--baseline results.json]
+# Record a script by playing with CAPSTONES_RECORD_INPUT=walk.json set.
+LEVELS = (1, 2, 3, 4, 5)
+DEFAULT_FRAMES = 600  # ten seconds of simulated play per level
+DEFAULT_TOLERANCE = 0.2  # a p95 frame time 20% above the baseline is a regression
+
+
+class CountingSqliteBackend(SqliteBackend):
+    """SQLite backend that counts the statements run on the game thread and in the background"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.statements = 0
+        self.background_statements = 0
+        self._main_thread = threading.main_thread()
+
+    def _open(self):
+        conn = super()._open()
+        conn.set_trace_callback(self._count)
+        return conn
+
+    def _count(self, sql):
+        if threading.current_thread() is self._main_thread:
+            self.statements += 1
+        else:
+            self.background_statements += 1  # gameplay journal worker
+
+
+def _key(event_type, name):
+    return {"type": event_type, "key": name}
+
+
+def _hold(name, frames):
+    return [[_key("KEYDOWN", name)], {"wait": frames}, [_key("KEYUP", name)]]
+
+
+def _press(name, wait=10):
+    return [[_key("KEYDOWN", name)], [_key("KEYUP", name)], {"wait": wait}]
+
+
+def default_script(frames):
+    """Close the intro notes, then walk a square and open/close the panels until frames are covered"""
+    script = _press("return")
+    pattern = (_hold("d", 45) + _hold("s", 45) + _hold("a", 45) + _hold("w", 45)
+               + _press("e", 30) + _press("tab")
+               + [[{"type": "MOUSEBUTTONDOWN", "pos": [1410, 65], "button": 1}],
+                  [{"type": "MOUSEBUTTONUP", "pos": [1410, 65], "button": 1}], {"wait": 30}]
+               + _press("tab") + _press("p", 30) + _press("tab"))
+    while _script_length(script) < frames:
+        script += pattern
+    return script
+
+
+def _script_length(script):
+    return sum(frame.get("wait", 1) if isinstance(frame, dict) else 1 for frame in script)
+
+
+def percentiles(values):
+    """p50, p95 and p99 of values"""
+    if len(values) < 2:
+        value = values[0] if values else 0
+        return value, value, value
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def prepare_database(source, workdir):
+    """Copy of the stand-in database that the benchmark is free to write to"""
+    if not os.path.exists(source):
+        print(f"No SQLite database at {source}, create one with: python db_backend.py copy {source}")
+        sys.exit(1)
+    path = os.path.join(workdir, "benchmark.db")
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(path)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+    return path
+
+
+def first_student(backend):
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT TP_Number FROM Students ORDER BY TP_Number")
+        row = cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def play_level(level_number, student, script, frames, backend, trace_allocations=False):
+    """Load a level and replay the script, returns (load seconds, frame seconds, statements, KiB allocated)"""
+    from game_level import GameLevel
+    import gameplay_journal
+
+    random.seed(level_number)  # same questions every run
+    scripted = ScriptedInput(script)
+    start = time.perf_counter()
+    level = GameLevel({'username': student, 'level': level_number}, input_source=scripted, clock=StepClock(scripted))
+    load_time = time.perf_counter() - start
+
+    frame_times = []
+    statements = []
+    allocated = []
+    try:
+        while len(frame_times) < frames and level.running and not scripted.finished:
+            before = backend.statements
+            if trace_allocations:
+                tracemalloc.reset_peak()
+                current = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            level.frame()
+            frame_times.append(time.perf_counter() - start)
+            statements.append(backend.statements - before)
+            if trace_allocations:
+                allocated.append((tracemalloc.get_traced_memory()[1] - current) / 1024)
+    finally:
+        level.close_connection()
+        gameplay_journal.wait_until_applied()
+    return load_time, frame_times, statements, allocated
+
+
+def benchmark(levels, student, script, frames, backend, trace_allocations=True):
+    results = {}
+    for level_number in levels:
+        load_time, frame_times, statements, _ = play_level(level_number, student, script, frames, backend)
+        p50, p95, p99 = percentiles(frame_times)
+        result = {
+            'load_ms': load_time * 1000,
+            'frames': len(frame_times),
+            'frame_p50_ms': p50 * 1000,
+            'frame_p95_ms': p95 * 1000,
+            'frame_p99_ms': p99 * 1000,
+            'db_per_frame': statistics.mean(statements) if statements else 0,
+            'db_max_frame': max(statements, default=0),
+        }
+
+        if trace_allocations:
+            tracemalloc.start()
+            try:
+                allocated = play_level(level_number, student, script, frames, backend, True)[3]
+            finally:
+                tracemalloc.stop()
+            alloc_p50, alloc_p95, _ = percentiles(allocated)
+            result['alloc_p50_kib'] = alloc_p50
+            result['alloc_p95_kib'] = alloc_p95
+
+        results[str(level_number)] = result
+    return results
+
+
+def print_results(results, background_statements):
+    print(f"{'level':>5} {'load ms':>9} {'frames':>6} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}"
+          f" {'db/frame':>8} {'db max':>6} {'alloc p50':>9} {'alloc p95':>9}")
+    for level_number, r in results.items():
+        alloc = (f" {r['alloc_p50_kib']:>7.1f}Ki {r['alloc_p95_kib']:>7.1f}Ki" if 'alloc_p50_kib' in r
+                 else f" {'-':>9} {'-':>9}")
+        print(f"{level_number:>5} {r['load_ms']:>9.1f} {r['frames']:>6} {r['frame_p50_ms']:>7.2f}"
+              f" {r['frame_p95_ms']:>7.2f} {r['frame_p99_ms']:>7.2f} {r['db_per_frame']:>8.2f}"
+              f" {r['db_max_frame']:>6}{alloc}")
+    print(f"Statements run by the gameplay journal in the background: {background_statements}")
+
+
+def compare(results, baseline, tolerance):
+    """Levels whose p95 frame time regressed against the baseline by more than tolerance"""
+    regressions = []
+    for level_number, r in results.items():
+        before = baseline.get(level_number)
+        if before and r['frame_p95_ms'] > before['frame_p95_ms'] * (1 + tolerance):
+            regressions.append(f"Level {level_number}: p95 {r['frame_p95_ms']:.2f} ms,"
+                               f" baseline {before['frame_p95_ms']:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless gameplay benchmark")
+    parser.add_argument("--db", default=SQLITE_PATH, help="SQLite stand-in database (copied, never modified)")
+    parser.add_argument("--student", help="TP_Number to play as (default: first student)")
+    parser.add_argument("--levels", type=int, nargs="+", default=list(LEVELS))
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="frames per level")
+    parser.add_argument("--script", help="input script to replay (default: built-in walk)")
+    parser.add_argument("--no-alloc", action="store_true", help="skip the allocation pass")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file to compare the p95 frame time against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="capstones-benchmark-")
+    # gameplay writes go to a scratch journal, not the one of a real session
+    os.environ["CAPSTONES_JOURNAL_PATH"] = os.path.join(workdir, "gameplay.journal")
+    backend = CountingSqliteBackend(prepare_database(args.db, workdir))
+    set_backend(backend)
+
+    student = args.student or first_student(backend)
+    if not student:
+        print("The database has no students to play as")
+        sys.exit(1)
+    script = ScriptedInput.load(args.script).frames if args.script else default_script(args.frames)
+
+    trace_allocations = not args.no_alloc
+    if trace_allocations and not hasattr(tracemalloc, "reset_peak"):
+        print("Allocation pass skipped, it needs Python 3.9 or newer")
+        trace_allocations = False
+
+    results = benchmark(args.levels, student, script, args.frames, backend, trace_allocations)
+    print_results(results, backend.background_statements)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({'student': student, 'frames': args.frames, 'levels': results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)['levels']
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression - {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
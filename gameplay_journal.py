@@ -0,0 +1,491 @@
+import os
+import json
+import uuid
+import time
+import atexit
+import threading
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+import app_events
+import id_allocator
+import level_stats
+from database_conn import pooled_connection
+from db_backend import DataError, IntegrityError, ProgrammingError, get_backend
+
+
+# Write-behind journal for gameplay writes. The game appends each write to a
+# local file (fsync'd, so it survives a crash) and carries on; a background
+# thread applies the entries to the database in batched transactions. Entries
+# left over from a previous run are applied when the journal starts again.
+#
+# Entry types:
+#   "submission"       an answer was checked     (tp_number, level_id, question_id, answer, status)
+#   "time_saved"       the level timer was saved (tp_number, level_id, time_remaining)
+#   "level_completed"  all passcodes entered     (tp_number, level_id, time_remaining, points)
+#   "level_reset"      a completed level is reattempted (tp_number, level_id)
+#
+# Every game process writes its own journal file and holds a lock on it while
+# it runs: the first one uses JOURNAL_PATH, a second game window on the same
+# install JOURNAL_PATH.1 and so on. A process that starts also takes over the
+# entries of journal files nobody holds any more (a window that crashed).
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOURNAL_PATH = os.environ.get("CAPSTONES_JOURNAL_PATH", os.path.join(BASE_DIR, "database", "gameplay.journal"))
+
+FLUSH_INTERVAL = 0.5  # seconds to collect writes into one transaction
+BATCH_SIZE = 50  # entries per transaction
+RETRY_DELAY = 5  # seconds before retrying a batch that failed, doubled on every further failure
+MAX_RETRY_DELAY = 60
+MAX_BATCH_ATTEMPTS = 5  # then every entry gets its own transaction, so those before a failing one get through
+WAIT_TIMEOUT = 5  # seconds wait_until_applied() waits at most
+
+# Entries already applied, so an entry replayed after a crash is not applied twice
+APPLIED_TABLE = "JournalApplied"
+APPLIED_COLUMNS = """
+    OpID VARCHAR(32) NOT NULL PRIMARY KEY
+"""
+
+# Errors that will not go away by retrying the same entry (KeyError etc.: an entry missing fields).
+# Only these set an entry aside, anything else (a lock timeout, a deadlock, a lost connection)
+# is retried for as long as it takes.
+REJECTED_ERRORS = (IntegrityError, DataError, ProgrammingError, KeyError, TypeError, ValueError)
+
+
+def _try_lock(path):
+    """Exclusive lock on path's lock file without waiting, the open lock file or None if another process holds it"""
+    lock_file = open(path + ".lock", "a")
+    try:
+        if os.name == "nt":
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return lock_file
+    except OSError:
+        lock_file.close()
+        return None
+
+
+def _unlock(lock_file):
+    try:
+        if os.name == "nt":
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    finally:
+        lock_file.close()
+
+
+def _apply_submission(cursor, op, ids):
+    tp_number, level_id, question_id = op["tp_number"], op["level_id"], op["question_id"]
+    cursor.execute("""
+        SELECT status FROM Submissions
+        WHERE TP_Number = ? AND QuestionID = ?
+    """, tp_number, question_id)
+    row = cursor.fetchone()
+    old_status = row[0] if row else None
+
+    # update the existing attempt, insert if there is none
+    if row:
+        cursor.execute("""
+            UPDATE Submissions
+            SET status = ?, student_answer = ?
+            WHERE TP_Number = ? AND QuestionID = ?
+        """, op["status"], op["answer"], tp_number, question_id)
+    else:
+        cursor.execute("""
+            INSERT INTO Submissions (SubmissionID, QuestionID, TP_Number, student_answer, status)
+            VALUES (?, ?, ?, ?, ?)
+        """, ids[op["op_id"]], question_id, tp_number, op["answer"], op["status"])
+    level_stats.record_submission(cursor, tp_number, level_id, row is None, old_status, op["status"])
+
+
+def _apply_time_saved(cursor, op, ids):
+    cursor.execute("""
+        UPDATE LevelSelection
+        SET time_remaining = ?
+        WHERE TP_Number = ? AND LevelID = ?
+    """, op["time_remaining"], op["tp_number"], op["level_id"])
+    level_stats.sync_level_state(cursor, op["tp_number"], op["level_id"])
+
+
+def _apply_level_completed(cursor, op, ids):
+    tp_number, level_id = op["tp_number"], op["level_id"]
+    cursor.execute("""
+        UPDATE LevelSelection
+        SET time_remaining = ?, is_completed = ?
+        WHERE TP_Number = ? AND LevelID = ?
+    """, op["time_remaining"], 1, tp_number, level_id)
+    level_stats.sync_level_state(cursor, tp_number, level_id)
+
+    level_index = int(level_id[-1]) + 1
+    next_level = f"LVL00{level_index}"
+
+    cursor.execute("""
+        SELECT current_level
+        FROM Students
+        WHERE TP_Number = ?
+    """, tp_number)
+    db_level = cursor.fetchone()
+
+    # points are only awarded the first time a level is completed
+    if db_level and (db_level[0] or 0) < level_index:
+        if level_id != "LVL005":
+            cursor.execute("""
+                UPDATE Students
+                SET Score = Score + ?, current_level = ?
+                WHERE TP_Number = ?
+            """, op["points"], level_index, tp_number)
+
+            # unlock next level (not necessary for last level LVL005)
+            cursor.execute("""
+                UPDATE LevelSelection
+                SET is_locked = 0
+                WHERE TP_Number = ? AND LevelID = ?
+            """, tp_number, next_level)
+        else:
+            cursor.execute("""
+                UPDATE Students
+                SET Score = Score + ?
+                WHERE TP_Number = ?
+            """, op["points"], tp_number)
+
+
+def _apply_level_reset(cursor, op, ids):
+    tp_number, level_id = op["tp_number"], op["level_id"]
+    cursor.execute("""
+        UPDATE Submissions
+        SET student_answer = '', status = 0
+        WHERE TP_Number = ? AND QuestionID IN (
+            SELECT QuestionID FROM QuestionDetails WHERE LevelID = ?
+        )
+    """, tp_number, level_id)
+    cursor.execute("""
+        UPDATE LevelSelection
+        SET is_completed = 0, time_remaining = 600
+        WHERE TP_Number = ? AND LevelID = ?
+    """, tp_number, level_id)
+    level_stats.reset_level(cursor, tp_number, level_id)
+
+
+HANDLERS = {
+    "submission": _apply_submission,
+    "time_saved": _apply_time_saved,
+    "level_completed": _apply_level_completed,
+    "level_reset": _apply_level_reset,
+}
+
+# Entry types that change a student's progress (published as "progress_changed" once applied)
+PROGRESS_OPS = ("level_completed", "level_reset")
+
+
+class GameplayJournal:
+    """Append-only journal file plus the thread that applies it to the database"""
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path  # first journal file; the rejected entries of every process go next to it
+        self.file_path = None  # the journal file this process writes, locked while it runs
+        self._file_lock = None
+        self._lock = threading.Condition()
+        self._pending = []  # entries written but not applied yet, oldest first
+        self._applied_ids = []  # entries applied since the file was last emptied
+        self._file = None
+        self._thread = None
+        self._closed = False
+        self._flush_requested = False
+        self._table_ready = False
+
+    def start(self):
+        """Open the journal, queue entries left over from the last run and start the worker"""
+        with self._lock:
+            if self._file is not None:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._claim_file()
+            self._pending = self._read_entries(self.file_path)
+            self._file = open(self.file_path, "a", encoding="utf-8")
+            if self._file.tell() > 0 and not self._ends_with_newline():
+                self._file.write("\n")  # a crash cut the last entry short, start a fresh line
+            self._adopt_orphans()
+            if self._pending:
+                print(f"Replaying {len(self._pending)} gameplay journal entries")
+            self._thread = threading.Thread(target=self._run, name="gameplay-journal", daemon=True)
+            self._thread.start()
+
+    def _claim_file(self):
+        """Lock the first journal file no other game process is using"""
+        number = 0
+        while True:
+            path = self.path if number == 0 else f"{self.path}.{number}"
+            self._file_lock = _try_lock(path)
+            if self._file_lock:
+                self.file_path = path
+                return
+            number += 1
+
+    def _journal_files(self):
+        """Every journal file of this install, in use or not"""
+        folder, name = os.path.split(self.path)
+        paths = []
+        for entry in os.listdir(folder):
+            suffix = entry[len(name) + 1:]
+            if entry == name or (entry.startswith(name + ".") and suffix.isdigit()):
+                paths.append(os.path.join(folder, entry))
+        return paths
+
+    def _adopt_orphans(self):
+        """Move the entries of journal files no process holds into this one, so they are applied"""
+        for path in self._journal_files():
+            if path == self.file_path:
+                continue
+            lock_file = _try_lock(path)
+            if lock_file is None:
+                continue  # another game window is still using it
+            try:
+                entries = self._read_entries(path)
+                if entries:
+                    print(f"Taking over {len(entries)} gameplay journal entries from {os.path.basename(path)}")
+                    for op in entries:
+                        self._file.write(json.dumps(op) + "\n")
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    self._pending.extend(entries)
+                # only after its entries are safe in this journal; the lock file stays, removing
+                # it could let two processes lock different files for the same journal
+                os.remove(path)
+            except OSError as e:
+                print(f"Error taking over gameplay journal {path}: {e}")
+            finally:
+                _unlock(lock_file)
+
+    def _read_entries(self, path):
+        entries = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        print(f"Skipping damaged gameplay journal entry: {line[:80]}")
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _ends_with_newline(self):
+        with open(self.file_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def record(self, op_type, **fields):
+        """Append an entry and return at once; it reaches the database in the background"""
+        if op_type not in HANDLERS:
+            raise ValueError(f"Unknown gameplay journal entry: {op_type}")
+        self.start()
+        op = dict(fields, op=op_type, op_id=uuid.uuid4().hex)
+        line = json.dumps(op)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending.append(op)
+            self._lock.notify_all()
+        return op["op_id"]
+
+    def wait_until_applied(self, timeout=WAIT_TIMEOUT):
+        """
+        Wait until every entry written so far is in the database, so it can be
+        read back. Returns False if that did not happen within timeout seconds.
+        """
+        self.start()
+        with self._lock:
+            if not self._pending:
+                return True
+            self._flush_requested = True
+            self._lock.notify_all()
+            return self._lock.wait_for(lambda: not self._pending, timeout)
+
+    def close(self, timeout=WAIT_TIMEOUT):
+        """Apply what can be applied within timeout seconds and stop; the rest is replayed next run"""
+        with self._lock:
+            if self._file is None or self._closed:
+                return
+            self._closed = True
+            self._lock.notify_all()
+        self._thread.join(timeout)
+        # the file stays open: entries written after this are still saved and replayed next run
+
+    def _run(self):
+        failures = 0  # failed attempts at the oldest pending entries
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._lock.wait()
+                if not self._pending:
+                    return
+
+                # let a burst of writes share one transaction
+                deadline = time.monotonic() + FLUSH_INTERVAL
+                while len(self._pending) < BATCH_SIZE and not self._flush_requested and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._lock.wait(remaining)
+                batch = self._pending[:BATCH_SIZE]
+
+            try:
+                progress = self._apply_batch(batch, one_by_one=failures >= MAX_BATCH_ATTEMPTS)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY)
+                print(f"Error applying gameplay journal (attempt {failures}), retrying in {delay} s: {e}")
+                if failures == MAX_BATCH_ATTEMPTS:
+                    print("Gameplay journal: applying the next batch entry by entry until the database accepts it")
+                with self._lock:
+                    if self._closed:
+                        return
+                    self._lock.wait(delay)
+                continue
+
+            with self._lock:
+                del self._pending[:len(batch)]
+                self._applied_ids.extend(op["op_id"] for op in batch)
+                prune = []
+                if not self._pending:
+                    # everything in the file is applied, it can start over empty
+                    self._file.seek(0)
+                    self._file.truncate()
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    prune, self._applied_ids = self._applied_ids, []
+                    self._flush_requested = False
+                self._lock.notify_all()
+
+            for tp_number in progress:
+                app_events.publish("progress_changed", tp_number=tp_number)
+            if prune:
+                self._prune(prune)
+
+    def _apply_batch(self, batch, one_by_one=False):
+        """
+        Apply entries in one transaction, returns the students whose progress
+        changed. With one_by_one (the batch kept failing) every entry gets its
+        own transaction, so the entries before one that keeps failing are applied.
+        Entries failing with one of REJECTED_ERRORS are set aside, other errors
+        are raised and the rest of the batch is retried.
+        """
+        level_stats.ensure_ready()  # the handlers keep LevelStats up to date
+        ids = self._reserve_ids(batch)
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            if not self._table_ready:
+                get_backend().ensure_table(cursor, APPLIED_TABLE, APPLIED_COLUMNS)
+                conn.commit()
+                self._table_ready = True
+
+            if not one_by_one:
+                try:
+                    progress = self._apply(cursor, batch, ids)
+                    conn.commit()
+                    return progress
+                except REJECTED_ERRORS as e:
+                    conn.rollback()
+                    print(f"Gameplay journal batch failed, applying entries one by one: {e}")
+
+            # one entry the database will never accept must not hold up the others
+            progress = set()
+            for op in batch:
+                try:
+                    progress |= self._apply(cursor, [op], ids)
+                    conn.commit()
+                except REJECTED_ERRORS as e:
+                    conn.rollback()
+                    self._reject(op, e)
+            return progress
+
+    def _reserve_ids(self, batch):
+        """
+        SubmissionIDs for the batch's submission entries, keyed by op_id. They are
+        reserved before the batch's transaction writes anything: running out of a
+        block mid-transaction makes the allocator write on a second connection,
+        which on SQLite waits for this transaction's lock until it times out.
+        Entries that turn out to update an existing row leave their ID unused.
+        """
+        op_ids = [op["op_id"] for op in batch if op.get("op") == "submission"]
+        if not op_ids:
+            return {}
+        return dict(zip(op_ids, id_allocator.next_ids("SBM", len(op_ids))))
+
+    def _apply(self, cursor, ops, ids):
+        placeholders = ", ".join("?" for _ in ops)
+        cursor.execute(f"SELECT OpID FROM {APPLIED_TABLE} WHERE OpID IN ({placeholders})",
+                       *[op["op_id"] for op in ops])
+        done = {row[0] for row in cursor.fetchall()}
+
+        progress = set()
+        for op in ops:
+            if op["op_id"] in done:
+                continue  # applied before the journal could be emptied
+            handler = HANDLERS.get(op.get("op"))
+            if handler is None:
+                raise ValueError(f"unknown entry type {op.get('op')}")
+            handler(cursor, op, ids)
+            cursor.execute(f"INSERT INTO {APPLIED_TABLE} (OpID) VALUES (?)", op["op_id"])
+            if op["op"] in PROGRESS_OPS:
+                progress.add(op["tp_number"])
+        return progress
+
+    def _reject(self, op, error):
+        """Keep an entry the database refused next to the journal instead of retrying it forever"""
+        print(f"Gameplay journal entry rejected: {op} ({error})")
+        try:
+            with open(self.path + ".rejected", "a", encoding="utf-8") as f:
+                f.write(json.dumps(dict(op, error=str(error))) + "\n")
+        except OSError as e:
+            print(f"Error saving rejected journal entry: {e}")
+
+    def _prune(self, op_ids):
+        """Forget applied entries that are no longer in the journal file"""
+        try:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                for start in range(0, len(op_ids), 100):
+                    chunk = op_ids[start:start + 100]
+                    placeholders = ", ".join("?" for _ in chunk)
+                    cursor.execute(f"DELETE FROM {APPLIED_TABLE} WHERE OpID IN ({placeholders})", *chunk)
+                conn.commit()
+        except Exception as e:
+            print(f"Error pruning applied journal entries: {e}")
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """The process-wide journal, started on first use"""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = GameplayJournal()
+            _journal.start()
+            atexit.register(_journal.close)
+    return _journal
+
+
+def record(op_type, **fields):
+    """Journal a gameplay write (see the entry types above)"""
+    return get_journal().record(op_type, **fields)
+
+
+def wait_until_applied(timeout=WAIT_TIMEOUT):
+    """Wait until earlier gameplay writes can be read back from the database"""
+    return get_journal().wait_until_applied(timeout)
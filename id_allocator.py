@@ -0,0 +1,125 @@
+import threading
+
+from database_conn import pooled_connection
+from db_backend import IntegrityError, OperationalError, get_backend
+
+
+# ID families: table, key column, string format and the number the first ID counts up from
+FAMILIES = {
+    "SBM": ("Submissions", "SubmissionID", "SBM{:05d}", 0),
+    "LS": ("LevelSelection", "LevelSelectionID", "LS{:04d}", 0),
+    "INV": ("Inventory", "InventoryID", "INV{:03d}", 0),
+    "ITM": ("Items", "ItemID", "ITM{:03d}", 0),
+    "QST": ("QuestionDetails", "QuestionID", "QST{:03d}", 100),  # first question is QST101
+}
+
+# IDs reserved per round trip. Unused IDs are lost when the program exits, so the
+# narrow families (3 digit keys in a VARCHAR(6) column) only reserve what they need.
+BLOCK_SIZES = {
+    "SBM": 20,
+    "LS": 5,  # registration creates one row per level
+    "INV": 1,
+    "ITM": 1,
+    "QST": 1,
+}
+
+SEQUENCE_TABLE = "IdSequences"
+SEQUENCE_COLUMNS = """
+    Family VARCHAR(8) NOT NULL PRIMARY KEY,
+    NextValue INT NOT NULL
+"""
+
+
+class IdAllocator:
+    """
+    Hands out string IDs (SBM00001, LS0001, ...) from blocks reserved in the
+    IdSequences table. Reserving a block is a single row update, so it costs the
+    same no matter how big the tables get, and two programs never get the same ID.
+
+    Take IDs before the caller's transaction writes anything: a new block is
+    reserved on a second connection, and on SQLite that connection waits for
+    the caller's write lock until it times out ("database is locked").
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocks = {}  # family -> [next number, end of block]
+        self._table_ready = False
+
+    def next_id(self, family):
+        """Return the next ID of a family"""
+        return self.next_ids(family, 1)[0]
+
+    def next_ids(self, family, count):
+        """Return count new IDs of a family"""
+        if family not in FAMILIES:
+            raise ValueError(f"Unknown ID family: {family}")
+        id_format = FAMILIES[family][2]
+
+        with self._lock:
+            ids = []
+            while len(ids) < count:
+                block = self._blocks.get(family)
+                if block is None or block[0] >= block[1]:
+                    size = max(BLOCK_SIZES[family], count - len(ids))
+                    start = self._reserve_block(family, size)
+                    block = self._blocks[family] = [start, start + size]
+                ids.append(id_format.format(block[0]))
+                block[0] += 1
+            return ids
+
+    def _reserve_block(self, family, size):
+        """Reserve size numbers in the database and return the first one"""
+        # a separate short transaction, so the sequence row is never locked for long
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            if not self._table_ready:
+                get_backend().ensure_table(cursor, SEQUENCE_TABLE, SEQUENCE_COLUMNS)
+                conn.commit()
+                self._table_ready = True
+
+            for _ in range(3):
+                cursor.execute(f"UPDATE {SEQUENCE_TABLE} SET NextValue = NextValue + ? WHERE Family = ?",
+                               size, family)
+                if cursor.rowcount > 0:
+                    cursor.execute(f"SELECT NextValue FROM {SEQUENCE_TABLE} WHERE Family = ?", family)
+                    end = cursor.fetchone()[0]
+                    conn.commit()
+                    return end - size
+
+                # first use of this family: start after the highest existing ID (one scan, once)
+                start = self._highest_existing(cursor, family) + 1
+                try:
+                    cursor.execute(f"INSERT INTO {SEQUENCE_TABLE} (Family, NextValue) VALUES (?, ?)",
+                                   family, start + size)
+                    conn.commit()
+                    return start
+                except IntegrityError:
+                    # another program seeded the family at the same time, use its row
+                    conn.rollback()
+
+        raise OperationalError(f"Could not reserve IDs for {family}")
+
+    def _highest_existing(self, cursor, family):
+        """Highest number already used by a family"""
+        table, column, _, floor = FAMILIES[family]
+        cursor.execute(f"""
+            SELECT MAX(CAST(SUBSTRING({column}, {len(family) + 1}, 10) AS INT))
+            FROM {table}
+            WHERE {column} LIKE '{family}%'
+        """)
+        highest = cursor.fetchone()[0] or 0
+        return max(highest, floor)
+
+
+_allocator = IdAllocator()
+
+
+def next_id(family):
+    """Return the next ID of a family, e.g. next_id("SBM") -> "SBM00042" (call before writing)"""
+    return _allocator.next_id(family)
+
+
+def next_ids(family, count):
+    """Return a list of count new IDs of a family (call before writing)"""
+    return _allocator.next_ids(family, count)
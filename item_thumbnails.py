@@ -0,0 +1,138 @@
+import io
+import sys
+import threading
+
+from PIL import Image
+
+from database_conn import pooled_connection
+from db_backend import get_backend
+
+
+# Small, already decoded copies of every shop item's image. The shops show
+# these instead of decoding and resizing the full item_data BLOB each time.
+THUMBNAIL_TABLE = "ItemThumbnails"
+THUMBNAIL_COLUMNS = """
+    ItemID VARCHAR(6) NOT NULL,
+    Size INT NOT NULL,
+    Mode VARCHAR(4) NOT NULL,
+    Pixels {blob} NOT NULL,
+    PRIMARY KEY (ItemID, Size)
+"""
+
+# Square sizes kept per item: the student shop (pygame) and the lecturer Theme Shop
+SHOP_SIZE = 100
+THEME_SHOP_SIZE = 150
+SIZES = (SHOP_SIZE, THEME_SHOP_SIZE)
+
+_lock = threading.Lock()
+_ready = False
+
+
+def make_thumbnail(image_data, size):
+    """(mode, raw pixel bytes) of image_data resized to size x size, or None if it is not an image"""
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        image = image.resize((size, size), Image.Resampling.LANCZOS)
+        return image.mode, image.tobytes()
+    except Exception as e:
+        print(f"Error creating thumbnail: {e}")
+        return None
+
+
+def save_thumbnails(cursor, item_id, image_data):
+    """(Re)create the thumbnails of an item in the caller's transaction, call after adding or editing it"""
+    delete_thumbnails(cursor, item_id)
+    if not image_data:
+        return
+    rows = []
+    for size in SIZES:
+        thumbnail = make_thumbnail(image_data, size)
+        if thumbnail:
+            rows.append((item_id, size, thumbnail[0], thumbnail[1]))
+    if rows:
+        cursor.executemany(f"""
+            INSERT INTO {THUMBNAIL_TABLE} (ItemID, Size, Mode, Pixels)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+
+
+def delete_thumbnails(cursor, item_id):
+    """Remove the thumbnails of an item in the caller's transaction"""
+    cursor.execute(f"DELETE FROM {THUMBNAIL_TABLE} WHERE ItemID = ?", (item_id,))
+
+
+def fetch_thumbnails(cursor, item_ids, size):
+    """{ItemID: (mode, pixels)} for the items of item_ids that have a thumbnail of size"""
+    item_ids = list(item_ids)
+    if not item_ids:
+        return {}
+    placeholders = ", ".join("?" for _ in item_ids)
+    cursor.execute(f"""
+        SELECT ItemID, Mode, Pixels
+        FROM {THUMBNAIL_TABLE}
+        WHERE Size = ? AND ItemID IN ({placeholders})
+    """, size, *item_ids)
+    return {item_id: (mode, bytes(pixels)) for item_id, mode, pixels in cursor.fetchall()}
+
+
+def ensure_ready():
+    """
+    Create the thumbnail table if needed and generate thumbnails for items
+    that have an image but none yet (once per process). Call it before a
+    connection that will write to the table opens its transaction.
+    """
+    global _ready
+    if _ready:
+        return
+    with _lock:
+        if _ready:
+            return
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            get_backend().ensure_table(cursor, THUMBNAIL_TABLE, THUMBNAIL_COLUMNS)
+            conn.commit()
+            _backfill(cursor)
+            conn.commit()
+        _ready = True
+
+
+def _backfill(cursor, every_item=False):
+    if every_item:
+        cursor.execute("SELECT ItemID FROM Items WHERE item_data IS NOT NULL")
+    else:
+        cursor.execute(f"""
+            SELECT ItemID FROM Items
+            WHERE item_data IS NOT NULL
+              AND ItemID NOT IN (SELECT ItemID FROM {THUMBNAIL_TABLE})
+        """)
+    item_ids = [row[0] for row in cursor.fetchall()]
+
+    # one BLOB at a time, the full images are what this table is meant to avoid holding
+    for item_id in item_ids:
+        cursor.execute("SELECT item_data FROM Items WHERE ItemID = ?", (item_id,))
+        row = cursor.fetchone()
+        save_thumbnails(cursor, item_id, bytes(row[0]) if row and row[0] else None)
+    return len(item_ids)
+
+
+def rebuild():
+    """Regenerate the thumbnails of every item (e.g. after changing SIZES)"""
+    global _ready
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        get_backend().ensure_table(cursor, THUMBNAIL_TABLE, THUMBNAIL_COLUMNS)
+        conn.commit()
+        count = _backfill(cursor, every_item=True)
+        conn.commit()
+    _ready = True
+    return count
+
+
+if __name__ == "__main__":
+    # python item_thumbnails.py rebuild  - regenerate every thumbnail
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python item_thumbnails.py rebuild")
+        sys.exit(1)
+    print(f"Generated thumbnails for {rebuild()} items")
@@ -0,0 +1,130 @@
+import importlib
+import tkinter as tk
+
+from UserData import get_user, set_user
+
+
+# Lecturer screens: name -> (module, function). Every screen function is called
+# as function(root, lecturer_id, **kwargs) and builds its widgets into root.
+ROUTES = {
+    "lecturer_home": ("Lecturer_Home_page", "show_lecturer_home_page"),
+    "content_management": ("Content_Management_Main_page", "show_content_management"),
+    "chapter1": ("Chapter1", "show_chapter"),
+    "chapter2": ("Chapter2", "show_chapter"),
+    "chapter3": ("Chapter3", "show_chapter"),
+    "chapter4": ("Chapter4", "show_chapter"),
+    "chapter5": ("Chapter5", "show_chapter"),
+    "create_quiz": ("createQuiz", "create_quiz"),
+    "edit_quiz": ("editQuiz", "edit_quiz"),
+    "delete_quiz": ("deleteQuiz", "delete_quiz"),
+    "edit_notes": ("editNotes", "edit_notes"),
+    "student_analytics": ("Student_Analytics", "show_student_analytics"),
+    "theme_shop": ("Theme_Shop", "show_theme_shop"),
+}
+
+_shell = None
+
+
+class LecturerShell:
+    """
+    One Tk window for the whole lecturer side. Navigating swaps the screen
+    inside this window instead of starting a new Python process, so imports,
+    pooled database connections and cached data stay alive between screens.
+    """
+
+    def __init__(self):
+        self.root = tk.Tk()
+        self.root.state("zoomed")
+        self.default_bg = self.root.cget("bg")
+        self.current = None  # whatever the screen function returned (may have a cleanup method)
+        self.current_name = None
+        self.result = None
+
+    def show(self, name, lecturer_id=None, **kwargs):
+        """Replace the current screen with screen name"""
+        module_name, function_name = ROUTES[name]
+        if lecturer_id:
+            set_user(lecturer_id)
+        else:
+            lecturer_id = get_user()
+
+        self.clear()
+        try:
+            screen = getattr(importlib.import_module(module_name), function_name)
+            self.current = screen(self.root, lecturer_id, **kwargs)
+            self.current_name = name
+        except Exception as e:
+            print(f"Error opening {name}: {e}")
+            raise
+
+    def clear(self):
+        """Remove everything the current screen put on the window"""
+        cleanup = getattr(self.current, "cleanup", None)
+        if cleanup:
+            try:
+                cleanup()
+            except Exception as e:
+                print(f"Error cleaning up {self.current_name}: {e}")
+        self.current = None
+        self.current_name = None
+
+        # pending after() callbacks of the old screen would touch destroyed widgets
+        for after_id in self.root.tk.splitlist(self.root.tk.call("after", "info")):
+            self.root.after_cancel(after_id)
+        for child in self.root.winfo_children():
+            child.destroy()
+        for sequence in self.root.bind():
+            self.root.unbind(sequence)
+
+        # undo window settings screens may have changed
+        self.root.protocol("WM_DELETE_WINDOW", self.root.destroy)
+        self.root.configure(bg=self.default_bg, cursor="")
+        self.root.minsize(1, 1)
+        columns, rows = self.root.grid_size()
+        for column in range(columns):
+            self.root.grid_columnconfigure(column, weight=0)
+        for row in range(rows):
+            self.root.grid_rowconfigure(row, weight=0)
+
+    def logout(self):
+        """Close the lecturer window, start() returns "logout" """
+        self.result = "logout"
+        self.clear()
+        self.root.destroy()
+
+    def run(self):
+        self.root.mainloop()
+        return self.result
+
+
+def navigate(name, lecturer_id=None, **kwargs):
+    """Switch the lecturer window to screen name (see ROUTES)"""
+    if _shell is None:
+        return start(name, lecturer_id, **kwargs)
+    # let the button callback that asked for this finish before its widgets are destroyed
+    _shell.root.after_idle(lambda: _shell.show(name, lecturer_id, **kwargs))
+
+
+def logout():
+    if _shell is not None:
+        _shell.logout()
+
+
+def start(name, lecturer_id=None, **kwargs):
+    """
+    Open the lecturer window on screen name and run it until it is closed.
+    Returns "logout" when the lecturer logged out, the caller goes back to
+    its login screen.
+    """
+    global _shell
+    if _shell is not None:
+        _shell.show(name, lecturer_id, **kwargs)
+        return None
+
+    _shell = LecturerShell()
+    try:
+        _shell.show(name, lecturer_id, **kwargs)
+        result = _shell.run()
+    finally:
+        _shell = None
+    return result
@@ -1,12 +1,18 @@
 import pygame
 import os
-import pyodbc
+import db_backend
 import io
 from PIL import Image
 from confirmPlay import ConfirmPlay
 import sys
+from collections import namedtuple, OrderedDict
 from PyQt5 import QtWidgets
 from database_conn import connect_db
+from text_cache import get_font, render_text
+import app_events
+import gameplay_journal
+import frame_profiler
+from game_clock import GameClock, STEP, lerp
 
 # Initialize Pygame
 pygame.init()
@@ -14,7 +20,7 @@ pygame.init()
 # Constants
 WIDTH, HEIGHT = 1440, 810  # 75% of 1920x1080 to match individual levels
 PLAYER_SIZE = (60, 100)
-PLAYER_SPEED = 15
+PLAYER_SPEED = 450  # pixels per second
 
 # Paths
 def get_resource_path(relative_path):
@@ -29,6 +35,15 @@ def get_resource_path(relative_path):
 # Get paths relative to the project root
 PLAYER_PATH = get_resource_path("images/player1.png")
 
+DEFAULT_BACKGROUND_ID = "ITM001"
+BACKGROUND_CACHE_SIZE = 4  # decoded backgrounds kept in memory
+
+# Progress of one level, same fields as the progress query
+LevelProgress = namedtuple("LevelProgress", ["current_level", "LevelID", "is_locked", "is_completed"])
+
+# decoded and scaled backgrounds by ItemID, shared by every level selection screen
+_background_cache = OrderedDict()
+
 
 class Ui_MainWindow(object):
     def __init__(self, tp_number):
@@ -47,7 +62,7 @@ class Ui_MainWindow(object):
                     return False
                 self.cursor = self.conn.cursor()
                 return True
-            except pyodbc.Error as e:
+            except db_backend.Error as e:
                 print(f"Database error: {e}")
                 return False
         return True
@@ -65,43 +80,44 @@ class Ui_MainWindow(object):
             self.conn = None
             self.cursor = None
                 
-    def get_equipped_item(self, tp_number):
-        """Get the image data of the currently equipped item"""
+    def get_equipped_item_id(self, tp_number):
+        """Get the ItemID of the currently equipped item (no image data)"""
         if not self.ensure_connection():
             return None
         try:
-            # First try to get equipped item
             self.cursor.execute("""
-                SELECT i.item_data 
+                SELECT inv.ItemID
                 FROM Inventory inv
-                JOIN Items i ON inv.ItemID = i.ItemID
                 WHERE inv.TP_Number = ? AND inv.status = 1
             """, (tp_number,))
             result = self.cursor.fetchone()
-            
-            if result:
-                return result[0]
-            
-            # If no equipped item, get default background
-            self.cursor.execute("""
-                SELECT item_data 
-                FROM Items 
-                WHERE ItemID = 'ITM001'
-            """)
-            default_result = self.cursor.fetchone()
-            return default_result[0] if default_result else None
-            
-        except pyodbc.Error as e:
+
+            # If no equipped item, use default background
+            return result[0] if result else DEFAULT_BACKGROUND_ID
+
+        except db_backend.Error as e:
             print(f"Error fetching equipped item: {e}")
             return None
 
+    def get_item_image(self, item_id):
+        """Get the image data of an item"""
+        if not self.ensure_connection():
+            return None
+        try:
+            self.cursor.execute("SELECT item_data FROM Items WHERE ItemID = ?", (item_id,))
+            result = self.cursor.fetchone()
+            return result[0] if result else None
+        except db_backend.Error as e:
+            print(f"Error fetching item image: {e}")
+            return None
+
     def get_level_info(self, level_id):
         if not self.ensure_connection():
             return None
         try:
             self.cursor.execute("SELECT Name, Description FROM Levels WHERE LevelID = ?", level_id)
             return self.cursor.fetchone()
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             print(f"Error fetching level info: {e}")
             return None
 
@@ -123,11 +139,11 @@ class Ui_MainWindow(object):
             # Find matching record or use defaults
             match = next((r for r in db_results if r[1] == level_id), None)
             if match:
-                progress.append(match)
+                progress.append(LevelProgress(*match))
             else:
                 # Default: locked if level > current_level, unlocked otherwise
                 is_locked = 1 if level_num > db_results[0][0] else 0
-                progress.append((db_results[0][0], level_id, is_locked, 0))
+                progress.append(LevelProgress(db_results[0][0], level_id, is_locked, 0))
 
         return progress
 
@@ -151,7 +167,7 @@ class Ui_MainWindow(object):
                 level_images.append(None)
             
             return level_images[:5]  # Return only first 5 levels
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             print(f"Error fetching level images: {e}")
             return [None] * 5
 
@@ -163,34 +179,39 @@ class Player:
         self.image = pygame.image.load(PLAYER_PATH)
         self.image = pygame.transform.scale(self.image, PLAYER_SIZE)
         self.rect = pygame.Rect(x, y, PLAYER_SIZE[0], PLAYER_SIZE[1])
+        self.x, self.y = float(x), float(y)  # exact position, rect holds it rounded
+        self.prev_pos = (self.x, self.y)  # position one simulation step ago, for interpolation
         self.speed = PLAYER_SPEED
-        self.font = pygame.font.Font(None, 24)
+        self.font = get_font(None, 24)
         self.screen = game.screen
 
-    def move(self, keys, walls):
-        new_rect = self.rect.copy()
+    def move(self, keys, walls, dt):
+        """Move for dt seconds of simulated time"""
+        self.prev_pos = (self.x, self.y)
+        distance = self.speed * dt
+        new_x, new_y = self.x, self.y
         # Arrow keys and WASD controls
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:  # Left arrow or A
-            new_rect.x -= self.speed
+            new_x -= distance
         if keys[pygame.K_RIGHT] or keys[pygame.K_d]:  # Right arrow or D
-            new_rect.x += self.speed
+            new_x += distance
         if keys[pygame.K_UP] or keys[pygame.K_w]:  # Up arrow or W
-            new_rect.y -= self.speed
+            new_y -= distance
         if keys[pygame.K_DOWN] or keys[pygame.K_s]:  # Down arrow or S
-            new_rect.y += self.speed
+            new_y += distance
 
+        new_rect = self.rect.copy()
+        new_rect.topleft = (round(new_x), round(new_y))
         if not any(new_rect.colliderect(wall) for wall in walls):
+            self.x, self.y = new_x, new_y
             self.rect = new_rect
 
     def check_level_interaction(self, keys):
-        # Refresh progress before checking
-        self.game.refresh_student_progress()
-
         for i, (level_x, level_y) in enumerate(self.game.level_positions):
             level_rect = pygame.Rect(level_x, level_y, 50, 50)
             if self.rect.colliderect(level_rect):
                 # Show level number when near
-                level_text = self.font.render(f"Level {i + 1}", True, (255, 255, 255))
+                level_text = render_text(self.font, f"Level {i + 1}", True, (255, 255, 255))
                 self.game.screen.blit(level_text, (level_x, level_y - 30))
 
                 if keys[pygame.K_RETURN]:
@@ -199,18 +220,22 @@ class Player:
                         self.show_message("Level is locked!")
                     else:
                         ConfirmPlay(self.game.screen, i + 1, self.game.tp_number).run()
+                        # the level may have been completed or reset
+                        self.game.invalidate_progress()
+                    self.game.clock.resync()  # the time spent in the message/level is not walked
 
     def show_message(self, text):
         msg_surface = pygame.Surface((300, 50))
         msg_surface.fill((50, 50, 50))
-        text_render = self.font.render(text, True, (255, 255, 255))
+        text_render = render_text(self.font, text, True, (255, 255, 255))
         msg_surface.blit(text_render, (10, 10))
         self.screen.blit(msg_surface, (WIDTH // 2 - 150, HEIGHT // 2 - 25))
         pygame.display.flip()
         pygame.time.delay(1000)
 
-    def draw(self, screen):
-        screen.blit(self.image, self.rect.topleft)
+    def draw(self, screen, alpha=1.0):
+        """Draw between the last two simulated positions (alpha from the game clock)"""
+        screen.blit(self.image, lerp(self.prev_pos, (self.x, self.y), alpha))
 
 
 class levelSelection:
@@ -240,7 +265,7 @@ class levelSelection:
             return
 
         # Button properties
-        self.button_font = pygame.font.Font(None, 28)
+        self.button_font = get_font(None, 28)
         self.button_color = (70, 130, 180)
         self.button_hover_color = (100, 150, 200)
         self.button_text_color = (255, 255, 255)
@@ -255,11 +280,21 @@ class levelSelection:
         # Initialize background
         self.current_bg = pygame.Surface((self.width, self.height))
         self.current_bg.fill((50, 50, 50))  # Default gray background
+        self.current_bg_id = None
+
+        # a level just left may still have writes in the journal, progress must include them
+        if not gameplay_journal.wait_until_applied():
+            print("Warning: earlier gameplay writes are not in the database yet")
+
+        # Progress is only reloaded when something changes (see invalidate_progress)
+        self.student_progress = []
+        self.progress_dirty = True
+        app_events.subscribe("progress_changed", self.on_progress_changed)
+        app_events.subscribe("inventory_changed", self.on_progress_changed)
         self.refresh_student_progress()
-        
+
         self.player = Player(self, 80, 180)
-        self.last_refresh_time = 0
-        self.refresh_interval = 5000
+        self.clock = GameClock()
         
         # Level button properties
         self.level_button_size = 80  # Increased from 50 to 80
@@ -318,16 +353,18 @@ class levelSelection:
 
         # Draw icon if provided (using text as simple icon)
         if icon:
-            icon_surface = self.button_font.render(icon, True, self.button_text_color)
+            icon_surface = render_text(self.button_font, icon, True, self.button_text_color)
             self.screen.blit(icon_surface, (rect.x + 10, rect.y + 10))
 
         # Draw text
-        text_surface = self.button_font.render(text, True, self.button_text_color)
+        text_surface = render_text(self.button_font, text, True, self.button_text_color)
         text_rect = text_surface.get_rect(center=rect.center)
         self.screen.blit(text_surface, text_rect)
 
     def handle_events(self):
         for event in pygame.event.get():
+            if frame_profiler.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 # Store TP number before cleanup
                 tp_number = self.tp_number
@@ -375,17 +412,37 @@ class levelSelection:
                     from quizHistory import QuizHistory
                     quiz_history = QuizHistory(self.screen, self.tp_number)
                     result = quiz_history.run()
+                    self.clock.resync()
                     if result == "level_selection":
                         return None
                 elif self.shop_button_rect.collidepoint(pos):
                     from shop import StudentShop
                     shop = StudentShop(self.screen, self.tp_number)
                     shop.run()
+                    self.clock.resync()
+                    # purchases and equips publish inventory_changed, refresh anyway in case one was missed
+                    self.invalidate_progress()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                # explicit refresh
+                self.invalidate_progress()
         return None
 
     def refresh_background(self):
+        """Show the equipped background, decoding it only the first time an ItemID is seen"""
         try:
-            equipped_bg = self.db.get_equipped_item(self.tp_number)
+            item_id = self.db.get_equipped_item_id(self.tp_number)
+            if item_id is None:
+                return  # keep the current background if the query failed
+            if item_id == self.current_bg_id:
+                return
+
+            if item_id in _background_cache:
+                _background_cache.move_to_end(item_id)
+                self.current_bg = _background_cache[item_id]
+                self.current_bg_id = item_id
+                return
+
+            equipped_bg = self.db.get_item_image(item_id)
             if equipped_bg:
                 image_stream = io.BytesIO(equipped_bg)
                 original = pygame.image.load(image_stream)
@@ -396,21 +453,42 @@ class levelSelection:
                     (1440, 810)  # Directly scale to target size
                 )
                 self.current_bg = scaled_bg
+                self.current_bg_id = item_id
+                _background_cache[item_id] = scaled_bg
+                while len(_background_cache) > BACKGROUND_CACHE_SIZE:
+                    _background_cache.popitem(last=False)
             else:
                 self.current_bg = pygame.Surface((self.width, self.height))
                 self.current_bg.fill((50, 50, 50))
+                self.current_bg_id = None
         except Exception as e:
             print(f"Error loading background: {e}")
             self.current_bg = pygame.Surface((self.width, self.height))
             self.current_bg.fill((50, 50, 50))
+            self.current_bg_id = None
 
     def refresh_student_progress(self):
         """Refresh both progress and background"""
-        self.student_progress = self.db.get_student_progress(self.tp_number)
+        try:
+            self.student_progress = self.db.get_student_progress(self.tp_number)
+        except Exception as e:
+            print(f"Error loading student progress: {e}")
         self.refresh_background()
+        self.progress_dirty = False
+
+    def invalidate_progress(self):
+        """Reload progress and background before the next frame"""
+        self.progress_dirty = True
+
+    def on_progress_changed(self, tp_number=None, **data):
+        """app_events callback for level completions, purchases and equips"""
+        if tp_number is None or tp_number == self.tp_number:
+            self.invalidate_progress()
 
 
     def close(self):
+        app_events.unsubscribe("progress_changed", self.on_progress_changed)
+        app_events.unsubscribe("inventory_changed", self.on_progress_changed)
         if self.db:
             conn = self.db
             conn.close()
@@ -418,15 +496,17 @@ class levelSelection:
     def run(self):
         try:
             while self.running:
+                steps = self.clock.tick()  # waits for the frame-rate cap
+                frame_profiler.begin_frame("levelSelection")
+
                 # Check connection before each iteration
                 if not self.db.ensure_connection():
                     self.show_message("Database connection lost!")
                     break
 
-                current_time = pygame.time.get_ticks()
-                if current_time - self.last_refresh_time > self.refresh_interval:
+                if self.progress_dirty:
                     self.refresh_student_progress()
-                    self.last_refresh_time = current_time
+                frame_profiler.lap("progress")
 
                 # Get mouse position for hover effects
                 mouse_pos = pygame.mouse.get_pos()
@@ -440,11 +520,14 @@ class levelSelection:
                 self.draw_button(self.back_button_rect, "Back", None, back_hover)
                 self.draw_button(self.history_button_rect, "History", None, history_hover)
                 self.draw_button(self.shop_button_rect, "Shop", None, shop_hover)
+                frame_profiler.lap("render.background")
 
                 # Handle player movement and level interaction
                 keys = pygame.key.get_pressed()
-                self.player.move(keys, self.walls)
+                for _ in range(steps):
+                    self.player.move(keys, self.walls, STEP)
                 self.player.check_level_interaction(keys)
+                frame_profiler.lap("update")
 
                 # Draw levels with lock status and borders
                 for i, (level_x, level_y) in enumerate(self.level_positions):
@@ -474,14 +557,21 @@ class levelSelection:
                         lock_icon.fill((0, 0, 0, 128))
                         self.screen.blit(lock_icon, (level_x, level_y))
 
-                self.player.draw(self.screen)
+                frame_profiler.lap("render.levels")
+                self.player.draw(self.screen, self.clock.alpha)
+                frame_profiler.draw_overlay(self.screen)  # F3
+                frame_profiler.lap("render.player")
                 pygame.display.update()
+                frame_profiler.lap("flip")
 
                 # Handle events
                 self.handle_events()
-                pygame.time.delay(30)
+                frame_profiler.lap("events")
+                frame_profiler.end_frame()
 
         finally:
             # Only close the connection when we're completely done with it
+            app_events.unsubscribe("progress_changed", self.on_progress_changed)
+            app_events.unsubscribe("inventory_changed", self.on_progress_changed)
             if hasattr(self, 'db') and self.db:
                 self.db.close()
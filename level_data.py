@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import pickle
+import hashlib
+
+import pygame
+
+from spatial_index import SpatialGrid
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LEVELS_DIR = os.environ.get("CAPSTONES_LEVELS_DIR", os.path.join(BASE_DIR, "levels"))
+COMPILED_DIR = os.environ.get("CAPSTONES_LEVEL_CACHE", os.path.join(BASE_DIR, "cache", "levels"))
+
+# Bump when the layout of the compiled dict changes so old files are ignored
+FORMAT_VERSION = 1
+DEFAULT_LEVEL = 1
+STICKYNOTE_SIZE = (35, 34)  # unscaled sticky note size
+
+
+def definition_path(level_number):
+    return os.path.join(LEVELS_DIR, f"level{level_number}.json")
+
+
+def load_definition(level_number):
+    """Raw JSON layout of a level from levels/level<n>.json (level 1 if the level does not exist)"""
+    path = definition_path(level_number)
+    if not os.path.exists(path):
+        print(f"No layout for level {level_number}, using level {DEFAULT_LEVEL}")
+        path = definition_path(DEFAULT_LEVEL)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def compile_level(definition, scale_factor, cell_size):
+    """
+    Turn a level definition (parsed JSON) into everything GameLevel needs at
+    the given scale: scaled rects, door data, item placements, the
+    item -> question slot mapping and the spatial indexes.
+    """
+    def scale(value):
+        return int(value * scale_factor)
+
+    def scale_rect(rect):
+        return pygame.Rect(scale(rect[0]), scale(rect[1]), scale(rect[2]), scale(rect[3]))
+
+    walls = [scale_rect(wall["rect"]) for wall in definition["walls"]]
+    objects = [scale_rect(obj["rect"]) for obj in definition["objects"]]
+    doors = [{
+        "door_area": scale_rect(door["door_area"]),
+        "floor_area": scale_rect(door["floor_area"]),
+        "destination": (scale(door["destination"][0]), scale(door["destination"][1]))
+    } for door in definition["doors"]]
+
+    collision_index = SpatialGrid(cell_size)
+    for rect in walls + objects:
+        collision_index.insert(rect)
+
+    stickynote_size = (scale(STICKYNOTE_SIZE[0]), scale(STICKYNOTE_SIZE[1]))
+    stickynote_index = SpatialGrid(cell_size)
+    items = []
+    slots = {}
+    for prop in definition["items"]:
+        pos = (scale(prop["pos"][0]), scale(prop["pos"][1]))
+        size = (scale(prop["size"][0]), scale(prop["size"][1]))
+        item = {
+            "id": prop["id"],
+            "type": prop["type"],
+            "pos": pos,
+            "size": size,
+            "rect": pygame.Rect(pos, size),
+            "stickynotes": []
+        }
+        for stickynote in prop["stickynotes"]:
+            note_pos = (pos[0] + scale(stickynote["offset"][0]), pos[1] + scale(stickynote["offset"][1]))
+            note = {
+                "id": stickynote["id"],
+                "rect": pygame.Rect(note_pos, stickynote_size),
+                "position": note_pos
+            }
+            item["stickynotes"].append(note)
+            stickynote_index.insert(note["rect"], (prop["id"], note))
+        items.append(item)
+        slots[prop["id"]] = prop["slot"]
+
+    message = definition["door_message"]
+    door_message_position = (message["pos"][0] * scale_factor + message["offset"][0],
+                             message["pos"][1] * scale_factor + message["offset"][1])
+
+    return {
+        "level": definition["level"],
+        "maps_id": definition["maps_id"],
+        "items_prefix": definition["items_prefix"],
+        "scale_factor": scale_factor,
+        "walls": walls,
+        "objects": objects,
+        "doors": doors,
+        "door_message_position": door_message_position,
+        "stickynote_size": stickynote_size,
+        "items": items,
+        "slots": slots,
+        "collision_index": collision_index,
+        "stickynote_index": stickynote_index
+    }
+
+
+def _compiled_path(level_number, source, scale_factor, cell_size):
+    """Compiled file name, changes whenever the definition, scale or format changes"""
+    fingerprint = hashlib.sha1(source)
+    fingerprint.update(f":{FORMAT_VERSION}:{scale_factor}:{cell_size}".encode())
+    return os.path.join(COMPILED_DIR, f"level{level_number}@{scale_factor}-{fingerprint.hexdigest()[:16]}.pkl")
+
+
+def load_level(level_number, scale_factor, cell_size):
+    """
+    Compiled level for scale_factor, read from cache/levels when it is up to
+    date with the definition file, otherwise compiled and written there.
+    """
+    source = load_definition(level_number)
+    path = _compiled_path(level_number, source, scale_factor, cell_size)
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        pass
+
+    compiled = compile_level(json.loads(source), scale_factor, cell_size)
+    try:
+        os.makedirs(COMPILED_DIR, exist_ok=True)
+        _remove_stale(level_number, scale_factor)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write compiled level {path}: {e}")
+    return compiled
+
+
+def _remove_stale(level_number, scale_factor):
+    """Delete older compiled files of a level at this scale"""
+    prefix = f"level{level_number}@{scale_factor}-"
+    for file_name in os.listdir(COMPILED_DIR):
+        if file_name.startswith(prefix) and file_name.endswith(".pkl"):
+            os.remove(os.path.join(COMPILED_DIR, file_name))
+
+
+def level_numbers():
+    """Numbers of every level that has a definition file"""
+    numbers = []
+    for file_name in os.listdir(LEVELS_DIR):
+        if file_name.startswith("level") and file_name.endswith(".json"):
+            number = file_name[len("level"):-len(".json")]
+            if number.isdigit():
+                numbers.append(int(number))
+    return sorted(numbers)
+
+
+if __name__ == "__main__":
+    # python level_data.py [scale_factor ...]  - compile every level ahead of time (default 0.75)
+    scales = [float(arg) for arg in sys.argv[1:]] or [0.75]
+    for scale_factor in scales:
+        for number in level_numbers():
+            level = load_level(number, scale_factor, int(128 * scale_factor))
+            print(f"Level {number} @ {scale_factor}: {len(level['walls'])} walls, {len(level['objects'])} objects, "
+                  f"{len(level['items'])} items")
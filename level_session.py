@@ -0,0 +1,83 @@
+import random
+
+
+# Items that hold a question in every level (MIT<level>01 .. MIT<level>06)
+QUESTION_SLOTS = 6
+
+
+class LevelSession:
+    """
+    The questions of one play of a level: the question picked for each item,
+    its text, answer and passcode, and the student's submission status. It is
+    loaded with a single query when the level starts, after that sticky notes,
+    answer checks and the passcode screen are all served from memory.
+    """
+
+    def __init__(self, level_id, questions=None, status=None, question_ids=None):
+        self.level_id = level_id
+        self.questions = questions or {}  # QuestionID -> maps_items_id, text, correct_answer, passcode
+        self.status = status or {}  # QuestionID -> submission status (missing if never answered)
+        self.question_ids = question_ids or [None] * QUESTION_SLOTS  # QuestionID per item slot
+
+    @classmethod
+    def load(cls, cursor, tp_number, level_id):
+        """Every question of the level with the student's submission, then one random question per item"""
+        cursor.execute("""
+            SELECT q.QuestionID, q.MapsItemsID, q.Question_text, q.correct_answer, q.passcode, s.status
+            FROM QuestionDetails q
+            LEFT JOIN Submissions s ON s.QuestionID = q.QuestionID AND s.TP_Number = ?
+            WHERE q.LevelID = ?
+        """, tp_number, level_id)
+
+        questions = {}
+        status = {}
+        questions_by_item = {}
+        for question_id, maps_items_id, text, correct_answer, passcode, submission in cursor.fetchall():
+            questions[question_id] = {
+                'maps_items_id': maps_items_id,
+                'text': text,
+                'correct_answer': correct_answer,
+                'passcode': passcode,
+            }
+            if submission is not None:
+                status[question_id] = submission
+            questions_by_item.setdefault(maps_items_id, []).append(question_id)
+
+        # For each MapsItemsID from MIT<n>01 to MIT<n>06, pick one random question
+        question_ids = [None] * QUESTION_SLOTS
+        for i in range(1, QUESTION_SLOTS + 1):
+            candidates = questions_by_item.get(f'MIT{level_id[-1]}0{i}')
+            if candidates:
+                question_ids[i - 1] = random.choice(candidates)
+        return cls(level_id, questions, status, question_ids)
+
+    def question(self, question_id):
+        """Details of a question, or None"""
+        return self.questions.get(question_id)
+
+    def get_status(self, question_id):
+        """Submission status of a question (0 if it was never answered)"""
+        return self.status.get(question_id) or 0
+
+    def check_answer(self, question_id, maps_items_id, answer):
+        """True/False for a question of the given item, None if there is no such question"""
+        question = self.questions.get(question_id)
+        if not question or question['maps_items_id'] != maps_items_id:
+            return None
+        return answer == question['correct_answer']
+
+    def set_status(self, question_id, status):
+        """Remember a new submission status, returns True if it changed"""
+        changed = self.status.get(question_id) != status
+        self.status[question_id] = status
+        return changed
+
+    def reset(self):
+        """Every submission of the level was reset to incorrect (reattempt)"""
+        for question_id in self.status:
+            self.status[question_id] = 0
+
+    def passcodes(self):
+        """(passcode, QuestionID, MapsItemsID) of the questions picked for this play, in item order"""
+        return [(self.questions[question_id]['passcode'], question_id, self.questions[question_id]['maps_items_id'])
+                for question_id in self.question_ids if question_id in self.questions]
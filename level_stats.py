@@ -0,0 +1,185 @@
+import sys
+import threading
+
+from database_conn import pooled_connection
+from db_backend import IntegrityError, get_backend
+
+
+# Per student, per level totals kept up to date by the game, so the dashboards
+# read one row per student and level instead of aggregating every submission.
+STATS_TABLE = "LevelStats"
+STATS_COLUMNS = """
+    TP_Number VARCHAR(8) NOT NULL,
+    LevelID VARCHAR(6) NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    correct INT NOT NULL DEFAULT 0,
+    time_remaining INT,
+    is_completed TINYINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (TP_Number, LevelID)
+"""
+
+_lock = threading.Lock()
+_ready = False
+
+
+def ensure_ready():
+    """
+    Create LevelStats if it does not exist yet and fill it from Submissions and
+    LevelSelection when it is still empty. Runs once per process, call it before
+    a connection that will write to the table opens its transaction.
+    """
+    global _ready
+    if _ready:
+        return
+    with _lock:
+        if _ready:
+            return
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            get_backend().ensure_table(cursor, STATS_TABLE, STATS_COLUMNS)
+            conn.commit()
+
+            cursor.execute(f"SELECT COUNT(*) FROM {STATS_TABLE}")
+            empty = cursor.fetchone()[0] == 0
+            if empty:
+                _rebuild(cursor)
+                conn.commit()
+        _ready = True
+
+
+def _insert_missing(cursor, tp_number, level_id, attempts, correct):
+    """New row for a student and level, time and completion copied from LevelSelection"""
+    try:
+        cursor.execute(f"""
+            INSERT INTO {STATS_TABLE} (TP_Number, LevelID, attempts, correct, time_remaining, is_completed)
+            VALUES (?, ?, ?, ?,
+                    (SELECT MAX(time_remaining) FROM LevelSelection WHERE TP_Number = ? AND LevelID = ?),
+                    COALESCE((SELECT MAX(is_completed) FROM LevelSelection WHERE TP_Number = ? AND LevelID = ?), 0))
+        """, tp_number, level_id, attempts, correct, tp_number, level_id, tp_number, level_id)
+        return True
+    except IntegrityError:
+        return False  # another program created the row first, the caller updates it instead
+
+
+def record_submission(cursor, tp_number, level_id, new_row, old_status, new_status):
+    """
+    Account for one answer in the caller's transaction. new_row is True when
+    the answer created a Submissions row, old_status is the status it replaced.
+    """
+    attempts = 1 if new_row else 0
+    correct = (1 if new_status == 1 else 0) - (1 if old_status == 1 else 0)
+    if attempts == 0 and correct == 0:
+        return
+
+    for _ in range(2):
+        cursor.execute(f"""
+            UPDATE {STATS_TABLE}
+            SET attempts = attempts + ?, correct = correct + ?
+            WHERE TP_Number = ? AND LevelID = ?
+        """, attempts, correct, tp_number, level_id)
+        if cursor.rowcount > 0 or _insert_missing(cursor, tp_number, level_id, attempts, max(correct, 0)):
+            return
+
+
+def sync_level_state(cursor, tp_number, level_id):
+    """Copy time_remaining and is_completed from LevelSelection, call after updating it"""
+    for _ in range(2):
+        cursor.execute(f"""
+            UPDATE {STATS_TABLE}
+            SET time_remaining = (SELECT MAX(time_remaining) FROM LevelSelection
+                                  WHERE TP_Number = ? AND LevelID = ?),
+                is_completed = COALESCE((SELECT MAX(is_completed) FROM LevelSelection
+                                         WHERE TP_Number = ? AND LevelID = ?), 0)
+            WHERE TP_Number = ? AND LevelID = ?
+        """, tp_number, level_id, tp_number, level_id, tp_number, level_id)
+        if cursor.rowcount > 0 or _insert_missing(cursor, tp_number, level_id, 0, 0):
+            return
+
+
+def reset_level(cursor, tp_number, level_id):
+    """Every answer of a level was reset to incorrect (student reattempting the level)"""
+    cursor.execute(f"""
+        UPDATE {STATS_TABLE}
+        SET correct = 0
+        WHERE TP_Number = ? AND LevelID = ?
+    """, tp_number, level_id)
+    sync_level_state(cursor, tp_number, level_id)
+
+
+def _rebuild(cursor, tp_number=None, level_id=None):
+    """Recompute the rows of one student and/or level (all rows by default) from the raw tables"""
+    def where(tp_column, level_column):
+        filters = []
+        params = []
+        if tp_number is not None:
+            filters.append(f"{tp_column} = ?")
+            params.append(tp_number)
+        if level_id is not None:
+            filters.append(f"{level_column} = ?")
+            params.append(level_id)
+        return (f"WHERE {' AND '.join(filters)}" if filters else ""), params
+
+    rows = {}  # (TP_Number, LevelID) -> [attempts, correct, time_remaining, is_completed]
+    selection_where, params = where("TP_Number", "LevelID")
+    cursor.execute(f"""
+        SELECT TP_Number, LevelID, MAX(time_remaining), MAX(is_completed)
+        FROM LevelSelection
+        {selection_where}
+        GROUP BY TP_Number, LevelID
+    """, *params)
+    for tp, level, time_remaining, is_completed in cursor.fetchall():
+        rows[(tp, level)] = [0, 0, time_remaining, is_completed or 0]
+
+    submission_where, params = where("s.TP_Number", "q.LevelID")
+    cursor.execute(f"""
+        SELECT
+            s.TP_Number,
+            q.LevelID,
+            COUNT(*),
+            SUM(CASE WHEN s.status = 1 THEN 1 ELSE 0 END)
+        FROM Submissions s
+        JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
+        {submission_where}
+        GROUP BY s.TP_Number, q.LevelID
+    """, *params)
+    for tp, level, attempts, correct in cursor.fetchall():
+        row = rows.setdefault((tp, level), [0, 0, None, 0])
+        row[0] = attempts or 0
+        row[1] = correct or 0
+
+    stats_where, params = where("TP_Number", "LevelID")
+    cursor.execute(f"DELETE FROM {STATS_TABLE} {stats_where}", *params)
+    if rows:
+        cursor.executemany(f"""
+            INSERT INTO {STATS_TABLE} (TP_Number, LevelID, attempts, correct, time_remaining, is_completed)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(tp, level) + tuple(values) for (tp, level), values in rows.items()])
+    return len(rows)
+
+
+def rebuild(tp_number=None, level_id=None):
+    """
+    Recompute LevelStats from Submissions and LevelSelection, for one student
+    and/or level or for everything. Used for backfill and after changes made
+    outside the game (e.g. a lecturer deleting a question and its submissions).
+    """
+    global _ready
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        if not _ready:
+            get_backend().ensure_table(cursor, STATS_TABLE, STATS_COLUMNS)
+            conn.commit()
+            _ready = True
+        count = _rebuild(cursor, tp_number, level_id)
+        conn.commit()
+    return count
+
+
+if __name__ == "__main__":
+    # python level_stats.py rebuild [TP_Number|-] [LevelID]  - backfill the aggregate table ("-" for every student)
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python level_stats.py rebuild [TP_Number|-] [LevelID]")
+        sys.exit(1)
+    tp_number = sys.argv[2] if len(sys.argv) > 2 and sys.argv[2] != "-" else None
+    level_id = sys.argv[3] if len(sys.argv) > 3 else None
+    print(f"Rebuilt {rebuild(tp_number, level_id)} LevelStats rows")
@@ -1,10 +1,13 @@
 import pygame
-import pyodbc
+import db_backend
 import sys
 
 import os
 from UserData import set_user, get_user_details
 from database_conn import connect_db
+from text_cache import get_font, render_text
+from id_allocator import next_id, next_ids
+import student_search
 # Get the directory where this script is located
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -24,44 +27,6 @@ for font_file in ["Gameplay.ttf", "Gumela.ttf"]:
         import shutil
         shutil.move(src_path, dst_path)
 
-connection_string = (
-    "DRIVER={ODBC Driver 17 for SQL Server};"
-    "SERVER=localhost;"
-    "DATABASE=Capstones;"
-    "Trusted_Connection=yes;"
-)
-
-try:
-    # Establish the connection
-    conn = pyodbc.connect(connection_string)
-    print("Database connection successful!")
-
-    # Create a cursor object to test a query
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1")  # A simple test query
-    print("Test query executed successfully.")
-
-    # Close connection
-    conn.close()
-    print("Connection closed.")
-
-except pyodbc.Error as e:
-    print("Error connecting to database:", e)
-
-
-def connect_db():
-    try:
-        conn = pyodbc.connect(
-            "DRIVER={ODBC Driver 17 for SQL Server};"
-            "SERVER=localhost;"
-            "DATABASE=Capstones;"
-            "Trusted_Connection=yes;"
-        )
-        return conn
-    except pyodbc.Error as e:
-        print("Database connection failed:", e)
-        return None
-
 
 class PlayScreen:
     def __init__(self, screen, tp_number):
@@ -72,7 +37,7 @@ class PlayScreen:
         self.screen = screen
         self.WIDTH, self.HEIGHT = 1440, 810
         self.background = pygame.transform.scale(pygame.image.load(os.path.join(images_dir, "loginScreen.png")), (self.WIDTH, self.HEIGHT))
-        self.font = pygame.font.Font(os.path.join(fonts_dir, "Gameplay.ttf"), 12)
+        self.font = get_font(os.path.join(fonts_dir, "Gameplay.ttf"), 12)
         self.running = True
 
         dialog_width = 600
@@ -115,16 +80,16 @@ class PlayScreen:
         # Confirmation dialog properties
         self.show_confirm_dialog = False
         self.show_exit_confirm = False
-        self.confirm_font = pygame.font.Font(os.path.join(fonts_dir, "Gameplay.ttf"), 24)
+        self.confirm_font = get_font(os.path.join(fonts_dir, "Gameplay.ttf"), 24)
         self.confirm_text = "Are you sure you want to exit?"
         self.exit_confirm_text = "Are you sure you want to exit?"
-        self.confirm_text_surface = self.confirm_font.render(self.confirm_text, True, (0, 0, 0))
-        self.exit_confirm_text_surface = self.confirm_font.render(self.exit_confirm_text, True, (0, 0, 0))
+        self.confirm_text_surface = render_text(self.confirm_font, self.confirm_text, True, (0, 0, 0))
+        self.exit_confirm_text_surface = render_text(self.confirm_font, self.exit_confirm_text, True, (0, 0, 0))
         self.confirm_text_rect = self.confirm_text_surface.get_rect(center=(self.WIDTH // 2, self.dialog_box.y + 20))
         self.exit_confirm_text_rect = self.exit_confirm_text_surface.get_rect(
             center=(self.WIDTH // 2, self.dialog_box.y + 20))
-        self.yes_text = self.confirm_font.render("Yes", True, (255, 255, 255))
-        self.no_text = self.confirm_font.render("No", True, (255, 255, 255))
+        self.yes_text = render_text(self.confirm_font, "Yes", True, (255, 255, 255))
+        self.no_text = render_text(self.confirm_font, "No", True, (255, 255, 255))
 
     def draw_confirmation_dialog(self, is_exit=False):
         # Draw semi-transparent background
@@ -208,8 +173,8 @@ class LoginPage:
     def __init__(self, screen):
         self.screen = screen
         self.background = pygame.transform.scale(pygame.image.load(os.path.join(images_dir, "loginScreen.png")), (1440, 810))
-        self.font = pygame.font.Font(os.path.join(fonts_dir, "Gumela.ttf"), 30)
-        self.label_font = pygame.font.Font(os.path.join(fonts_dir, "Gameplay.ttf"), 25)
+        self.font = get_font(os.path.join(fonts_dir, "Gumela.ttf"), 30)
+        self.label_font = get_font(os.path.join(fonts_dir, "Gameplay.ttf"), 25)
         self.running = True
 
         self.logo = pygame.transform.scale(pygame.image.load(os.path.join(images_dir, "logo.png")), (500, 250))
@@ -240,7 +205,7 @@ class LoginPage:
         self.login_button = pygame.transform.scale(pygame.image.load(os.path.join(images_dir, "login.png")).convert_alpha(), (300, 375))
         self.login_rect = self.login_button.get_rect(topleft=((self.screen.get_width() - self.login_button.get_width()) // 2, 350))
 
-        self.esc_text = self.font.render("Press ESC to go back to homepage", True, (0, 0, 0))
+        self.esc_text = render_text(self.font, "Press ESC to go back to homepage", True, (0, 0, 0))
         self.esc_text = pygame.transform.scale(self.esc_text, (245, 20))
         self.esc_text_rect = self.esc_text.get_rect(topleft=(5, 5))
 
@@ -250,15 +215,15 @@ class LoginPage:
 
         # Confirmation dialog properties
         self.show_confirm_dialog = False
-        self.confirm_font = pygame.font.Font(os.path.join(fonts_dir, "Gumela.ttf"), 24)
+        self.confirm_font = get_font(os.path.join(fonts_dir, "Gumela.ttf"), 24)
         button_x = (self.screen.get_width() - 100) // 2
         self.confirm_yes_button = pygame.Rect(button_x - 100, 410, 100, 40)
         self.confirm_no_button = pygame.Rect(button_x + 100, 410, 100, 40)
         self.confirm_text = "Are you sure you want to exit?"
-        self.confirm_text_surface = self.confirm_font.render(self.confirm_text, True, (0, 0, 0))
+        self.confirm_text_surface = render_text(self.confirm_font, self.confirm_text, True, (0, 0, 0))
         self.confirm_text_rect = self.confirm_text_surface.get_rect(center=(self.screen.get_width() // 2, 370))
-        self.yes_text = self.confirm_font.render("Yes", True, (255, 255, 255))
-        self.no_text = self.confirm_font.render("No", True, (255, 255, 255))
+        self.yes_text = render_text(self.confirm_font, "Yes", True, (255, 255, 255))
+        self.no_text = render_text(self.confirm_font, "No", True, (255, 255, 255))
 
     def draw_confirmation_dialog(self):
         # Draw semi-transparent background
@@ -345,12 +310,7 @@ class LoginPage:
                 if user:
                     print("Lecturer login successful.")
                     set_user(user[0])
-                    # Close pygame window cleanly
-                    pygame.quit()
-                    from Lecturer_Home_page import show_lecturer_home_page
-                    show_lecturer_home_page()
-                    # Launch lecturer home page
-                    sys.exit(0)
+                    return "lecturer", user[0]  # homePage opens the lecturer window
                 else:
                     self.error_message.append(("Invalid lecturer credentials",
                                                (self.id_input_box.x - 150, self.password_input_box.y + 60)))
@@ -358,7 +318,7 @@ class LoginPage:
                 self.error_message.append(("ID must start with 'TP' or 'LT'",
                                            (self.id_input_box.x - 150, self.password_input_box.y + 60)))
 
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             self.error_message.append((f"Database error: {str(e)}",
                                        (self.id_input_box.x - 150, self.password_input_box.y + 60)))
         finally:
@@ -385,7 +345,7 @@ class LoginPage:
                 if self.id_text.strip() and self.password.strip():
                     print(f"Logging in with ID: {self.id_text}, Password: {self.password}")
                     result = self.login_user()
-                    if result and result[0] == "play":  # Check the first element of the tuple
+                    if result:  # ("play", tp_number) or ("lecturer", lecturer_id)
                         return result  # Return the whole tuple
                 else:
                     print("Error: ID and password cannot be empty!")
@@ -460,7 +420,7 @@ class LoginPage:
                 if self.id_text.strip() and self.password.strip():
                     result = self.login_user()
                     print(f"Login result: {result}")  # Debug
-                    if result and result[0] == "play":  # Check if tuple exists
+                    if result:  # Check if tuple exists
                         return result  # Return the full tuple
                 else:
                     print("Error: ID and password cannot be empty!")
@@ -488,8 +448,8 @@ class LoginPage:
             self.screen.blit(self.esc_text, self.esc_text_rect)
 
             # Draw labels
-            self.screen.blit(self.label_font.render("ID:", True, (0, 0, 0)), (490, 275))
-            self.screen.blit(self.label_font.render("Password:", True, (0, 0, 0)), (490, 375))
+            self.screen.blit(render_text(self.label_font, "ID:", True, (0, 0, 0)), (490, 275))
+            self.screen.blit(render_text(self.label_font, "Password:", True, (0, 0, 0)), (490, 375))
 
             # Draw input boxes
             self.draw_input_box(self.id_input_box, self.id_active)
@@ -502,9 +462,9 @@ class LoginPage:
                 self.screen.blit(self.login_button, self.login_rect.topleft)
 
             # Display user input with cursor
-            self.screen.blit(self.font.render(self.id_text, True, (0, 0, 0)),
+            self.screen.blit(render_text(self.font, self.id_text, True, (0, 0, 0)),
                              (self.id_input_box.x + 10, self.id_input_box.y + 5))
-            self.screen.blit(self.font.render("*" * len(self.password), True, (0, 0, 0)),
+            self.screen.blit(render_text(self.font, "*" * len(self.password), True, (0, 0, 0)),
                              (self.password_input_box.x + 10, self.password_input_box.y + 5))
 
             # Draw cursors
@@ -513,7 +473,7 @@ class LoginPage:
 
             # Error Message if exists
             for message, position in self.error_message:
-                error_surface = self.font.render(message, True, (255, 0, 0))
+                error_surface = render_text(self.font, message, True, (255, 0, 0))
                 self.screen.blit(error_surface, position)
 
             # Draw confirmation dialog if active
@@ -552,7 +512,7 @@ class RegisterPage:
         self.register_button = pygame.transform.scale(self.register_button, (300, 375))
         self.register_rect = self.register_button.get_rect(center=((self.screen.get_width()) // 2, 640))
 
-        self.font = pygame.font.Font(os.path.join(fonts_dir, "Gumela.ttf"), 16)
+        self.font = get_font(os.path.join(fonts_dir, "Gumela.ttf"), 16)
         self.running = True
 
         self.error_message = None
@@ -579,7 +539,7 @@ class RegisterPage:
             "Confirm_Password": 20
         }
 
-        self.esc_text = self.font.render("Press ESC to go back to homepage", True, (0, 0, 0))
+        self.esc_text = render_text(self.font, "Press ESC to go back to homepage", True, (0, 0, 0))
         self.esc_text_rect = self.esc_text.get_rect(topleft=(5, 5))
 
         # Add cursor variables
@@ -590,15 +550,15 @@ class RegisterPage:
 
         # Confirmation dialog properties
         self.show_confirm_dialog = False
-        self.confirm_font = pygame.font.Font(os.path.join(fonts_dir, "Gumela.ttf"), 24)
+        self.confirm_font = get_font(os.path.join(fonts_dir, "Gumela.ttf"), 24)
         button_x = (self.screen.get_width() - 100) // 2
         self.confirm_yes_button = pygame.Rect(button_x - 100, 410, 100, 40)
         self.confirm_no_button = pygame.Rect(button_x + 100, 410, 100, 40)
         self.confirm_text = "Are you sure you want to stop registration?"
-        self.confirm_text_surface = self.confirm_font.render(self.confirm_text, True, (0, 0, 0))
+        self.confirm_text_surface = render_text(self.confirm_font, self.confirm_text, True, (0, 0, 0))
         self.confirm_text_rect = self.confirm_text_surface.get_rect(center=(self.screen.get_width() // 2, 370))
-        self.yes_text = self.confirm_font.render("Yes", True, (255, 255, 255))
-        self.no_text = self.confirm_font.render("No", True, (255, 255, 255))
+        self.yes_text = render_text(self.confirm_font, "Yes", True, (255, 255, 255))
+        self.no_text = render_text(self.confirm_font, "No", True, (255, 255, 255))
 
     def draw_confirmation_dialog(self):
         # Draw semi-transparent background
@@ -639,7 +599,7 @@ class RegisterPage:
                     break
             if field_name:
                 font_size = self.input_font_sizes.get(field_name, 25)
-                font = pygame.font.Font(os.path.join(fonts_dir, "Gumela.ttf"), font_size)
+                font = get_font(os.path.join(fonts_dir, "Gumela.ttf"), font_size)
                 cursor_x = rect.x + 10 + font.size(text_before_cursor)[0]
                 # Center the cursor vertically in the input box
                 cursor_y = rect.y + (rect.height - 30) // 2
@@ -658,9 +618,9 @@ class RegisterPage:
     def draw_input_text(self, text, rect, field_name):
         """Draws input text with a custom font size inside the given input box."""
         font_size = self.input_font_sizes.get(field_name, 25)  # Default to 25 if not found
-        font = pygame.font.Font(os.path.join(fonts_dir, "Gumela.ttf"), font_size)
+        font = get_font(os.path.join(fonts_dir, "Gumela.ttf"), font_size)
 
-        text_surface = font.render(text, True, (0, 0, 0))
+        text_surface = render_text(font, text, True, (0, 0, 0))
         self.screen.blit(text_surface, (rect.x + 10, rect.y + (rect.height - text_surface.get_height()) // 2))
 
     def validate_registration(self):
@@ -682,10 +642,18 @@ class RegisterPage:
         return True  # Successfully validated
 
     def register_user(self):
+        try:
+            student_search.ensure_ready()
+        except Exception as e:
+            print(f"Error preparing student search index: {e}")
         conn = connect_db()
         if conn:
             cursor = conn.cursor()
             try:
+                # Reserve IDs up front: 5 LevelSelection rows and the default inventory row
+                level_selection_ids = next_ids("LS", 5)
+                inventory_id = next_id("INV")
+
                 # Insert into Students table
                 cursor.execute("""
                     INSERT INTO Students (TP_Number, Name, Email, Password, Score, current_level)
@@ -693,22 +661,13 @@ class RegisterPage:
                 """, (self.input_texts["TP_Number"].upper(), self.input_texts["Name"],
                       self.input_texts["Email"], self.input_texts["Password"]))
 
-                # First find the highest existing LevelSelectionID to avoid duplicates
-                cursor.execute("SELECT MAX(LevelSelectionID) FROM LevelSelection")
-                result = cursor.fetchone()
-                last_id = result[0] if result[0] else "LS0000"
-
-                # Extract the numeric part and increment from there
-                try:
-                    last_number = int(last_id[2:])
-                    start_number = last_number + 1
-                except (ValueError, TypeError):
-                    start_number = 1
+                # Make the new student findable in the lecturer's player search
+                student_search.index_student(cursor, self.input_texts["TP_Number"].upper(), self.input_texts["Name"])
 
                 # Insert default LevelSelection entries for levels 1–5
                 for level_num in range(1, 6):
                     level_id = f"LVL{level_num:03d}"
-                    level_selection_id = f"LS{start_number:04d}"  # Create unique ID
+                    level_selection_id = level_selection_ids[level_num - 1]
                     is_locked = 1 if level_num > 1 else 0  # Only Level 1 is unlocked
                     is_completed = 0
                     time_remaining = 600  # seconds
@@ -720,24 +679,7 @@ class RegisterPage:
                     """, (level_selection_id, is_locked, is_completed, time_remaining,
                           self.input_texts["TP_Number"].upper(), level_id))
 
-                    start_number += 1  # Increment for the next level
-
                 # Add default inventory item (ITM001) for the new user
-                # First, find the highest existing InventoryID
-                cursor.execute("SELECT MAX(InventoryID) FROM Inventory")
-                inv_result = cursor.fetchone()
-                last_inv_id = inv_result[0] if inv_result[0] else "INV000"
-
-                # Extract the numeric part and increment
-                try:
-                    last_inv_number = int(last_inv_id[3:])
-                    new_inv_number = last_inv_number + 1
-                except (ValueError, TypeError):
-                    new_inv_number = 1
-
-                # Create new inventory ID
-                inventory_id = f"INV{new_inv_number:03d}"
-
                 # Insert default inventory entry - ITM001 with status 1 (equipped)
                 cursor.execute("""
                     INSERT INTO Inventory (InventoryID, ItemID, TP_Number, status)
@@ -748,7 +690,7 @@ class RegisterPage:
                 print("User registered successfully with all default values and default background.")
                 return "login"
 
-            except pyodbc.Error as e:
+            except db_backend.Error as e:
                 self.error_message = f"Database error: {e}"
                 print("Error during registration:", e)
 
@@ -819,7 +761,7 @@ class RegisterPage:
                     
                     for i, char in enumerate(self.input_texts[key]):
                         font_size = self.input_font_sizes.get(key, 25)
-                        font = pygame.font.Font(os.path.join(fonts_dir, "Gumela.ttf"), font_size)
+                        font = get_font(os.path.join(fonts_dir, "Gumela.ttf"), font_size)
                         char_width = font.size(char)[0]
                         if text_width + char_width / 2 > mouse_x:
                             self.cursor_positions[key] = i
@@ -872,7 +814,7 @@ class RegisterPage:
 
             # Display error messages
             if self.error_message:
-                error_surface = self.font.render(self.error_message, True, (255, 0, 0))
+                error_surface = render_text(self.font, self.error_message, True, (255, 0, 0))
                 self.screen.blit(error_surface, ((self.screen.get_width() - error_surface.get_width()) // 2, 550))  # Show error message at bottom
 
             # Define font sizes for each label
@@ -897,18 +839,18 @@ class RegisterPage:
 
             for label in labels:
                 font_size = label_font_sizes.get(label, 25)  # Default font size 25 if not found
-                font = pygame.font.Font(os.path.join(fonts_dir, "Gameplay.ttf"), font_size)
+                font = get_font(os.path.join(fonts_dir, "Gameplay.ttf"), font_size)
 
                 if label == "Confirm Password:":
                     # Split into two lines
-                    confirm_surface = font.render("Confirm", True, (0, 0, 0))
-                    password_surface = font.render("Password:", True, (0, 0, 0))
+                    confirm_surface = render_text(font, "Confirm", True, (0, 0, 0))
+                    password_surface = render_text(font, "Password:", True, (0, 0, 0))
 
                     self.screen.blit(confirm_surface, label_positions[label])  # First line
                     self.screen.blit(password_surface,
                                      (label_positions[label][0], label_positions[label][1] + 30))  # Second line
                 else:
-                    text_surface = font.render(label, True, (0, 0, 0))
+                    text_surface = render_text(font, label, True, (0, 0, 0))
                     position = label_positions.get(label, (490, 150))  # Default position if missing
                     self.screen.blit(text_surface, position)
 
@@ -969,15 +911,18 @@ class RegisterPage:
 
 class homePage:
     def __init__(self):
-        pygame.init()
         self.WIDTH, self.HEIGHT = 1440, 810
-        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
-        pygame.display.set_caption("Home Screen")
-        self.load_assets()
+        self.open_window()
         self.current_page = "home"
         self.running = True
         self.tp_number = None  # 👈 Add this to store the TP number
 
+    def open_window(self):
+        pygame.init()
+        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+        pygame.display.set_caption("Home Screen")
+        self.load_assets()
+
     def load_assets(self):
         self.background = pygame.transform.scale(pygame.image.load(os.path.join(images_dir, "homeScreen.png")), (self.WIDTH, self.HEIGHT))
         self.logo = pygame.transform.scale(pygame.image.load(os.path.join(images_dir, "logo.png")), (500, 250))
@@ -1013,6 +958,8 @@ class homePage:
                     play_screen = PlayScreen(self.screen, self.tp_number)
                     result = play_screen.run()  # Run PlayScreen and get its return
                     self.current_page = result if result else "home"
+                elif isinstance(result, tuple) and result[0] == "lecturer":
+                    self.current_page = self.run_lecturer(result[1])
                 else:
                     self.current_page = result if result else "home"
             elif self.current_page == "register":
@@ -1032,6 +979,15 @@ class homePage:
 
         pygame.quit()
 
+    def run_lecturer(self, lecturer_id):
+        """Run the lecturer window (tkinter) in place of this one, "home" again after a logout"""
+        import lecturer_shell
+        pygame.quit()  # close the pygame window while the lecturer screens are open
+        if lecturer_shell.start("lecturer_home", lecturer_id) != "logout":
+            return None  # lecturer window closed, quit
+        self.open_window()
+        return "home"
+
     def run_home(self):
         while self.current_page == "home":
             self.screen.blit(self.background, (0, 0))
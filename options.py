@@ -1,7 +1,8 @@
 import pygame
 from pygame.locals import *
 from levelSelection import levelSelection
-from database_conn import connect_db
+import gameplay_journal
+from text_cache import get_font, render_text
 
 
 class Options:
@@ -14,9 +15,6 @@ class Options:
         self.result = None
         self.time_remaining = time
 
-        self.conn = connect_db()
-        self.cursor = self.conn.cursor()
-
         # Colors
         self.BLACK = (0, 0, 0)
         self.WHITE = (255, 255, 255)
@@ -24,8 +22,8 @@ class Options:
         self.LIGHT_GRAY = (200, 200, 200)
 
         # Fonts
-        self.font = pygame.font.Font(None, 36)
-        self.title_font = pygame.font.Font(None, 48)
+        self.font = get_font(None, 36)
+        self.title_font = get_font(None, 48)
 
         # Button properties
         self.button_width = 200
@@ -76,15 +74,10 @@ class Options:
                         self.result = 'return'
                     elif self.exit_button['rect'].collidepoint(mouse_pos):
                         try:
-                            self.cursor.execute("""
-                                UPDATE LevelSelection
-                                SET time_remaining = ?
-                                WHERE TP_Number = ? AND LevelID = ?
-                                """, self.time_remaining, self.tp_number, self.level)
-                            self.conn.commit()
+                            gameplay_journal.record("time_saved", tp_number=self.tp_number, level_id=self.level,
+                                                    time_remaining=self.time_remaining)
                         except Exception as e:
-                            self.conn.rollback()
-                            print(f"Database error: {e}")
+                            print(f"Error saving time remaining: {e}")
                         self.running = False
                         levelSelection(self.screen, self.tp_number).run()
                         self.result = 'exit'
@@ -101,7 +94,7 @@ class Options:
         self.screen.blit(overlay, (0, 0))
 
         # Draw title
-        title_text = self.title_font.render('Game Paused', True, self.WHITE)
+        title_text = render_text(self.title_font, 'Game Paused', True, self.WHITE)
         title_rect = title_text.get_rect(center=(self.screen.get_width() // 2, 100))
         self.screen.blit(title_text, title_rect)
 
@@ -112,7 +105,7 @@ class Options:
             pygame.draw.rect(self.screen, color, button['rect'])
             pygame.draw.rect(self.screen, self.WHITE, button['rect'], 2)
 
-            text = self.font.render(button['text'], True, self.BLACK)
+            text = render_text(self.font, button['text'], True, self.BLACK)
             text_rect = text.get_rect(center=button['rect'].center)
             self.screen.blit(text, text_rect)
 
@@ -2,6 +2,9 @@ import pygame
 from pygame.locals import *
 from PyQt5 import QtCore, QtGui, QtWidgets
 from database_conn import connect_db
+import frame_profiler
+import level_stats
+from text_cache import get_font, render_text
 
 # Constants
 WIDTH, HEIGHT = 1440, 810
@@ -16,6 +19,10 @@ BG_COLOR = (3, 70, 63)  # New background color
 class QuizHistoryDB:
     def __init__(self, tp_number):
         self.tp_number = tp_number
+        try:
+            level_stats.ensure_ready()
+        except Exception as e:
+            print(f"Error preparing level statistics: {e}")
         self.conn = connect_db()
         if self.conn is None:
             QtWidgets.QMessageBox.critical(None, "Error", "Database connection failed!")
@@ -27,13 +34,11 @@ class QuizHistoryDB:
             SELECT 
                 l.LevelID,
                 l.Name AS level_name,
-                COUNT(CASE WHEN s.status = 1 THEN 1 END) AS correct_answers,
-                COUNT(*) AS total_questions
-            FROM Submissions s
-            JOIN QuestionDetails q ON s.QuestionID = q.QuestionID
-            JOIN Levels l ON q.LevelID = l.LevelID
-            WHERE s.TP_Number = ?
-            GROUP BY l.LevelID, l.Name
+                ls.correct AS correct_answers,
+                ls.attempts AS total_questions
+            FROM LevelStats ls
+            JOIN Levels l ON ls.LevelID = l.LevelID
+            WHERE ls.TP_Number = ? AND ls.attempts > 0
             ORDER BY l.LevelID
         """, (self.tp_number,))
         return self.cursor.fetchall()
@@ -49,10 +54,10 @@ class QuizHistory:
         pygame.display.set_caption("Quiz History")
 
         # Initialize fonts
-        self.font_title = pygame.font.Font(None, 50)
-        self.font_header = pygame.font.Font(None, 36)
-        self.font_text = pygame.font.Font(None, 28)
-        self.button_font = pygame.font.Font(None, 28)
+        self.font_title = get_font(None, 50)
+        self.font_header = get_font(None, 36)
+        self.font_text = get_font(None, 28)
+        self.button_font = get_font(None, 28)
 
         # Initialize database
         self.db = QuizHistoryDB(self.tp_number)
@@ -86,16 +91,18 @@ class QuizHistory:
 
         # Draw icon if provided
         if icon:
-            icon_surface = self.button_font.render(icon, True, self.button_text_color)
+            icon_surface = render_text(self.button_font, icon, True, self.button_text_color)
             self.screen.blit(icon_surface, (rect.x + 10, rect.y + 10))
 
         # Draw text
-        text_surface = self.button_font.render(text, True, self.button_text_color)
+        text_surface = render_text(self.button_font, text, True, self.button_text_color)
         text_rect = text_surface.get_rect(center=rect.center)
         self.screen.blit(text_surface, text_rect)
 
     def handle_events(self):
         for event in pygame.event.get():
+            if frame_profiler.handle_event(event):
+                continue
             if event.type == QUIT:
                 self.running = False
                 return "quit"
@@ -126,7 +133,7 @@ class QuizHistory:
         self.draw_button(self.back_button, "Back", None, back_hover)
 
         # Draw title with TP number
-        title = self.font_title.render(f"Quiz History for {self.tp_number}", True, COLOR_WHITE)
+        title = render_text(self.font_title, f"Quiz History for {self.tp_number}", True, COLOR_WHITE)
         self.screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 20))
 
         # Draw level entries
@@ -144,22 +151,22 @@ class QuizHistory:
             pygame.draw.rect(self.screen, COLOR_BLACK, card_rect, 2, border_radius=5)
 
             # Draw level info
-            level_text = self.font_header.render(f"{level_name} ({level_id})", True, COLOR_BLUE)
+            level_text = render_text(self.font_header, f"{level_name} ({level_id})", True, COLOR_BLUE)
             self.screen.blit(level_text, (60, y_pos + 15))
 
             # Draw score
-            score_text = self.font_text.render(f"Score: {correct_answers}/{total_questions}", True, COLOR_BLACK)
+            score_text = render_text(self.font_text, f"Score: {correct_answers}/{total_questions}", True, COLOR_BLACK)
             self.screen.blit(score_text, (60, y_pos + 45))
 
             # Draw percentage
             percentage = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
-            percent_text = self.font_text.render(f"{percentage:.0f}%", True,
+            percent_text = render_text(self.font_text, f"{percentage:.0f}%", True,
                                             COLOR_GREEN if percentage >= 50 else COLOR_RED)
             self.screen.blit(percent_text, (WIDTH - 120, y_pos + 30))
 
         # Draw pagination
         total_pages = (len(self.level_data) + self.entries_per_page - 1) // self.entries_per_page
-        page_text = self.font_text.render(f"Page {self.current_page + 1}/{total_pages}", True, COLOR_WHITE)
+        page_text = render_text(self.font_text, f"Page {self.current_page + 1}/{total_pages}", True, COLOR_WHITE)
         self.screen.blit(page_text, (WIDTH // 2 - page_text.get_width() // 2, HEIGHT - 50))
 
         # Navigation buttons (matches levelSelection style)
@@ -169,13 +176,18 @@ class QuizHistory:
         if (self.current_page + 1) * self.entries_per_page < len(self.level_data):
             self.draw_button(self.next_button, "Next", None, next_hover)
 
+        frame_profiler.draw_overlay(self.screen)  # F3
+        frame_profiler.lap("render")
         pygame.display.flip()
+        frame_profiler.lap("flip")
 
     def run(self):
         clock = pygame.time.Clock()
         try:
             while self.running:
+                frame_profiler.begin_frame("QuizHistory")
                 result = self.handle_events()
+                frame_profiler.lap("events")
                 if result == "level_selection":
                     if self.db:
                         try:
@@ -192,6 +204,7 @@ class QuizHistory:
                     return None
 
                 self.draw()
+                frame_profiler.end_frame()
                 clock.tick(60)
 
         except Exception as e:
@@ -4,6 +4,9 @@ setup(
     name="Capstones",
     version="1.0.0",
     py_modules=[
+            'app_events',
+            'asset_cache',
+            'background_cache',
             'Chapter1',
             'Chapter2',
             'Chapter3',
@@ -13,19 +16,37 @@ setup(
             'Content_Management_Main_page',
             'createQuiz',
             'database_conn',
+            'db_backend',
             'deleteQuiz',
+            'dirty_renderer',
             'editNotes',
             'editQuiz',
+            'frame_profiler',
+            'game_clock',
+            'game_input',
             'game_level',
+            'gameplay_benchmark',
+            'gameplay_journal',
+            'id_allocator',
+            'item_thumbnails',
             'Lecturer_Home_page',
+            'lecturer_shell',
+            'level_data',
+            'level_session',
+            'level_stats',
             'levelSelection',
             'login',
             'Navigation_Bar',
             'options',
             'quizHistory',
             'shop',
+            'spatial_index',
             'Student_Analytics',
+            'student_search',
+            'text_cache',
             'Theme_Shop',
+            'tk_tasks',
+            'ui_panels',
             'UserData'
         ],
     install_requires=[
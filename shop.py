@@ -1,12 +1,21 @@
 import pygame
-import pyodbc
+import db_backend
 from PIL import Image
 import io
 import os
+from collections import OrderedDict
 from database_conn import connect_db
+from text_cache import get_sysfont, render_text
+from id_allocator import next_id
+import app_events
+import frame_profiler
+import item_thumbnails
 
 BASE_DIR = os.path.dirname(__file__)
 
+# Item thumbnails kept as pygame surfaces (a few pages of items, 40 KB each)
+THUMBNAIL_CACHE_SIZE = 36
+
 
 class StudentShop:
     def __init__(self, screen, tp_number):
@@ -18,6 +27,12 @@ class StudentShop:
         self.screen_width = 1440
         self.screen_height = 810
 
+        try:
+            item_thumbnails.ensure_ready()
+        except Exception as e:
+            print(f"Error preparing item thumbnails: {e}")
+        self.thumbnails = OrderedDict()  # ItemID -> pygame surface (None if the item has no image)
+
         self.conn = self.connect_to_db()
         if not self.conn:
             self.show_pygame_message("Error", "Failed to connect to database")
@@ -31,8 +46,8 @@ class StudentShop:
         self.load_shop_items()
         self.load_inventory()
 
-        self.font = pygame.font.SysFont('Arial', 20)
-        self.title_font = pygame.font.SysFont('Arial', 30, bold=True)
+        self.font = get_sysfont('Arial', 20)
+        self.title_font = get_sysfont('Arial', 30, bold=True)
         self.button_color = (70, 130, 180)
         self.button_hover_color = (100, 150, 200)
         self.bg_color = (3, 70, 63)
@@ -51,7 +66,7 @@ class StudentShop:
         try:
             conn = connect_db()
             return conn
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             print(f"Database connection failed: {e}")
             return None
 
@@ -67,14 +82,14 @@ class StudentShop:
             raise Exception("Student not found in database")
 
     def load_shop_items(self):
-        query = "SELECT ItemID, Name, Description, Price, item_data FROM Items"
+        query = "SELECT ItemID, Name, Description, Price FROM Items"
         self.cursor.execute(query)
         self.shop_items = self.cursor.fetchall()
 
     def load_inventory(self):
         # Load from database
         query = """
-        SELECT i.ItemID, i.Name, i.Description, i.Price, i.item_data, inv.status 
+        SELECT i.ItemID, i.Name, i.Description, i.Price, inv.status
         FROM Inventory inv
         JOIN Items i ON inv.ItemID = i.ItemID
         WHERE inv.TP_Number = ?
@@ -83,6 +98,39 @@ class StudentShop:
         self.inventory_items = list(self.cursor.fetchall())  # Convert to list
         self.display_items = self.inventory_items  # Use only inventory items
 
+    def load_thumbnails(self, items):
+        """Fetch the thumbnails of items that are not cached yet, in one query"""
+        missing = [item.ItemID for item in items if item.ItemID not in self.thumbnails]
+        if not missing:
+            return
+        try:
+            found = item_thumbnails.fetch_thumbnails(self.cursor, missing, item_thumbnails.SHOP_SIZE)
+        except db_backend.Error as e:
+            print(f"Error loading thumbnails: {e}")
+            found = {}
+
+        size = (item_thumbnails.SHOP_SIZE, item_thumbnails.SHOP_SIZE)
+        for item_id in missing:
+            surface = None
+            if item_id in found:
+                mode, pixels = found[item_id]
+                try:
+                    surface = pygame.image.fromstring(pixels, size, mode)
+                    surface = surface.convert_alpha() if mode == "RGBA" else surface.convert()
+                except Exception as e:
+                    print(f"Error loading image: {e}")
+            self.thumbnails[item_id] = surface
+
+        while len(self.thumbnails) > THUMBNAIL_CACHE_SIZE:
+            self.thumbnails.popitem(last=False)
+
+    def get_thumbnail(self, item_id):
+        """Cached thumbnail surface of an item, or None"""
+        surface = self.thumbnails.get(item_id)
+        if item_id in self.thumbnails:
+            self.thumbnails.move_to_end(item_id)
+        return surface
+
     def show_pygame_message(self, title, message):
         """Show a message using Pygame instead of Tkinter"""
         # Create overlay
@@ -99,20 +147,20 @@ class StudentShop:
         pygame.draw.rect(self.screen, (0, 0, 0), (box_x, box_y, box_width, box_height), 2)
 
         # Draw title
-        title_surf = self.title_font.render(title, True, (0, 0, 0))
+        title_surf = render_text(self.title_font, title, True, (0, 0, 0))
         self.screen.blit(title_surf, (box_x + (box_width - title_surf.get_width()) // 2, box_y + 20))
 
         # Draw message
         y_offset = box_y + 60
         for line in message.split('\n'):
-            msg_surf = self.font.render(line, True, (0, 0, 0))
+            msg_surf = render_text(self.font, line, True, (0, 0, 0))
             self.screen.blit(msg_surf, (box_x + (box_width - msg_surf.get_width()) // 2, y_offset))
             y_offset += 30
 
         # Draw OK button
         ok_rect = pygame.Rect(box_x + (box_width - 100) // 2, box_y + box_height - 50, 100, 30)
         pygame.draw.rect(self.screen, (70, 130, 180), ok_rect)
-        ok_text = self.font.render("OK", True, (255, 255, 255))
+        ok_text = render_text(self.font, "OK", True, (255, 255, 255))
         self.screen.blit(ok_text, (ok_rect.x + (ok_rect.width - ok_text.get_width()) // 2,
                                    ok_rect.y + (ok_rect.height - ok_text.get_height()) // 2))
 
@@ -132,7 +180,7 @@ class StudentShop:
     def draw_button(self, x, y, width, height, text, hover=False):
         color = self.button_hover_color if hover else self.button_color
         pygame.draw.rect(self.screen, color, (x, y, width, height), border_radius=5)
-        text_surf = self.font.render(text, True, (255, 255, 255))
+        text_surf = render_text(self.font, text, True, (255, 255, 255))
         text_rect = text_surf.get_rect(center=(x + width / 2, y + height / 2))
         self.screen.blit(text_surf, text_rect)
         return pygame.Rect(x, y, width, height)
@@ -140,7 +188,7 @@ class StudentShop:
     def draw_text(self, text, x, y, color=None, font=None, center=False):
         color = color or self.text_color
         font = font or self.font
-        text_surf = font.render(text, True, color)
+        text_surf = render_text(font, text, True, color)
         if center:
             text_rect = text_surf.get_rect(center=(x, y))
         else:
@@ -154,19 +202,9 @@ class StudentShop:
         pygame.draw.rect(self.screen, self.item_border_color, (x, y, width, height), 2, border_radius=5)
 
         # Draw item image if available
-        if item.item_data:
-            try:
-                image = Image.open(io.BytesIO(item.item_data))
-                image = image.resize((100, 100), Image.Resampling.LANCZOS)
-                py_image = pygame.image.fromstring(
-                    image.tobytes(),
-                    image.size,
-                    image.mode
-                )
-                self.screen.blit(py_image, (x + 10, y + 10))
-            except Exception as e:
-                print(f"Error loading image: {e}")
-                self.draw_text("No Image", x + 10, y + 10)
+        thumbnail = self.get_thumbnail(item.ItemID)
+        if thumbnail is not None:
+            self.screen.blit(thumbnail, (x + 10, y + 10))
         else:
             self.draw_text("No Image", x + 10, y + 10)
 
@@ -214,13 +252,7 @@ class StudentShop:
                 return False
 
             # Add to inventory
-            self.cursor.execute("SELECT MAX(InventoryID) FROM Inventory")
-            result = self.cursor.fetchone()
-            if result[0]:
-                last_id = int(result[0][3:])
-                new_id = f"INV{last_id + 1:03d}"
-            else:
-                new_id = "INV001"
+            new_id = next_id("INV")
 
             insert_query = """
             INSERT INTO Inventory (InventoryID, ItemID, TP_Number, status)
@@ -237,10 +269,11 @@ class StudentShop:
             # Update local data
             self.student_score -= price
             self.load_inventory()
+            app_events.publish("inventory_changed", tp_number=self.tp_number)
 
             self.show_pygame_message("Purchase Successful", "Item purchased successfully!")
             return True
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             self.conn.rollback()
             self.show_pygame_message("Database Error", f"Failed to purchase item:\n{str(e)}")
             return False
@@ -273,9 +306,10 @@ class StudentShop:
                         item.status = 1
 
             self.conn.commit()
+            app_events.publish("inventory_changed", tp_number=self.tp_number)
             return True
 
-        except pyodbc.Error as e:
+        except db_backend.Error as e:
             self.conn.rollback()
             self.show_pygame_message("Error", f"Failed to equip item:\n{str(e)}")
             return False
@@ -284,15 +318,20 @@ class StudentShop:
         clock = pygame.time.Clock()
 
         while self.running:
+            frame_profiler.begin_frame("StudentShop")
             mouse_pos = pygame.mouse.get_pos()
             mouse_clicked = False
 
             for event in pygame.event.get():
+                if frame_profiler.handle_event(event):
+                    continue
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     mouse_clicked = True
                     if self.back_button_rect.collidepoint(event.pos):
                         self.running = False
 
+            frame_profiler.lap("events")
+
             # Clear screen
             self.screen.fill(self.bg_color)
 
@@ -345,11 +384,14 @@ class StudentShop:
                 title = "Your Inventory"
 
             self.draw_text(title, 220, 120, font=self.title_font, color=(255, 255, 255))
+            frame_profiler.lap("render.header")
 
             # Draw items in grid
             item_rects = []
             start_idx = self.current_page * self.items_per_page
             end_idx = min(start_idx + self.items_per_page, len(items_to_display))
+            self.load_thumbnails(items_to_display[start_idx:end_idx])
+            frame_profiler.lap("thumbnails")
 
             for i in range(start_idx, end_idx):
                 item = items_to_display[i]
@@ -373,6 +415,8 @@ class StudentShop:
                                            owned=owned, equipped=equipped)
                 item_rects.append((item_rect, item))
 
+            frame_profiler.lap("render.items")
+
             # Handle item clicks
             if mouse_clicked:
                 for item_rect, item in item_rects:
@@ -410,7 +454,11 @@ class StudentShop:
                         items_to_display):
                     self.current_page += 1
 
+            frame_profiler.draw_overlay(self.screen)  # F3
+            frame_profiler.lap("render.pager")
             pygame.display.flip()
+            frame_profiler.lap("flip")
+            frame_profiler.end_frame()
             clock.tick(60)
 
     def open_student_shop(screen, tp_number):
@@ -421,8 +469,8 @@ class StudentShop:
             pygame.init()
             error_screen = pygame.display.set_mode((800, 200))
             error_screen.fill((255, 255, 255))
-            font = pygame.font.SysFont('Arial', 24)
-            text = font.render(f"Error: {str(e)}", True, (255, 0, 0))
+            font = get_sysfont('Arial', 24)
+            text = render_text(font, f"Error: {str(e)}", True, (255, 0, 0))
             error_screen.blit(text, (20, 80))
             pygame.display.flip()
             pygame.time.wait(3000)
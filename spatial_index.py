@@ -0,0 +1,80 @@
+import pygame
+
+
+class SpatialGrid:
+    """
+    Uniform grid over the map for collision and proximity queries.
+
+    Every rect is stored in each cell it touches, so a query only looks at the
+    few cells around the area asked about instead of every rect on the map.
+    """
+
+    def __init__(self, cell_size=128):
+        self.cell_size = max(1, int(cell_size))
+        self.cells = {}  # (column, row) -> list of entry indexes
+        self.entries = []  # (rect, value), in insertion order
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _cell_range(self, left, top, right, bottom):
+        """Cells covered by the box [left, right) x [top, bottom)"""
+        size = self.cell_size
+        left, top, right, bottom = int(left), int(top), int(right), int(bottom)
+        for column in range(left // size, (max(right, left + 1) - 1) // size + 1):
+            for row in range(top // size, (max(bottom, top + 1) - 1) // size + 1):
+                yield column, row
+
+    def _candidates(self, left, top, right, bottom):
+        """Indexes of entries stored in the cells of a box, each index once and in insertion order"""
+        found = set()
+        for cell in self._cell_range(left, top, right, bottom):
+            found.update(self.cells.get(cell, ()))
+        return sorted(found)
+
+    def insert(self, rect, value=None):
+        """Add a rect, value is returned by the queries (defaults to the rect)"""
+        rect = pygame.Rect(rect)
+        index = len(self.entries)
+        self.entries.append((rect, rect if value is None else value))
+        for cell in self._cell_range(rect.left, rect.top, rect.right, rect.bottom):
+            self.cells.setdefault(cell, []).append(index)
+
+    def clear(self):
+        self.cells.clear()
+        self.entries = []
+
+    def query_rect(self, rect):
+        """Values of every stored rect overlapping rect"""
+        rect = pygame.Rect(rect)
+        return [self.entries[i][1] for i in self._candidates(rect.left, rect.top, rect.right, rect.bottom)
+                if rect.colliderect(self.entries[i][0])]
+
+    def collides(self, rect):
+        """True if any stored rect overlaps rect (stops at the first hit)"""
+        rect = pygame.Rect(rect)
+        for cell in self._cell_range(rect.left, rect.top, rect.right, rect.bottom):
+            for i in self.cells.get(cell, ()):
+                if rect.colliderect(self.entries[i][0]):
+                    return True
+        return False
+
+    def query_radius(self, point, radius):
+        """Values of every stored rect whose center is within radius of point"""
+        x, y = point
+        r = int(radius) + 1
+        radius_sq = radius * radius
+        result = []
+        for i in self._candidates(x - r, y - r, x + r + 1, y + r + 1):
+            rect, value = self.entries[i]
+            dx = rect.centerx - x
+            dy = rect.centery - y
+            if dx * dx + dy * dy <= radius_sq:
+                result.append(value)
+        return result
+
+    def query_point(self, point):
+        """Values of every stored rect containing point"""
+        x, y = int(point[0]), int(point[1])
+        return [self.entries[i][1] for i in self.cells.get((x // self.cell_size, y // self.cell_size), ())
+                if self.entries[i][0].collidepoint(point)]
@@ -0,0 +1,117 @@
+import threading
+
+from database_conn import pooled_connection
+from db_backend import get_backend
+
+
+# Trigram index over Students.TP_Number and Students.Name. A substring search
+# only has to look at the students that contain every trigram of the search
+# term instead of running LIKE '%term%' over the whole Students table.
+TRIGRAM_TABLE = "StudentTrigrams"
+TRIGRAM_COLUMNS = """
+    Gram VARCHAR(3) NOT NULL,
+    TP_Number VARCHAR(8) NOT NULL,
+    PRIMARY KEY (Gram, TP_Number)
+"""
+GRAM_SIZE = 3
+
+_lock = threading.Lock()
+_ready = False
+
+
+def trigrams(*texts):
+    """Lower case trigrams of every text (each text on its own, none spanning two)"""
+    grams = set()
+    for text in texts:
+        text = (text or "").lower()
+        for i in range(len(text) - GRAM_SIZE + 1):
+            grams.add(text[i:i + GRAM_SIZE])
+    return grams
+
+
+def ensure_ready():
+    """Create the index table if needed and fill it when it is still empty (once per process)"""
+    global _ready
+    if _ready:
+        return
+    with _lock:
+        if _ready:
+            return
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            get_backend().ensure_table(cursor, TRIGRAM_TABLE, TRIGRAM_COLUMNS)
+            conn.commit()
+
+            cursor.execute(f"SELECT COUNT(*) FROM {TRIGRAM_TABLE}")
+            if cursor.fetchone()[0] == 0:
+                _rebuild(cursor)
+                conn.commit()
+        _ready = True
+
+
+def index_student(cursor, tp_number, name):
+    """(Re)index one student in the caller's transaction, e.g. right after registering"""
+    cursor.execute(f"DELETE FROM {TRIGRAM_TABLE} WHERE TP_Number = ?", tp_number)
+    grams = trigrams(tp_number, name)
+    if grams:
+        cursor.executemany(f"INSERT INTO {TRIGRAM_TABLE} (Gram, TP_Number) VALUES (?, ?)",
+                           [(gram, tp_number) for gram in grams])
+
+
+def _rebuild(cursor):
+    cursor.execute("SELECT TP_Number, Name FROM Students")
+    rows = [(gram, tp_number) for tp_number, name in cursor.fetchall() for gram in trigrams(tp_number, name)]
+    cursor.execute(f"DELETE FROM {TRIGRAM_TABLE}")
+    if rows:
+        cursor.executemany(f"INSERT INTO {TRIGRAM_TABLE} (Gram, TP_Number) VALUES (?, ?)", rows)
+    return len(rows)
+
+
+def rebuild():
+    """Re-index every student"""
+    global _ready
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        get_backend().ensure_table(cursor, TRIGRAM_TABLE, TRIGRAM_COLUMNS)
+        count = _rebuild(cursor)
+        conn.commit()
+    _ready = True
+    return count
+
+
+def _like_pattern(term):
+    """LIKE pattern matching term anywhere, with its wildcards escaped (use with ESCAPE '!')"""
+    term = term.replace("!", "!!").replace("%", "!%").replace("_", "!_").replace("[", "![")
+    return f"%{term}%"
+
+
+def search_filter(term, alias="s"):
+    """
+    WHERE condition and parameters matching students whose TP_Number or Name
+    contains term (case insensitive). Terms shorter than a trigram have no
+    trigrams to look up and are matched with LIKE alone; longer terms are
+    narrowed down through the trigram index and then checked with LIKE.
+    """
+    term = (term or "").strip().lower()
+    if not term:
+        return "1 = 1", []
+
+    columns = f"(LOWER({alias}.TP_Number) LIKE ? ESCAPE '!' OR LOWER({alias}.Name) LIKE ? ESCAPE '!')"
+    pattern = _like_pattern(term)
+    grams = sorted(trigrams(term))
+    if not grams:
+        return columns, [pattern, pattern]
+
+    placeholders = ", ".join("?" for _ in grams)
+    condition = f"""{alias}.TP_Number IN (
+            SELECT TP_Number FROM {TRIGRAM_TABLE}
+            WHERE Gram IN ({placeholders})
+            GROUP BY TP_Number
+            HAVING COUNT(*) = ?
+        ) AND {columns}"""
+    return condition, grams + [len(grams), pattern, pattern]
+
+
+if __name__ == "__main__":
+    # python student_search.py  - re-index every student
+    print(f"Indexed {rebuild()} student trigrams")
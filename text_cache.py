@@ -0,0 +1,100 @@
+import os
+from collections import OrderedDict
+
+import pygame
+
+
+# Memory cap for cached text surfaces (bytes)
+TEXT_CACHE_MAX_BYTES = int(float(os.environ.get("CAPSTONES_TEXT_CACHE_MB", 16)) * 1024 * 1024)
+
+_fonts = {}  # (face, size, bold, italic) -> Font
+_text_cache = OrderedDict()  # (font, text, colour, antialias, background) -> Surface, least recently used first
+_text_cache_bytes = 0
+_quit_hook_registered = False
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _register_quit_hook():
+    """Fonts die with pygame.quit(), so drop every cache entry when it is called"""
+    global _quit_hook_registered
+    if not _quit_hook_registered:
+        # pygame forgets its quit functions after calling them, so this is re-registered after every quit
+        pygame.register_quit(clear)
+        _quit_hook_registered = True
+
+
+def get_font(face=None, size=24):
+    """Shared pygame.font.Font for a font file (None = default font) and size"""
+    key = (face, size, False, False)
+    font = _fonts.get(key)
+    if font is None:
+        _register_quit_hook()
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.Font(face, size)
+        _fonts[key] = font
+    return font
+
+
+def get_sysfont(name, size, bold=False, italic=False):
+    """Shared pygame.font.SysFont"""
+    key = (f"sys:{name}", size, bold, italic)
+    font = _fonts.get(key)
+    if font is None:
+        _register_quit_hook()
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.SysFont(name, size, bold=bold, italic=italic)
+        _fonts[key] = font
+    return font
+
+
+def render_text(font, text, antialias, color, background=None):
+    """
+    Same as font.render(), but identical strings are only rendered once.
+    The returned surface is shared, so do not draw on it.
+    """
+    global _text_cache_bytes
+    color = tuple(pygame.Color(color))
+    if background is not None:
+        background = tuple(pygame.Color(background))
+    key = (font, text, color, bool(antialias), background)
+
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        _stats["hits"] += 1
+        return surface
+
+    _stats["misses"] += 1
+    _register_quit_hook()
+    surface = font.render(text, antialias, color, background)
+    size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+    if size > TEXT_CACHE_MAX_BYTES:
+        return surface  # too big to keep
+
+    _text_cache[key] = surface
+    _text_cache_bytes += size
+    while _text_cache_bytes > TEXT_CACHE_MAX_BYTES and _text_cache:
+        _, old = _text_cache.popitem(last=False)
+        _text_cache_bytes -= old.get_width() * old.get_height() * old.get_bytesize()
+        _stats["evictions"] += 1
+    return surface
+
+
+def clear():
+    """Forget every cached font and text surface"""
+    global _text_cache_bytes, _quit_hook_registered
+    _fonts.clear()
+    _text_cache.clear()
+    _text_cache_bytes = 0
+    _quit_hook_registered = False
+
+
+def cache_stats():
+    """Counters of the text cache: hits, misses, evictions, entries and bytes"""
+    stats = dict(_stats)
+    stats["entries"] = len(_text_cache)
+    stats["bytes"] = _text_cache_bytes
+    stats["fonts"] = len(_fonts)
+    return stats
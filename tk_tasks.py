@@ -0,0 +1,115 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Worker threads per screen and how often the Tk thread looks for finished work (ms)
+MAX_WORKERS = int(os.environ.get("CAPSTONES_TK_WORKERS", 4))
+POLL_INTERVAL = 30
+
+
+class TaskRunner:
+    """
+    Runs blocking work (database queries) on a small thread pool so the Tk
+    window keeps responding, and hands each result back on the Tk thread.
+
+    Every task belongs to a key (usually the panel it fills). Submitting a new
+    task for a key makes the previous one stale: it is cancelled if it has not
+    started yet, and its result is dropped if it has. Results are picked up by
+    polling with root.after, because Tk may only be touched from its own thread.
+    """
+
+    def __init__(self, root, max_workers=MAX_WORKERS):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tk-task")
+        self._results = queue.Queue()  # (key, ticket, ok, value) from the workers
+        self._current = {}  # key -> (ticket, future, on_done, on_error, widget)
+        self._tickets = 0
+        self._lock = threading.Lock()
+        self._poll_id = None
+        self._closed = False
+
+    def submit(self, key, work, on_done, on_error=None, widget=None):
+        """
+        Run work() on a worker thread, then on_done(result) on the Tk thread,
+        or on_error(exception) if work raised. Nothing is called if a newer task
+        was submitted for key, the runner was shut down, or widget (the
+        placeholder the result goes into) has been destroyed in the meantime.
+        """
+        if self._closed:
+            return None
+        self.cancel(key)
+        with self._lock:
+            self._tickets += 1
+            ticket = self._tickets
+        future = self._executor.submit(self._run, key, ticket, work)
+        self._current[key] = (ticket, future, on_done, on_error, widget)
+        self._schedule_poll()
+        return ticket
+
+    def _run(self, key, ticket, work):
+        """Worker thread side: run the work and queue its outcome"""
+        try:
+            self._results.put((key, ticket, True, work()))
+        except Exception as e:
+            self._results.put((key, ticket, False, e))
+
+    def cancel(self, key=None):
+        """Forget the pending task of key (or every pending task)"""
+        keys = list(self._current) if key is None else [key]
+        for k in keys:
+            task = self._current.pop(k, None)
+            if task:
+                task[1].cancel()  # only stops it if no worker has picked it up yet
+
+    def _schedule_poll(self):
+        if self._poll_id is None and not self._closed:
+            self._poll_id = self.root.after(POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        """Tk thread side: deliver finished results that are still wanted"""
+        self._poll_id = None
+        while True:
+            try:
+                key, ticket, ok, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            task = self._current.get(key)
+            if not task or task[0] != ticket:
+                continue  # a newer request replaced this one
+            del self._current[key]
+            _, _, on_done, on_error, widget = task
+            if widget is not None and not self._widget_exists(widget):
+                continue  # the panel was closed while the query ran
+
+            try:
+                if ok:
+                    on_done(value)
+                elif on_error:
+                    on_error(value)
+                else:
+                    print(f"Error in background task {key}: {value}")
+            except Exception as e:
+                print(f"Error showing result of {key}: {e}")
+
+        if self._current:
+            self._schedule_poll()
+
+    def _widget_exists(self, widget):
+        try:
+            return bool(widget.winfo_exists())
+        except Exception:
+            return False
+
+    def shutdown(self):
+        """Drop every pending task and stop the workers (running queries finish in the background)"""
+        self._closed = True
+        self.cancel()
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,47 @@
+def wrap_text(font, text, max_width, separator="\n"):
+    """
+    Split text into lines that fit max_width when rendered with font.
+    An empty paragraph becomes an empty line (vertical spacing).
+    """
+    lines = []
+    for paragraph in text.split(separator):
+        if not paragraph.strip():
+            lines.append("")
+            continue
+
+        current_line = ""
+        for word in paragraph.split(" "):
+            test_line = f"{current_line} {word}".strip()
+            if font.size(test_line)[0] <= max_width:
+                current_line = test_line
+            else:
+                lines.append(current_line)
+                current_line = word
+
+        if current_line:
+            lines.append(current_line)
+    return lines
+
+
+class PreparedPanel:
+    """
+    A composed overlay surface that is built once and rebuilt only when its key
+    (size, text, ...) changes. Drawing it is then a single blit per frame.
+    """
+
+    def __init__(self, build):
+        self.build = build  # build(*key) -> Surface
+        self.key = None
+        self.surface = None
+
+    def get(self, *key):
+        """Return the panel for key, building it if the key changed"""
+        if self.surface is None or key != self.key:
+            self.surface = self.build(*key)
+            self.key = key
+        return self.surface
+
+    def invalidate(self):
+        """Force a rebuild on the next get()"""
+        self.surface = None
+        self.key = None